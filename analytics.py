@@ -0,0 +1,294 @@
+"""
+Çapraz sahiplik analitiği: hangi fonlar aynı hisselerde yoğunlaşıyor, hangi hisselere bu hafta
+birden çok fon girdi / çıktı.
+
+`OwnershipPanel` `portfoy_hareketleri`'ni (veya Parquet deposunu) bir kez okur; fon, hisse ve tarihleri
+tam sayı kimliklere çevirip (interning) satırları NumPy dizilerinde tutar. Görünümler bu diziler
+üzerinde vektörel hesaplanır:
+
+- `matrix(as_of)`: fon × hisse pay oranı matrisi (her fonun `as_of`'a kadarki son kaydı);
+  scipy yüklüyse `scipy.sparse.csr_matrix`, değilse yoğun `numpy` dizisi.
+- `overlap(as_of)`: fon çiftlerinin ortak hisse sayısı ve Jaccard benzerliği (B·Bᵀ).
+- `concentration(as_of)`: hisse başına tutan fon sayısı, toplam pay ve sahipler arası HHI.
+- `co_moves(start, end, kind)`: aynı dönemde aynı hisseye giren (ya da çıkan) fonlar.
+
+Giriş/çıkış, bir fonun ardışık iki kaydı karşılaştırılarak bulunur; yüklenen aralıktaki ilk kayıt için
+önceki durum bilinmediğinden olay üretilmez (`from_db` bu yüzden `lookback_days` kadar erken okur).
+Panel oluşturmak asıl maliyettir; panelde `ResultCache` ile veri sürümüne bağlı saklanması beklenir.
+"""
+import importlib.util
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import instrumentation as instr
+
+# optional backend; yoksa matrisler yoğun numpy dizisi olarak kurulur. scipy yalnızca `matrix()` çağrılınca yüklenir.
+_HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+EVENT_KINDS = ('giris', 'cikis')
+DEFAULT_LOOKBACK_DAYS = 31
+
+DateLike = Union[str, date, datetime, np.datetime64, pd.Timestamp, None]
+
+
+def _day(value: DateLike) -> Optional[np.datetime64]:
+    if value is None:
+        return None
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+def _dense(m) -> np.ndarray:
+    return m.toarray() if hasattr(m, 'toarray') else np.asarray(m)
+
+
+class OwnershipPanel:
+    """
+    Sahiplik kayıtlarının kimliklere çevrilmiş, (fon, tarih) sırasıyla dizilmiş hali.
+
+    funds / stocks / dates: kimlik -> ad/tarih dizileri. Satır dizileri: `fund`, `stock`, `pay`, `snap`.
+    `snap` satırın ait olduğu (fon, tarih) kaydının kimliğidir; `snap_fund`, `snap_date`, `snap_rank`
+    (fonun kaçıncı kaydı olduğu) bu kayıtları tanımlar.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.dropna(subset=['tarih', 'fon_adi', 'hisse_kodu'])
+        fund_codes, funds = pd.factorize(df['fon_adi'], sort=True)
+        stock_codes, stocks = pd.factorize(df['hisse_kodu'], sort=True)
+        self.funds = np.asarray(funds, dtype=str).astype(object)
+        self.stocks = np.asarray(stocks, dtype=str).astype(object)
+        # Tarihler az sayıda farklı değerdir: önce kimliklenir, yalnızca farklı değerler çevrilir
+        raw_codes, raw_dates = pd.factorize(df['tarih'])
+        days = pd.to_datetime(pd.Series(raw_dates)).to_numpy().astype('datetime64[D]')
+        self.dates, date_map = np.unique(days, return_inverse=True)
+        date_codes = date_map.ravel()[raw_codes]
+
+        n_dates = max(len(self.dates), 1)
+        snap_key = fund_codes.astype(np.int64) * n_dates + date_codes
+        order = np.argsort(snap_key, kind='stable')
+        snap_keys, self.snap = np.unique(snap_key[order], return_inverse=True)
+        self.fund = fund_codes[order].astype(np.int32)
+        self.stock = stock_codes[order].astype(np.int32)
+        self.pay = pd.to_numeric(df['pay_orani']).to_numpy(dtype=np.float32)[order]
+
+        self.snap_fund = (snap_keys // n_dates).astype(np.int32)
+        self.snap_date = (snap_keys % n_dates).astype(np.int32)
+        # Fonun ilk kaydının konumu; sıra = konum - ilk konum
+        first = np.searchsorted(self.snap_fund, np.arange(len(self.funds)))
+        self.snap_rank = (np.arange(len(snap_keys)) - first[self.snap_fund]).astype(np.int32)
+        self._first_snap = first
+        self._events: Optional[pd.DataFrame] = None
+
+    # --- Oluşturma ---
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "OwnershipPanel":
+        """`get_filtered_data` çıktısı ('Tarih', 'Fon Adı', 'Hisse', 'Pay Oranı (%)') ya da ham kolonlar."""
+        return cls(df.rename(columns={'Tarih': 'tarih', 'Fon Adı': 'fon_adi', 'Hisse': 'hisse_kodu',
+                                      'Pay Oranı (%)': 'pay_orani'}))
+
+    @classmethod
+    @instr.timed("analitik.panel")
+    def from_db(cls, db, start: DateLike = None, end: DateLike = None, funds: Optional[Iterable[str]] = None,
+                source: str = 'sqlite', lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> "OwnershipPanel":
+        """
+        `portfoy_hareketleri`'nden [start - lookback_days, end] aralığını okur (`source='parquet'` iken
+        `db.parquet_store`'dan; değişim kayıtlarıyla çalışan veritabanında `holding_events`'ten yeniden kurarak).
+        Yalnızca tarih, fon, hisse ve pay kolonları okunur.
+        """
+        start = _day(start)
+        end = _day(end)
+        since = str(start - np.timedelta64(lookback_days, 'D')) if start is not None else None
+        funds = list(funds) if funds else None
+        columns = ['tarih', 'fon_adi', 'hisse_kodu', 'pay_orani']
+
+        if source == 'parquet':
+            df = db._require_parquet().read_holdings(funds, start=since, end=str(end) if end is not None else None,
+                                                     columns=columns)
+        elif db._reads_events():
+            with db.get_connection() as conn:
+                df = db._snapshots_from_events(conn, since, str(end) if end is not None else None, funds)[columns]
+        else:
+            sql = f"SELECT {', '.join(columns)} FROM portfoy_hareketleri WHERE 1=1"
+            params: list = []
+            if since is not None:
+                sql += " AND tarih >= ?"
+                params.append(since)
+            if end is not None:
+                sql += " AND tarih <= ?"
+                params.append(str(end))
+            if funds:
+                sql += f" AND fon_adi IN ({', '.join('?' * len(funds))})"
+                params.extend(funds)
+            with db.get_connection() as conn:
+                df = pd.read_sql_query(sql, conn, params=params)
+        instr.count("analitik.satir", len(df))
+        return cls(df)
+
+    def __len__(self) -> int:
+        return len(self.pay)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.pay) == 0
+
+    # --- Durum ---
+    def _latest_snaps(self, as_of: DateLike = None) -> np.ndarray:
+        """Her fonun `as_of`'a kadarki son kaydının kimliği."""
+        if as_of is None:
+            eligible = np.arange(len(self.snap_fund))
+        else:
+            limit = np.searchsorted(self.dates, _day(as_of), side='right')
+            eligible = np.flatnonzero(self.snap_date < limit)
+        if len(eligible) == 0:
+            return eligible
+        f = self.snap_fund[eligible]
+        # Kayıtlar (fon, tarih) sıralı: fonun son uygun kaydı, sonraki uygun kaydı başka fona ait olandır
+        last = np.append(f[1:] != f[:-1], True)
+        return eligible[last]
+
+    def _rows_as_of(self, as_of: DateLike = None) -> np.ndarray:
+        chosen = np.zeros(len(self.snap_fund), dtype=bool)
+        chosen[self._latest_snaps(as_of)] = True
+        return np.flatnonzero(chosen[self.snap])
+
+    def matrix(self, as_of: DateLike = None, binary: bool = False):
+        """Fon × hisse matrisi (satırlar `funds`, kolonlar `stocks` sırasıyla)."""
+        rows = self._rows_as_of(as_of)
+        values = np.ones(len(rows), dtype=np.float32) if binary else self.pay[rows]
+        shape = (len(self.funds), len(self.stocks))
+        if _HAS_SCIPY:
+            import scipy.sparse as sp
+
+            return sp.csr_matrix((values, (self.fund[rows], self.stock[rows])), shape=shape)
+        dense = np.zeros(shape, dtype=np.float32)
+        dense[self.fund[rows], self.stock[rows]] = values
+        return dense
+
+    # --- Görünümler ---
+    @instr.timed("analitik.overlap")
+    def overlap(self, as_of: DateLike = None, top: Optional[int] = 50, min_common: int = 1) -> pd.DataFrame:
+        """
+        Fon çiftleri: ortak hisse sayısı, Jaccard benzerliği ve ortak hisseler (en çok örtüşen `top` çift).
+        Kolonlar: 'Fon A', 'Fon B', 'Ortak Hisse', 'Jaccard', 'Ortak Hisseler'
+        """
+        b = self.matrix(as_of, binary=True)
+        common = _dense(b @ b.T)
+        sizes = np.diag(common).copy()
+        i, j = np.nonzero(np.triu(common >= max(min_common, 1), k=1))
+        shared = common[i, j]
+        jaccard = shared / (sizes[i] + sizes[j] - shared)
+        order = np.lexsort((-jaccard, -shared))
+        if top is not None:
+            order = order[:top]
+        i, j = i[order], j[order]
+        dense_b = _dense(b) if len(order) else None
+        names = [', '.join(self.stocks[np.flatnonzero(dense_b[a] * dense_b[c])]) for a, c in zip(i, j)]
+        return pd.DataFrame({
+            'Fon A': self.funds[i], 'Fon B': self.funds[j], 'Ortak Hisse': shared[order].astype(int),
+            'Jaccard': jaccard[order].round(3), 'Ortak Hisseler': names,
+        })
+
+    @instr.timed("analitik.concentration")
+    def concentration(self, as_of: DateLike = None, min_funds: int = 1) -> pd.DataFrame:
+        """
+        Hisse başına yoğunlaşma: tutan fon sayısı, fonların toplam payı (%), en büyük pay ve sahipler
+        arası HHI (0-1; 1 = tek fon). Kolonlar: 'Hisse', 'Fon Sayısı', 'Toplam Pay (%)', 'En Büyük Pay (%)', 'HHI'
+        """
+        rows = self._rows_as_of(as_of)
+        s, pay = self.stock[rows], self.pay[rows].astype(np.float64)
+        n = len(self.stocks)
+        holders = np.bincount(s, minlength=n)
+        total = np.bincount(s, weights=pay, minlength=n)
+        squares = np.bincount(s, weights=pay * pay, minlength=n)
+        biggest = np.zeros(n)
+        np.maximum.at(biggest, s, pay)
+        keep = holders >= max(min_funds, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            hhi = np.where(total > 0, squares / (total * total), np.nan)
+        out = pd.DataFrame({
+            'Hisse': self.stocks[keep], 'Fon Sayısı': holders[keep], 'Toplam Pay (%)': total[keep].round(2),
+            'En Büyük Pay (%)': biggest[keep].round(2), 'HHI': hhi[keep].round(3),
+        })
+        return out.sort_values(['Fon Sayısı', 'Toplam Pay (%)'], ascending=False, ignore_index=True)
+
+    def events(self) -> pd.DataFrame:
+        """
+        Fon bazında ardışık kayıtların farkından giriş/çıkış olayları (bir kez hesaplanıp saklanır).
+        Kolonlar: 'tarih' (datetime64[D]), 'fon' ve 'hisse' kimlikleri, 'olay' ('giris'/'cikis'), 'pay'
+        """
+        if self._events is not None:
+            return self._events
+        n_stocks = max(len(self.stocks), 1)
+        n_rank = int(self.snap_rank.max()) + 2 if len(self.snap_rank) else 1
+        rank = self.snap_rank[self.snap].astype(np.int64)
+        # (fon, hisse, sıra) anahtarına göre sıralanınca aynı hissenin fonun önceki/sonraki kaydındaki
+        # satırı (varsa) hemen yanındadır; tek bir sıralama yeterli
+        key = (self.fund.astype(np.int64) * n_stocks + self.stock) * n_rank + rank
+        order = np.argsort(key, kind='stable')
+        ks = key[order]
+        adjacent = ks[1:] == ks[:-1] + 1
+        has_prev = np.empty(len(key), dtype=bool)
+        has_next = np.empty(len(key), dtype=bool)
+        has_prev[order] = np.concatenate([[False], adjacent])
+        has_next[order] = np.concatenate([adjacent, [False]])
+
+        entered = (rank > 0) & ~has_prev
+        # Çıkış: fonun bir sonraki kaydı varsa ve hisse orada yoksa, o kaydın tarihinde
+        last_rank = np.bincount(self.snap_fund, minlength=len(self.funds))[self.fund] - 1
+        exited = (rank < last_rank) & ~has_next
+
+        ent = np.flatnonzero(entered)
+        ext = np.flatnonzero(exited)
+        exit_snap = self._first_snap[self.fund[ext]] + rank[ext] + 1
+        self._events = pd.DataFrame({
+            'tarih': np.concatenate([self.dates[self.snap_date[self.snap[ent]]], self.dates[self.snap_date[exit_snap]]]),
+            'fon': np.concatenate([self.fund[ent], self.fund[ext]]),
+            'hisse': np.concatenate([self.stock[ent], self.stock[ext]]),
+            'olay': np.repeat(np.array(EVENT_KINDS, dtype=object), [len(ent), len(ext)]),
+            'pay': np.concatenate([self.pay[ent], self.pay[ext]]),
+        })
+        return self._events
+
+    @instr.timed("analitik.co_moves")
+    def co_moves(self, start: DateLike = None, end: DateLike = None, kind: str = 'giris', min_funds: int = 2,
+                 freq: Optional[str] = None) -> pd.DataFrame:
+        """
+        [start, end] aralığında aynı hisseye giren (`kind='giris'`) ya da çıkan (`'cikis'`) en az
+        `min_funds` fon. `freq` (ör. 'W', 'M') verilirse dönemler ayrı ayrı gruplanır.
+        Kolonlar: ['Dönem',] 'Hisse', 'Olay', 'Fon Sayısı', 'Fonlar', 'İlk Tarih', 'Son Tarih'
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"kind {EVENT_KINDS} içinden olmalı")
+        ev = self.events()
+        mask = (ev['olay'] == kind).to_numpy().copy()
+        if start is not None:
+            mask &= ev['tarih'].to_numpy() >= _day(start)
+        if end is not None:
+            mask &= ev['tarih'].to_numpy() <= _day(end)
+        ev = ev[mask]
+        keys: List[str] = ['hisse']
+        if freq:
+            ev = ev.assign(donem=pd.to_datetime(ev['tarih']).dt.to_period(freq).dt.start_time)
+            keys = ['donem', 'hisse']
+        columns = (['Dönem'] if freq else []) + ['Hisse', 'Olay', 'Fon Sayısı', 'Fonlar', 'İlk Tarih', 'Son Tarih']
+        if ev.empty:
+            return pd.DataFrame(columns=columns)
+
+        grouped = ev.groupby(keys, sort=False).agg(
+            fon_sayisi=('fon', 'nunique'), fonlar=('fon', lambda f: ', '.join(self.funds[np.unique(f)])),
+            ilk=('tarih', 'min'), son=('tarih', 'max'),
+        ).reset_index()
+        grouped = grouped[grouped['fon_sayisi'] >= min_funds]
+        out = pd.DataFrame({
+            **({'Dönem': grouped['donem'].to_numpy()} if freq else {}),
+            'Hisse': self.stocks[grouped['hisse'].to_numpy()],
+            'Olay': kind,
+            'Fon Sayısı': grouped['fon_sayisi'].to_numpy(),
+            'Fonlar': grouped['fonlar'].to_numpy(),
+            'İlk Tarih': pd.to_datetime(grouped['ilk']).to_numpy(),
+            'Son Tarih': pd.to_datetime(grouped['son']).to_numpy(),
+        }, columns=columns)
+        sort = (['Dönem'] if freq else []) + ['Fon Sayısı', 'Son Tarih']
+        return out.sort_values(sort, ascending=False, ignore_index=True)
@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import requests
-from bs4 import BeautifulSoup
 import json
-import time
-import plotly.express as px
+import os
+from datetime import datetime, timedelta
+
+import charts
+import instrumentation as instr
+
+from cache_layer import (DB_QUERY_TTL, ResultCache, format_age, last_settled_session, make_key, ownership_ttl,
+                         quote_ttl)
+from db_manager import FundDBManager
+from fund_matcher import FundMatcher
+from http_cache import get_cache
+from scanner import HostRateLimiter, scan_concurrently
+from schema import WHALE_SCHEMA, apply_schema
 
 # --- AYARLAR ---
 st.set_page_config(page_title="Fon Takip Radarı 3000", layout="wide", page_icon="🦈")
@@ -15,63 +23,110 @@ def load_config():
     # Demo amaçlı config'i burada tanımlıyorum. Normalde dosyadan okuruz.
     return {
         "base_url": "https://fintables.com/sirketler/{SYMBOL}/sirket-bilgileri",
-        "headers": {'User-Agent': 'Mozilla/5.0'},
         "target_funds": ["TERA", "ATLAS", "HEDEF", "DENİZ"], # Aranan Fonlar
+        "fund_aliases": {}, # İsteğe bağlı: {"DENİZ": ["DENİZ PORTFÖY"]} — hedefi yalnızca bu adlarla eşle
         "watchlist": ["TRHOL", "IZFAS", "SMRVA", "GLRYH", "PEKGY", "TURSG"], # Takip Listesi
-        "selector": "div.flex.flex-col.overflow-x-auto.overflow-y-hidden" # Tablo kutusu
+        "selector": "div.flex.flex-col.overflow-x-auto.overflow-y-hidden", # Tablo kutusu
+        "max_workers": 4, # Eşzamanlı istek sayısı
+        "rate_per_sec": 2.0, # Host başına saniyedeki en fazla istek
+        "rate_burst": 2 # Anlık izin verilen istek sayısı
     }
 
 # --- 1. MODÜL: FINTABLES SCRAPING (Lot Bulucu) ---
-def get_whale_data(config):
-    results = []
+def build_fund_matcher(config):
+    """Hedef fon listesinden tarama başına bir kez kurulan eşleştirici."""
+    aliases = config.get('fund_aliases') or {}
+    return FundMatcher({fund: aliases.get(fund, [fund]) for fund in config['target_funds']})
+
+def _scan_symbol(symbol, config, limiter, matcher):
+    """Tek bir hissenin Fintables sayfasını çekip hedef fon satırlarını döndürür."""
+    from html_extract import extract_fund_holders
+    from http_client import fetch
+
+    url = config['base_url'].format(SYMBOL=symbol)
+    # Ortak Session: keep-alive, retry, koşullu GET ve kalıcı önbellek.
+    # Hız limiti (Fintables banlamasın diye) yalnızca ağa çıkılırken uygulanır.
+    resp = fetch(url, refresh=config.get('cache_refresh', False), rate_limiter=limiter)
+
+    # lxml ile doğrudan sahiplik kutusuna git; tipli kolonlar döner
+    holders = extract_fund_holders(resp.content, config['selector'])
+
+    rows_found = []
+    for name, lot, ratio in holders.itertuples(index=False):
+        # Hedef Fon Kontrolü (Türkçe harf duyarlı, kelime bazlı; satır başına hedef sayısından bağımsız)
+        fund_id = matcher.match(name)
+        if fund_id is not None:
+            rows_found.append({
+                "Hisse": symbol,
+                "Fon Adı": name,
+                "Fon": fund_id,
+                "Lot (Adet)": lot,
+                "Pay Oranı (%)": ratio
+            })
+    return rows_found
+
+def get_whale_data(config, symbols=None):
+    """
+    İzleme listesini (veya verilen `symbols` alt kümesini) eşzamanlı tarar.
+    Döndürür: (sonuç DataFrame'i, {hisse: hata mesajı}) — sonuçlar tarama listesi sırasındadır.
+    """
+    symbols = config['watchlist'] if symbols is None else symbols
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
-    total = len(config['watchlist'])
-    
-    for i, symbol in enumerate(config['watchlist']):
-        status_text.text(f"🔍 Taranıyor: {symbol}...")
-        progress_bar.progress((i + 1) / total)
-        
-        url = config['base_url'].format(SYMBOL=symbol)
-        try:
-            resp = requests.get(url, headers=config['headers'])
-            if resp.status_code == 200:
-                soup = BeautifulSoup(resp.content, 'html.parser')
-                table = soup.select_one(config['selector'])
-                
-                if table:
-                    rows = table.select("table tbody tr")
-                    for row in rows:
-                        cols = row.select("td")
-                        if len(cols) >= 3:
-                            name = cols[0].text.strip()
-                            lot_txt = cols[1].text.strip()
-                            ratio_txt = cols[2].text.strip()
-                            
-                            # Hedef Fon Kontrolü
-                            for fund in config['target_funds']:
-                                if fund in name.upper():
-                                    # Lot Temizleme (3.055.350 -> 3055350)
-                                    lot_clean = float(lot_txt.replace('.', '').replace(',', '.'))
-                                    
-                                    results.append({
-                                        "Hisse": symbol,
-                                        "Fon Adı": name,
-                                        "Lot (Adet)": lot_clean,
-                                        "Pay Oranı": ratio_txt
-                                    })
-        except Exception as e:
-            st.error(f"Hata ({symbol}): {e}")
-        
-        time.sleep(0.5) # Fintables banlamasın diye minik bekleme
+
+    limiter = HostRateLimiter(rate=config.get('rate_per_sec', 2.0), burst=config.get('rate_burst'))
+    matcher = build_fund_matcher(config)
+
+    def on_progress(done, total, symbol):
+        status_text.text(f"🔍 Taranıyor: {symbol} ({done}/{total})")
+        progress_bar.progress(done / total)
+
+    with instr.timer("tarama"):
+        scanned = scan_concurrently(
+            symbols,
+            lambda symbol: _scan_symbol(symbol, config, limiter, matcher),
+            max_workers=config.get('max_workers', 4),
+            on_progress=on_progress,
+        )
+    instr.count("tarama.sayfa", len(scanned))
+
+    results = []
+    failures = {}
+    for symbol, rows, err in scanned:
+        if err is not None:
+            failures[symbol] = str(err)
+        else:
+            results.extend(rows)
 
     progress_bar.empty()
     status_text.empty()
-    return pd.DataFrame(results)
+    return apply_schema(pd.DataFrame(results), WHALE_SCHEMA), failures
+
+def rescan_failed(config, df_prev, failures_prev):
+    """
+    Önceki taramada başarısız olan hisseleri yeniden tarar; başarılı hisselerin satırları korunur.
+    Döndürür: get_whale_data ile aynı biçimde birleşik sonuç (izleme listesi sırasında).
+    """
+    retry = [s for s in config['watchlist'] if s in failures_prev]
+    df_new, failures = get_whale_data(config, symbols=retry)
+    frames = [f for f in (df_prev, df_new) if not f.empty]
+    if not frames:
+        return df_prev, failures
+    # Kategorik kolonlar farklı kategorilerle birleşince object olur; şema yeniden uygulanır
+    merged = pd.concat([f.astype({c: object for c in f.select_dtypes('category').columns}) for f in frames],
+                       ignore_index=True)
+    order = {s: i for i, s in enumerate(config['watchlist'])}
+    merged = merged.iloc[merged['Hisse'].map(order).argsort(kind='stable')].reset_index(drop=True)
+    return apply_schema(merged, WHALE_SCHEMA), failures
 
 # --- 2. MODÜL: CANLI BORSA VERİSİ (Fiyat Bulucu) ---
-def enrich_with_market_data(df):
+@instr.timed("fiyat")
+def enrich_with_market_data(df, db=None):
+    """
+    Tarama sonucuna canlı fiyat, günlük değişim ve portföy değeri ekler.
+    Fiyatlar tek bir toplu istekle çekilir. `db` verilirse ve seans kapalıysa, son kesinleşmiş seansın kayıtlı
+    kapanışları yeniden kullanılır; seans içinde (kayıtlı satır bugüne ait olsa bile) hep canlı fiyat çekilir.
+    """
     if df.empty:
         return df
     
@@ -79,43 +134,212 @@ def enrich_with_market_data(df):
     
     # Hisse kodlarına .IS ekle (Yahoo formatı: TRHOL.IS)
     symbols = [f"{s}.IS" for s in df['Hisse'].unique()]
-    
-    # Toplu veri çek
-    tickers = yf.Tickers(" ".join(symbols))
-    
-    current_prices = {}
-    daily_changes = {}
-    
-    for s in symbols:
-        try:
-            info = tickers.tickers[s].info
-            # 'currentPrice' yoksa 'regularMarketPrice' dene
-            price = info.get('currentPrice') or info.get('regularMarketPrice') or 0
-            
-            # Günlük Değişim (%)
-            prev_close = info.get('previousClose') or price
-            if prev_close:
-                change = ((price - prev_close) / prev_close) * 100
-            else:
-                change = 0
-                
-            clean_symbol = s.replace('.IS', '')
-            current_prices[clean_symbol] = price
-            daily_changes[clean_symbol] = change
-        except:
-            pass
+
+    stored = None
+    settled = last_settled_session()
+    if db is not None and settled is not None:
+        # Yalnızca son kaydı tam olarak kesinleşmiş seansa ait olanlar; daha yeni (yarım) barlar canlı çekilir
+        stored = db.get_latest_closes(symbols, fresh_since=settled.isoformat(), fresh_until=settled.isoformat())
+
+    # Toplu veri çek (requests/yfinance katmanı ilk fiyat isteğinde yüklenir)
+    from data_fetcher import get_bulk_quotes
+
+    quotes, missing = get_bulk_quotes(symbols, stored=stored)
+    if missing:
+        st.warning(f"Fiyat bulunamayan semboller: {', '.join(missing)}")
+
+    quotes['Hisse'] = quotes['Ticker'].str.replace('.IS', '', regex=False)
+    prev = quotes['Önceki Kapanış'].where(quotes['Önceki Kapanış'] != 0)
+    quotes['Günlük Değ. %'] = ((quotes['Fiyat'] - prev) / prev * 100).fillna(0)
+    quotes = quotes.set_index('Hisse')
             
     # DataFrame'e Ekle
-    df['Canlı Fiyat'] = df['Hisse'].map(current_prices)
-    df['Günlük Değ. %'] = df['Hisse'].map(daily_changes)
+    # 'Hisse' kategorik; map sonucu da kategorik döneceği için sayıya çevrilir
+    df['Canlı Fiyat'] = df['Hisse'].map(quotes['Fiyat']).astype('float64')
+    df['Günlük Değ. %'] = df['Hisse'].map(quotes['Günlük Değ. %']).astype('float64')
     
     # Portföy Değeri Hesapla (Lot * Fiyat)
-    df['Portföy Değeri (TL)'] = df['Lot (Adet)'] * df['Canlı Fiyat']
+    df['Portföy Değeri (TL)'] = df['Lot (Adet)'].astype('float64') * df['Canlı Fiyat']
     
     return df
 
 # --- ARAYÜZ (FRONTEND) ---
+def render_cache_sidebar():
+    """Önbellek ayarlarını kenar çubuğunda gösterir; 'yeniden indir' seçimini döndürür."""
+    st.sidebar.subheader("🗄️ HTTP Önbelleği")
+    refresh = st.sidebar.checkbox("Önbelleği atla (sayfaları yeniden indir)", value=False)
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        st.sidebar.caption(f"{stats['entries']} sayfa, {stats['bytes'] / 1024 / 1024:.1f} / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+        if st.sidebar.button("🗑️ Önbelleği Temizle"):
+            cache.clear()
+            st.sidebar.success("Önbellek temizlendi.")
+    return refresh
+
+def render_instrumentation_sidebar():
+    """
+    Ölçüm ve profil seçenekleri. Döndürür: (ölçüm açık mı, tarama profillensin mi).
+    Global ölçüm durumu değiştirilmez; ölçüm `main` içinde bu çalıştırmaya özel bir kayıtla yapılır.
+    """
+    st.sidebar.subheader("⏱️ Performans")
+    on = st.sidebar.checkbox("Aşama sürelerini ölç", value=instr.is_enabled())
+    return on, on and st.sidebar.checkbox("Taramayı profille (cProfile)", value=False)
+
+def render_performance_panel(rec):
+    """Bu çalıştırmadaki aşama süreleri, sayaçlar ve profil raporları; ölçüm kapalıysa (`rec` None) gösterilmez."""
+    if rec is None:
+        return
+    data = instr.log_summary(label="streamlit", recorder=rec)
+    with st.expander("⏱️ Performans"):
+        if data['timers']:
+            timers = pd.DataFrame.from_dict(data['timers'], orient='index').sort_values('total_ms', ascending=False)
+            timers.index.name = 'Aşama'
+            st.dataframe(timers.rename(columns={
+                'calls': 'Çağrı', 'total_ms': 'Toplam (ms)', 'avg_ms': 'Ortalama (ms)', 'max_ms': 'En uzun (ms)'
+            }).style.format("{:,.1f}", subset=['Toplam (ms)', 'Ortalama (ms)', 'En uzun (ms)']),
+                use_container_width=True)
+        else:
+            st.caption("Bu çalıştırmada ölçülen aşama yok.")
+        if data['counters']:
+            st.dataframe(pd.DataFrame(sorted(data['counters'].items()), columns=["Sayaç", "Değer"]),
+                         use_container_width=True, hide_index=True)
+        for stage, report in rec.profiles.items():
+            st.caption(f"Profil: {stage} (yalnızca ana thread)")
+            st.code(report)
+
+@st.cache_resource
+def get_db():
+    """
+    Oturumlar arası paylaşılan veritabanı yöneticisi. `fon_tracer daemon` çalışıyorsa panel yalnızca okur;
+    aksi halde veritabanı boşsa doldurma arka planda başlar.
+    """
+    # CLI, Parquet ve kuyruk katmanları yalnızca panel veritabanını ilk açarken yüklenir
+    from fon_tracer import is_daemon_running
+    from parquet_store import DEFAULT_ROOT as PARQUET_ROOT, get_parquet_store
+
+    # Parquet deposu varsa (ör. `fon_tracer --parquet-root fon_parquet export-parquet`) ve damgası SQLite geçmiş
+    # sürümüyle eşleşiyorsa (`parquet_is_current`) geçmiş oradan okunur; aksi halde SQLite kullanılır
+    store = get_parquet_store() if os.path.isdir(PARQUET_ROOT) else None
+    return FundDBManager(auto_populate=not is_daemon_running(), parquet_store=store)
+
+@st.cache_resource
+def get_result_cache():
+    """Tarama, fiyat ve veritabanı sorgu sonuçları için oturumlar arası paylaşılan önbellek."""
+    return ResultCache()
+
+def scan_key(config):
+    return make_key(config['base_url'], config['selector'], config['target_funds'], config.get('fund_aliases'),
+                    config['watchlist'])
+
+def render_cache_info(label, info):
+    source = "🟢 önbellekten" if info['hit'] else "🔵 yeni çekildi"
+    st.caption(f"{label}: {source} · veri yaşı {format_age(info['age'])} ({info['created_at']:%H:%M:%S})")
+
+def render_history_tab(db, results):
+    """Veritabanındaki sahiplik geçmişini gösterir; doldurma sürerken kısmi veriyle çalışır."""
+    status = db.population_status()
+    if status['state'] == 'running':
+        current = f", şu an: {status['current']}" if status['current'] else ""
+        st.info(f"⏳ Veritabanı dolduruluyor… ({status['done']}/{status['total']} fon{current}). Gösterilen veriler kısmi olabilir.")
+        if st.button("🔄 Yenile"):
+            st.rerun()
+    elif status['state'] == 'error':
+        st.error(status['error'])
+
+    funds = db.get_all_funds()
+    if not funds:
+        st.warning("Veritabanında henüz kayıt yok.")
+        return
+
+    selected = st.multiselect("Fonlar", funds, default=funds)
+    days = st.slider("Son kaç gün?", min_value=7, max_value=365, value=30)
+    # Veri sürümü her yazımda artar; yeni veri geldiğinde sorgu önbelleği kendiliğinden geçersizleşir
+    df, info = results.get_or_compute(
+        'db_query', make_key(sorted(selected), days),
+        lambda: db.get_filtered_data(selected, days, source='parquet' if db.parquet_is_current() else 'sqlite'),
+        ttl=DB_QUERY_TTL, version=db.data_version()
+    )
+    render_cache_info(f"{len(df):,} kayıt", info)
+    st.dataframe(df, use_container_width=True)
+
+    with st.expander("🔔 Son değişiklikler (giriş / çıkış / pay değişimi)"):
+        since = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        changes, _ = results.get_or_compute(
+            'db_changes', make_key(sorted(selected), since),
+            lambda: db.get_changes_since(since, selected),
+            ttl=DB_QUERY_TTL, version=db.data_version()
+        )
+        if changes.empty:
+            st.caption("Son 7 günde kayıtlı değişim yok (değişim kaydı `--holdings-mode delta/both` ile tutulur).")
+        else:
+            st.dataframe(changes, use_container_width=True)
+
+    render_cross_ownership(db, results, selected, days)
+
+    # Önceden hesaplanmış değerleme tablosundan okunur; sahiplik × fiyat birleşimi burada yapılmaz
+    valuation, _ = results.get_or_compute(
+        'db_valuation', make_key(sorted(selected), days),
+        lambda: db.get_portfolio_valuation(selected, days),
+        ttl=DB_QUERY_TTL, version=db.data_version()
+    )
+    if not valuation.empty:
+        st.subheader("📈 Tahmini Portföy Değeri")
+        with instr.timer("cizim"):
+            fig = charts.line_chart(valuation, x='Tarih', y='Tahmini Değer (TL)', color='Fon Adı',
+                                    hover_data=['Günlük K/Z (TL)'])
+            st.plotly_chart(fig, use_container_width=True)
+
+def render_cross_ownership(db, results, selected, days):
+    """Fon × hisse sahiplik matrisinden örtüşme, yoğunlaşma ve ortak giriş/çıkış görünümleri."""
+    from analytics import OwnershipPanel
+
+    with st.expander("🧭 Çapraz sahiplik (ortak giriş/çıkış, örtüşme, yoğunlaşma)"):
+        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        # Panel (asıl maliyet) veri sürümüne bağlı saklanır; görünümler onun üzerinden milisaniyeler sürer
+        panel, _ = results.get_or_compute(
+            'analytics_panel', make_key(sorted(selected), start),
+            lambda: OwnershipPanel.from_db(db, start=start, funds=selected,
+                                           source='parquet' if db.parquet_is_current() else 'sqlite'),
+            ttl=DB_QUERY_TTL, version=db.data_version()
+        )
+        if panel.empty:
+            st.caption("Seçili aralıkta tam sahiplik kaydı yok.")
+            return
+
+        since = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        min_funds = st.number_input("En az kaç fon?", min_value=1, max_value=max(len(panel.funds), 1),
+                                    value=min(2, len(panel.funds)))
+        col_in, col_out = st.columns(2)
+        with col_in:
+            st.markdown("**Son 7 günde birlikte girilen hisseler**")
+            st.dataframe(panel.co_moves(start=since, kind='giris', min_funds=min_funds),
+                         use_container_width=True, hide_index=True)
+        with col_out:
+            st.markdown("**Son 7 günde birlikte çıkılan hisseler**")
+            st.dataframe(panel.co_moves(start=since, kind='cikis', min_funds=min_funds),
+                         use_container_width=True, hide_index=True)
+
+        col_ov, col_conc = st.columns(2)
+        with col_ov:
+            st.markdown("**En çok örtüşen fonlar**")
+            st.dataframe(panel.overlap(top=20), use_container_width=True, hide_index=True)
+        with col_conc:
+            st.markdown("**Fonların yoğunlaştığı hisseler**")
+            st.dataframe(panel.concentration(min_funds=min_funds).head(20), use_container_width=True, hide_index=True)
+
 def main():
+    config = load_config()
+    config['cache_refresh'] = render_cache_sidebar()
+    measure, profile_scan = render_instrumentation_sidebar()
+    # Ölçümler bu çalıştırmaya (ve tarama worker'larına) özel kayda yazılır; diğer oturumlar etkilenmez
+    with instr.recording(enabled=measure) as rec:
+        render_dashboard(config, profile_scan)
+        render_performance_panel(rec)
+
+def render_dashboard(config, profile_scan):
+    db = get_db()
+    results = get_result_cache()
     st.title("🦈 Hisse & Fon Balina Radarı")
     st.markdown("Bu panel **Fintables**'dan sahiplik verisini, **Canlı Borsa**'dan fiyat verisini birleştirir.")
     
@@ -123,7 +347,6 @@ def main():
     
     with col1:
         st.subheader("⚙️ Ayarlar")
-        config = load_config()
         st.write("**Hedef Fonlar:**")
         st.code("\n".join(config['target_funds']))
         st.write("**İzleme Listesi:**")
@@ -132,47 +355,88 @@ def main():
         btn_scan = st.button("🚀 Taramayı Başlat", type="primary")
 
     with col2:
-        if btn_scan:
-            # 1. Adım: Balinaları Bul
-            df_whales = get_whale_data(config)
+        tab_scan, tab_history = st.tabs(["🔍 Canlı Tarama", "📚 Veritabanı Geçmişi"])
+
+        with tab_scan:
+            scan = None
+            key = scan_key(config)
+            if btn_scan:
+                # 1. Adım: Balinaları Bul (aynı config/izleme listesi için önbellekten)
+                # Önbellekteki taramada başarısız hisseler varsa yalnızca onlar yeniden taranır
+                cached = None if config['cache_refresh'] else results.peek('scan', key)
+                with instr.profile('tarama', enabled=profile_scan):
+                    if cached is not None and cached[0][1]:
+                        scan = results.get_or_compute(
+                            'scan', key, lambda: rescan_failed(config, *cached[0]),
+                            ttl=ownership_ttl(), refresh=True
+                        )
+                    else:
+                        scan = results.get_or_compute(
+                            'scan', key, lambda: get_whale_data(config),
+                            ttl=ownership_ttl(), refresh=config['cache_refresh']
+                        )
+                st.session_state['scan_key'] = key
+            elif st.session_state.get('scan_key') == key:
+                # Widget değişikliğiyle gelen yeniden çalıştırmada sonuçları kaybetme, yeniden tarama
+                scan = results.peek('scan', key)
+
+            if scan is not None:
+                (df_whales, failures), scan_info = scan
+                render_cache_info("Tarama", scan_info)
+
+                if failures:
+                    with st.expander(f"⚠️ {len(failures)} hisse taranamadı"):
+                        st.dataframe(
+                            pd.DataFrame(list(failures.items()), columns=["Hisse", "Hata"]),
+                            use_container_width=True
+                        )
             
-            if not df_whales.empty:
-                # 2. Adım: Fiyatları Çek ve Zenginleştir
-                df_final = enrich_with_market_data(df_whales)
+                if not df_whales.empty:
+                    # 2. Adım: Fiyatları Çek ve Zenginleştir (önbellekteki tarama sonucu değiştirilmez)
+                    df_final, quote_info = results.get_or_compute(
+                        'quotes', make_key(key, scan_info['created_at']),
+                        lambda: enrich_with_market_data(df_whales.copy(), db=db),
+                        ttl=quote_ttl(), version=db.data_version(), refresh=config['cache_refresh'] and btn_scan
+                    )
+                    render_cache_info("Fiyatlar", quote_info)
                 
-                # --- METRİKLER ---
-                total_value = df_final['Portföy Değeri (TL)'].sum()
-                st.metric(label="💰 Toplam Tespit Edilen Varlık", value=f"{total_value:,.0f} TL")
+                    # --- METRİKLER ---
+                    total_value = df_final['Portföy Değeri (TL)'].sum()
+                    st.metric(label="💰 Toplam Tespit Edilen Varlık", value=f"{total_value:,.0f} TL")
                 
-                # --- ANA TABLO ---
-                st.subheader("📋 Detaylı Pozisyon Raporu")
+                    # --- ANA TABLO ---
+                    st.subheader("📋 Detaylı Pozisyon Raporu")
                 
-                # Tabloyu Formatla
-                st.dataframe(
-                    df_final.style.format({
-                        "Lot (Adet)": "{:,.0f}",
-                        "Canlı Fiyat": "{:.2f} ₺",
-                        "Portföy Değeri (TL)": "{:,.0f} ₺",
-                        "Günlük Değ. %": "{:.2f}%"
-                    }).background_gradient(subset=['Günlük Değ. %'], cmap='RdYlGn'),
-                    use_container_width=True
-                )
+                    # Tabloyu Formatla
+                    st.dataframe(
+                        df_final.style.format({
+                            "Lot (Adet)": "{:,.0f}",
+                            "Pay Oranı (%)": "{:.2f}%",
+                            "Canlı Fiyat": "{:.2f} ₺",
+                            "Portföy Değeri (TL)": "{:,.0f} ₺",
+                            "Günlük Değ. %": "{:.2f}%"
+                        }, na_rep="-").background_gradient(subset=['Günlük Değ. %'], cmap='RdYlGn'),
+                        use_container_width=True
+                    )
                 
-                # --- GRAFİKLER ---
-                col_chart1, col_chart2 = st.columns(2)
+                    # --- GRAFİKLER ---
+                    col_chart1, col_chart2 = st.columns(2)
                 
-                with col_chart1:
-                    fig_pie = px.pie(df_final, values='Portföy Değeri (TL)', names='Hisse', title='Hisse Bazlı Dağılım')
-                    st.plotly_chart(fig_pie, use_container_width=True)
+                    with col_chart1, instr.timer("cizim"):
+                        fig_pie = charts.pie_chart(df_final, values='Portföy Değeri (TL)', names='Hisse', title='Hisse Bazlı Dağılım')
+                        st.plotly_chart(fig_pie, use_container_width=True)
                 
-                with col_chart2:
-                    fig_bar = px.bar(df_final, x='Fon Adı', y='Portföy Değeri (TL)', color='Hisse', title='Fon Bazlı Büyüklük')
-                    st.plotly_chart(fig_bar, use_container_width=True)
+                    with col_chart2, instr.timer("cizim"):
+                        fig_bar = charts.bar_chart(df_final, x='Fon Adı', y='Portföy Değeri (TL)', color='Hisse', title='Fon Bazlı Büyüklük')
+                        st.plotly_chart(fig_bar, use_container_width=True)
                     
+                else:
+                    st.warning("Seçilen hisselerde, belirtilen fonlara ait %5 üzeri bir kayıt bulunamadı.")
             else:
-                st.warning("Seçilen hisselerde, belirtilen fonlara ait %5 üzeri bir kayıt bulunamadı.")
-        else:
-            st.info("Sol taraftaki butona basarak analizi başlatın.")
+                st.info("Sol taraftaki butona basarak analizi başlatın.")
+
+        with tab_history:
+            render_history_tab(db, results)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
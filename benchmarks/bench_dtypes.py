@@ -0,0 +1,71 @@
+"""
+Kompakt kolon tiplerinin (`schema.py`) bellek etkisi: bir yıllık sahiplik ve fiyat verisinin
+SQLite'tan ham (object/str kolonlar) ve şema uygulanmış halinin `memory_usage(deep=True)` karşılaştırması.
+
+Sahiplik: 300 fon × 20 hisse × 252 iş günü (~1.5M satır). Fiyat: `--tickers` × 252 iş günü.
+
+Kullanım: python benchmarks/bench_dtypes.py [--tickers 600]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from bench_query import populate  # noqa: E402
+from db_manager import FundDBManager  # noqa: E402
+from schema import HOLDINGS_SCHEMA, PRICE_SCHEMA, apply_schema, memory_mb  # noqa: E402
+
+TRADING_DAYS = 252
+HOLDING_ROWS = 300 * 20 * TRADING_DAYS
+
+HOLDING_COLUMNS = {
+    "tarih": "Tarih", "fon_adi": "Fon Adı", "hisse_kodu": "Hisse",
+    "pay_orani": "Pay Oranı (%)", "tahmini_lot": "Tahmini Lot", "kaynak": "Kaynak",
+}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=600)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = FundDBManager(os.path.join(tmp, 'bench_dtypes.db'), auto_populate=False)
+        populate(db, HOLDING_ROWS)
+
+        dates = pd.bdate_range(end='2026-10-16', periods=TRADING_DAYS)
+        names = np.array([f"H{i:04d}.IS" for i in range(args.tickers)])
+        idx = np.arange(TRADING_DAYS * args.tickers)
+        db._store_prices_df(pd.DataFrame({
+            'Tarih': dates[idx // args.tickers],
+            'Ticker': names[idx % args.tickers],
+            'Kapanis': np.random.default_rng(3).uniform(1, 500, len(idx)),
+        }))
+
+        conn = db.get_connection()
+        raw_holdings = pd.read_sql_query(
+            "SELECT tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak FROM portfoy_hareketleri",
+            conn).rename(columns=HOLDING_COLUMNS)
+        raw_prices = pd.read_sql_query("SELECT tarih, ticker, close FROM price_history", conn).rename(
+            columns={'tarih': 'Tarih', 'ticker': 'Ticker', 'close': 'Kapanis'})
+        db.close()
+
+    print(f"{'veri':12s} {'satır':>10s} {'ham MB':>9s} {'şemalı MB':>10s} {'oran':>6s} {'dönüşüm s':>10s}")
+    for name, raw, schema in (("sahiplik", raw_holdings, HOLDINGS_SCHEMA), ("fiyat", raw_prices, PRICE_SCHEMA)):
+        t0 = time.perf_counter()
+        typed = apply_schema(raw, schema)
+        secs = time.perf_counter() - t0
+        before, after = memory_mb(raw), memory_mb(typed)
+        print(f"{name:12s} {len(raw):10,d} {before:9.1f} {after:10.1f} {before / after:5.1f}x {secs:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Soğuk açılış bütçesi: panel ve salt okunur DB yolları kazıma/fiyat bağımlılıklarını yüklememeli.
+
+Her senaryo `--repeat` kez ayrı bir `python -X importtime` alt sürecinde çalışır (modül önbelleği yok);
+senaryonun duvar saati süresinin medyanı bütçeyle karşılaştırılır ve süreçte yüklenmemesi gereken
+modüller (playwright, yfinance, requests, lxml, bs4, plotly.express, scipy) kontrol edilir.
+Bütçe aşılırsa ya da yasaklı bir modül yüklenirse en pahalı importlar yazdırılır ve çıkış kodu 1 olur.
+
+Bütçeler sabit milisaniye değildir: her senaryonun kaçınılmaz üçüncü taraf importları (`baseline`;
+ör. streamlit + pandas) aynı koşuda, senaryoyla dönüşümlü olarak ölçülür. Bütçe bu taban çizgisinin
+medyanı ile projenin kendi payının toplamıdır: `max(allowance_ms, allowance_pct × taban)`. Böylece
+makine hızı ve gürültü iki ölçümü birlikte etkiler; yalnızca projenin eklediği maliyet sınanır.
+
+Senaryolar:
+    panel     `import app` (Streamlit bare mode; tarama yapılmadan ilk sayfa)
+    db_okuma  `FundDBManager(...).get_filtered_data(...)` (boş geçici veritabanı)
+    cli       `import fon_tracer`
+
+Kullanım: python benchmarks/bench_imports.py [--repeat 5] [--scale 1.0] [--top 10]
+(`--scale` yalnızca projenin payını çarpar.)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Kazıma, fiyat ve ağır çizim/analiz katmanları; yalnızca ilk kullanımda yüklenmeleri beklenir
+HEAVY = ['playwright', 'yfinance', 'requests', 'lxml', 'bs4', 'plotly.express', 'scipy']
+
+# Çekirdek kütüphaneler; her senaryonun taban çizgisi bunları içerir
+CORE = "import sqlite3, numpy, pandas"
+
+SCENARIOS = {
+    'panel': {
+        'code': "import app",
+        'baseline': CORE + "\nimport streamlit",
+        'forbidden': HEAVY + ['data_fetcher', 'http_client', 'html_extract'],
+        'allowance_ms': 250,
+        'allowance_pct': 0.25,
+    },
+    'db_okuma': {
+        'code': ("import os, tempfile\n"
+                 "from db_manager import FundDBManager\n"
+                 "db = FundDBManager(os.path.join(tempfile.mkdtemp(), 'fon.db'), auto_populate=False)\n"
+                 "db.get_filtered_data(['FON'], 30)"),
+        'baseline': CORE,
+        'forbidden': HEAVY + ['data_fetcher', 'http_client', 'html_extract'],
+        'allowance_ms': 150,
+        'allowance_pct': 0.25,
+    },
+    'cli': {
+        'code': "import fon_tracer",
+        'baseline': CORE,
+        'forbidden': HEAVY + ['data_fetcher'],
+        'allowance_ms': 200,
+        'allowance_pct': 0.25,
+    },
+}
+
+# Alt süreçte çalışan sarmalayıcı: senaryo kodunu ölçer, yüklenen modülleri son satırda JSON olarak yazar
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+exec(compile({code!r}, '<senaryo>', 'exec'))
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{'ms': ms, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """`-X importtime` çıktısı -> [(modül, kendi µs, kümülatif µs)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def run_once(code: str) -> dict:
+    env = dict(os.environ, STREAMLIT_LOGGER_LEVEL='error', PYTHONDONTWRITEBYTECODE='1')
+    with tempfile.TemporaryDirectory() as cwd:
+        out = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                              f"import sys; sys.path.insert(0, {ROOT!r})\n" + CHILD.format(code=code)],
+                             capture_output=True, text=True, cwd=cwd, env=env)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'alt süreç başarısız')
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result['imports'] = parse_importtime(out.stderr)
+    return result
+
+
+def loaded(modules, name: str) -> bool:
+    return name in modules or any(m.startswith(name + '.') for m in modules)
+
+
+def budget_ms(sc: dict, baseline_ms: float, scale: float = 1.0) -> float:
+    """Taban çizgisi + projenin payı (sabit alt sınır ya da tabanın yüzdesi, hangisi büyükse)."""
+    return baseline_ms + max(sc['allowance_ms'], sc['allowance_pct'] * baseline_ms) * scale
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--scale', type=float, default=1.0, help='bütçe çarpanı')
+    ap.add_argument('--top', type=int, default=10, help='aşımda gösterilecek en pahalı import sayısı')
+    ap.add_argument('--only', choices=sorted(SCENARIOS), action='append')
+    args = ap.parse_args()
+
+    failed = False
+    print(f"{'senaryo':10s} {'medyan ms':>10s} {'en az ms':>9s} {'taban ms':>9s} {'bütçe ms':>9s}  durum")
+    for name in args.only or SCENARIOS:
+        sc = SCENARIOS[name]
+        runs, base = [], []
+        # Dönüşümlü ölçüm: arka plan yükü senaryoyu ve taban çizgisini aynı ölçüde etkiler
+        for _ in range(args.repeat):
+            base.append(run_once(sc['baseline'])['ms'])
+            runs.append(run_once(sc['code']))
+        median = statistics.median(r['ms'] for r in runs)
+        base_median = statistics.median(base)
+        budget = budget_ms(sc, base_median, args.scale)
+        bad = [m for m in sc['forbidden'] if loaded(runs[0]['modules'], m)]
+        over = median > budget
+        status = 'tamam' if not over and not bad else 'AŞIM' if over else 'YASAKLI'
+        print(f"{name:10s} {median:10.0f} {min(r['ms'] for r in runs):9.0f} {base_median:9.0f} {budget:9.0f}  {status}")
+        if bad:
+            print(f"  yüklenmemesi gereken modüller: {', '.join(bad)}")
+        if over or bad:
+            failed = True
+            heaviest = sorted(runs[0]['imports'], key=lambda r: r[1], reverse=True)[:args.top]
+            for mod, self_us, cum_us in heaviest:
+                print(f"    {mod:40s} kendi {self_us / 1000:7.1f} ms  kümülatif {cum_us / 1000:7.1f} ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
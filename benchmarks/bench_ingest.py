@@ -0,0 +1,113 @@
+"""
+DataFrame -> SQLite yazım hızı: eski satır satır `iterrows` yolu ile vektörel
+`upsert_holdings_df` / fiyat yazımının karşılaştırması.
+
+Eski yol çok yavaş olduğu için varsayılan olarak daha küçük bir örneklemde ölçülür
+ve satır/sn olarak raporlanır.
+
+Kullanım: python benchmarks/bench_ingest.py [--rows 1000000] [--old-rows 100000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from db_manager import FundDBManager  # noqa: E402
+
+
+def make_holdings(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    funds = np.array([f"FON {i:03d} PORTFÖY" for i in range(200)])
+    stocks = np.array([f"H{i:04d}" for i in range(500)])
+    dates = pd.date_range('2015-01-01', periods=max(1, n // 2000 + 1)).strftime('%Y-%m-%d').to_numpy()
+    # (tarih, fon, hisse) benzersiz olsun diye ardışık indekslerden üret
+    idx = np.arange(n)
+    return pd.DataFrame({
+        'Tarih': dates[idx // 2000],
+        'Fon Adı': funds[(idx % 2000) // 500 + (idx // 2000) % 50 * 4],
+        'Hisse': stocks[idx % 500],
+        'Pay Oranı (%)': rng.uniform(0, 20, n).round(2),
+        'Tahmini Lot': rng.integers(1_000, 10_000_000, n),
+    })
+
+
+def make_prices(n: int) -> pd.DataFrame:
+    tickers = np.array([f"H{i:04d}.IS" for i in range(500)])
+    idx = np.arange(n)
+    dates = pd.date_range('2000-01-01', periods=n // 500 + 1)
+    return pd.DataFrame({
+        'Tarih': dates[idx // 500],
+        'Ticker': tickers[idx % 500],
+        'Kapanis': np.random.default_rng(1).uniform(1, 500, n),
+    })
+
+
+def old_upsert_holdings(db: FundDBManager, df: pd.DataFrame, kaynak: str = 'bench') -> None:
+    rows = []
+    for _, r in df.iterrows():
+        tarih = pd.to_datetime(r['Tarih']).strftime('%Y-%m-%d')
+        rows.append((tarih, str(r['Fon Adı']), str(r['Hisse']), float(r.get('Pay Oranı (%)', 0) or 0),
+                     int(r.get('Tahmini Lot', 0) or 0), kaynak))
+    with db.get_connection() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO portfoy_hareketleri (tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+
+def old_store_prices(db: FundDBManager, df: pd.DataFrame) -> None:
+    rows = []
+    for _, r in df.iterrows():
+        rows.append((pd.to_datetime(r['Tarih']).strftime('%Y-%m-%d'), str(r['Ticker']), float(r.get('Kapanis', 0) or 0)))
+    with db.get_connection() as conn:
+        conn.executemany('INSERT OR REPLACE INTO price_history (tarih, ticker, close) VALUES (?, ?, ?)', rows)
+
+
+def fresh_db(tmpdir: str, name: str) -> FundDBManager:
+    return FundDBManager(os.path.join(tmpdir, name), auto_populate=False)
+
+
+def timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=1_000_000)
+    ap.add_argument('--old-rows', type=int, default=100_000)
+    args = ap.parse_args()
+
+    holdings, prices = make_holdings(args.rows), make_prices(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            ("holdings eski (iterrows)", args.old_rows,
+             timed(old_upsert_holdings, fresh_db(tmp, 'h_old.db'), holdings.head(args.old_rows))),
+            ("holdings yeni (vektörel)", args.rows,
+             timed(lambda d, x: d.upsert_holdings_df(x, kaynak='bench'), fresh_db(tmp, 'h_new.db'), holdings)),
+            ("fiyat eski (iterrows)", args.old_rows,
+             timed(old_store_prices, fresh_db(tmp, 'p_old.db'), prices.head(args.old_rows))),
+            ("fiyat yeni (vektörel)", args.rows,
+             timed(lambda d, x: d._store_prices_df(x), fresh_db(tmp, 'p_new.db'), prices)),
+        ]
+        with sqlite3.connect(os.path.join(tmp, 'h_new.db')) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM portfoy_hareketleri").fetchone()[0] == args.rows
+
+    print(f"{'senaryo':28s} {'satır':>10s} {'süre (s)':>9s} {'satır/sn':>12s}")
+    for name, n, secs in results:
+        print(f"{name:28s} {n:10d} {secs:9.2f} {n / secs:12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
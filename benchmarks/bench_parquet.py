@@ -0,0 +1,123 @@
+"""
+Fiyat geçmişi okuma: SQLite (`pd.read_sql_query`) ile bellek eşlemeli Parquet deposunun
+yükleme süresi ve tepe bellek (RSS) karşılaştırması.
+
+Her senaryo ayrı bir alt süreçte çalışır; böylece tepe RSS ölçümleri birbirini etkilemez.
+Sentetik veri `--tickers` × `--years` iş günü kadar kapanıştan oluşur ve `--dir` ile tekrar kullanılabilir.
+
+Kullanım: python benchmarks/bench_parquet.py [--tickers 600] [--years 5] [--dir /tmp/bench_parquet]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CASES = ["sqlite_tam", "parquet_tam", "sqlite_filtre", "parquet_filtre"]
+FILTER_TICKERS = [f"H{i:04d}.IS" for i in range(0, 500, 50)]
+
+
+def build(path: str, tickers: int, years: int) -> None:
+    import numpy as np
+    import pandas as pd
+
+    from db_manager import FundDBManager
+    from parquet_store import ParquetStore
+
+    db_path = os.path.join(path, 'bench.db')
+    if os.path.exists(db_path):
+        return
+    dates = pd.bdate_range(end='2026-10-16', periods=252 * years)
+    names = np.array([f"H{i:04d}.IS" for i in range(tickers)])
+    idx = np.arange(len(dates) * tickers)
+    df = pd.DataFrame({
+        'Tarih': dates[idx // tickers],
+        'Ticker': names[idx % tickers],
+        'Kapanis': np.random.default_rng(7).uniform(1, 500, len(idx)),
+    })
+    print(f"{len(df):,} satır üretiliyor...", flush=True)
+    t0 = time.perf_counter()
+    db = FundDBManager(db_path, auto_populate=False, parquet_store=ParquetStore(os.path.join(path, 'parquet')))
+    db._store_prices_df(df)
+    db.close()
+    print(f"üretim (SQLite + Parquet): {time.perf_counter() - t0:.1f} s", flush=True)
+
+
+def _rss_kb(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak_rss() -> bool:
+    # ru_maxrss fork sırasında ebeveynden miras kalır; Linux'ta tepe değer clear_refs ile sıfırlanabilir
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kb(reset_ok: bool) -> int:
+    return _rss_kb('VmHWM') if reset_ok else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(case: str, path: str) -> None:
+    from db_manager import FundDBManager
+    from parquet_store import ParquetStore
+
+    db = FundDBManager(os.path.join(path, 'bench.db'), auto_populate=False,
+                       parquet_store=ParquetStore(os.path.join(path, 'parquet')))
+    reset_ok = _reset_peak_rss()
+    base_kb = peak_rss_kb(reset_ok)
+    source, kind = case.split('_')
+    kwargs = {'tickers': FILTER_TICKERS, 'start': '2026-01-01'} if kind == 'filtre' else {}
+    t0 = time.perf_counter()
+    df = db.get_price_history(source=source, **kwargs)
+    secs = time.perf_counter() - t0
+    peak_kb = peak_rss_kb(reset_ok)
+    print(json.dumps({'case': case, 'rows': len(df), 'secs': secs,
+                      'peak_mb': peak_kb / 1024, 'delta_mb': (peak_kb - base_kb) / 1024}))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=600)
+    ap.add_argument('--years', type=int, default=5)
+    ap.add_argument('--dir', default=None)
+    ap.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.dir)
+        return
+
+    tmp = None
+    if args.dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.dir = tmp.name
+    os.makedirs(args.dir, exist_ok=True)
+    build(args.dir, args.tickers, args.years)
+
+    print(f"\n{'senaryo':16s} {'satır':>10s} {'süre (s)':>9s} {'tepe RSS MB':>12s} {'artış MB':>9s}")
+    for case in CASES:
+        out = subprocess.run([sys.executable, __file__, '--child', case, '--dir', args.dir],
+                             capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['case']:16s} {r['rows']:10,d} {r['secs']:9.2f} {r['peak_mb']:12.0f} {r['delta_mb']:9.0f}")
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Sayfa başına HTML ayrıştırma süresi: eski yol (BeautifulSoup html.parser / pandas.read_html)
+ile yeni lxml tabanlı hedefli çıkarıcı karşılaştırması. `beautifulsoup4` artık bağımlılık değildir;
+yüklü değilse şirket sayfasının eski yolu atlanır.
+
+Kullanım: python benchmarks/bench_parse.py [--repeat 50]
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from io import StringIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from html_extract import extract_fund_holders, extract_holdings_table  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+SELECTOR = "div.flex.flex-col.overflow-x-auto.overflow-y-hidden"
+
+
+def old_fund_holders(content: bytes):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    table = soup.select_one(SELECTOR)
+    out = []
+    if table:
+        for row in table.select("table tbody tr"):
+            cols = row.select("td")
+            if len(cols) >= 3:
+                out.append((cols[0].text.strip(), float(cols[1].text.strip().replace('.', '').replace(',', '.')), cols[2].text.strip()))
+    return out
+
+
+def old_holdings_table(html: str):
+    tables = pd.read_html(StringIO(html))
+    keywords = ['Hisse', 'Hisse Kodu', 'Hisse Adı', '%', 'Pay', 'Pay Oranı']
+
+    def score_table(df):
+        return sum(1 for k in keywords for c in map(str, df.columns) if k.lower() in c.lower())
+
+    scored = sorted(((score_table(t), i) for i, t in enumerate(tables)), reverse=True)
+    return tables[scored[0][1]]
+
+
+def bench(fn, arg, repeat: int) -> float:
+    fn(arg)  # ısınma
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=50)
+    args = ap.parse_args()
+
+    with open(os.path.join(FIXTURES, 'fintables_sirket_bilgileri.html'), 'rb') as f:
+        company_page = f.read()
+    with open(os.path.join(FIXTURES, 'fintables_fon_portfoy.html'), encoding='utf-8') as f:
+        fund_page = f.read()
+
+    cases = [
+        ("get_whale_data (şirket sayfası)", old_fund_holders, lambda c: extract_fund_holders(c, SELECTOR), company_page),
+        ("parse_fintables_holdings (fon sayfası)", old_holdings_table, extract_holdings_table, fund_page),
+    ]
+    print(f"{'senaryo':42s} {'önce (ms)':>10s} {'sonra (ms)':>10s} {'hızlanma':>9s}")
+    for name, old, new, page in cases:
+        if old is old_fund_holders and importlib.util.find_spec("bs4") is None:
+            print(f"{name:42s} {'-':>10s} {bench(new, page, args.repeat):10.2f}  (bs4 yüklü değil, eski yol atlandı)")
+            continue
+        t_old = bench(old, page, args.repeat)
+        t_new = bench(new, page, args.repeat)
+        print(f"{name:42s} {t_old:10.2f} {t_new:10.2f} {t_old / t_new:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
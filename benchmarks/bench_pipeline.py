@@ -0,0 +1,346 @@
+"""
+Uçtan uca çevrimdışı benchmark: tarama → ayrıştırma → yazım → sorgu → çizim.
+
+Ağ yerine yerel bir sahte HTTP sunucusu (Fintables şirket/fon sayfaları `fixtures/` altındaki kayıtlı
+HTML'lerden, Yahoo fiyatları deterministik JSON'dan) kullanılır; HTTP önbelleği kapalıdır, yani her
+sayfa gerçekten indirilip ayrıştırılır. Veritabanı `seed_mock_data` üreticisi `--rows` satıra
+ölçeklenerek oluşturulur.
+
+Aşamalar ve ölçütler:
+    tarama   `get_whale_data`: sayfa/sn
+    ayristir `parse_fintables_holdings`: sayfa/sn
+    yazim    `upsert_holdings_df`: satır/sn (+ `seed_mock_data` üretimi)
+    sorgu    `get_filtered_data`: gecikme yüzdelikleri (p50/p90/p99, ms)
+    cizim    `enrich_with_market_data` + grafiklerin JSON'a çevrilmesi: süre ve yük boyutu
+Her aşama için tepe bellek (RSS) de kaydedilir.
+
+Sonuçlar JSON olarak yazılır (varsayılan `benchmarks/results/<commit>.json`); `--compare` ile önceki
+bir sonuç dosyasına göre karşılaştırılır ve `--tolerance`'tan fazla gerileme varsa çıkış kodu 1 olur.
+
+Kullanım: python benchmarks/bench_pipeline.py [--rows 1000000] [--pages 200] [--latency-ms 0]
+                                             [--out sonuc.json] [--compare benchmarks/results/abc1234.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from bench_parquet import _reset_peak_rss, peak_rss_kb  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+SELECTOR = "div.flex.flex-col.overflow-x-auto.overflow-y-hidden"
+
+N_FUNDS = 300
+N_STOCKS = 500
+PER_FUND = 20
+
+# Karşılaştırmada izlenen ölçütler: (aşama, ölçüt, büyük değer daha iyi mi)
+TRACKED = [
+    ('tarama', 'pages_per_sec', True),
+    ('ayristir', 'pages_per_sec', True),
+    ('yazim', 'rows_per_sec', True),
+    ('yazim', 'seed_rows_per_sec', True),
+    ('sorgu', 'p50_ms', False),
+    ('sorgu', 'p99_ms', False),
+    ('cizim', 'secs', False),
+    ('cizim', 'payload_kb', False),
+]
+
+
+# --- Sahte sunucu ---
+class StubHandler(BaseHTTPRequestHandler):
+    """Fintables ve Yahoo yerine geçen uç noktalar; `server.latency` kadar gecikme ekler."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts[0] == 'sirketler':
+            body, ctype = self.server.pages['company'], 'text/html; charset=utf-8'
+        elif parts[0] == 'fonlar':
+            body, ctype = self.server.pages['fund'], 'text/html; charset=utf-8'
+        elif parts[0] == 'yahoo':
+            symbols = parse_qs(url.query).get('symbols', [''])[0].split(',')
+            body = json.dumps([_stub_quote(s) for s in symbols if s]).encode()
+            ctype = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _stub_quote(symbol: str) -> dict:
+    # Sembolden türetilen sabit fiyat: koşular arası aynı veri
+    base = 10 + zlib.crc32(symbol.encode()) % 49000 / 100
+    return {'symbol': symbol, 'price': round(base * 1.01, 2), 'previousClose': round(base, 2)}
+
+
+def start_stub_server(latency_ms: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    with open(os.path.join(FIXTURES, 'fintables_sirket_bilgileri.html'), 'rb') as f:
+        company = f.read()
+    with open(os.path.join(FIXTURES, 'fintables_fon_portfoy.html'), 'rb') as f:
+        fund = f.read()
+    server.pages = {'company': company, 'fund': fund}
+    threading.Thread(target=server.serve_forever, name='stub-http', daemon=True).start()
+    return server
+
+
+def stub_quotes(base_url: str):
+    """`get_latest_quotes_yfinance` yerine sahte sunucudan toplu fiyat okuyan sürüm (aynı çıktı şekli)."""
+    from http_client import fetch
+
+    def get_latest_quotes(tickers):
+        resp = fetch(f"{base_url}/yahoo/quotes?symbols={','.join(tickers)}", use_cache=False, conditional=False)
+        rows = [(q['symbol'], q['price'], q['previousClose']) for q in resp.json()]
+        return pd.DataFrame(rows, columns=['Ticker', 'Fiyat', 'Önceki Kapanış'])
+    return get_latest_quotes
+
+
+# --- Ölçüm yardımcıları ---
+class Stage:
+    """Süre ve aşama boyunca tepe RSS ölçen bağlam yöneticisi."""
+
+    def __init__(self, results: dict, name: str):
+        self.results, self.name = results, name
+        self.metrics: dict = {}
+
+    def __enter__(self):
+        self.reset_ok = _reset_peak_rss()
+        self.base_kb = peak_rss_kb(self.reset_ok)
+        self.t0 = time.perf_counter()
+        return self.metrics
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            return False
+        self.metrics.setdefault('secs', time.perf_counter() - self.t0)
+        peak = peak_rss_kb(self.reset_ok)
+        self.metrics['peak_rss_mb'] = peak / 1024
+        self.metrics['delta_rss_mb'] = (peak - self.base_kb) / 1024
+        self.results[self.name] = self.metrics
+        return False
+
+
+def percentiles(samples_ms):
+    qs = statistics.quantiles(samples_ms, n=100, method='inclusive')
+    return {'p50_ms': statistics.median(samples_ms), 'p90_ms': qs[89], 'p99_ms': qs[98], 'max_ms': max(samples_ms)}
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'bilinmiyor'
+
+
+# --- Aşamalar ---
+def bench_scan(results, base_url, pages, workers):
+    import app
+
+    config = app.load_config()
+    config.update({
+        'base_url': base_url + '/sirketler/{SYMBOL}/sirket-bilgileri',
+        'watchlist': [f"S{i:04d}" for i in range(pages)],
+        'max_workers': workers,
+        'rate_per_sec': 1e6,
+        'rate_burst': 1e6,
+    })
+    with Stage(results, 'tarama') as m:
+        df, failures = app.get_whale_data(config)
+    if failures:
+        raise RuntimeError(f"tarama hataları: {list(failures.items())[:3]}")
+    m.update(pages=pages, rows=len(df), pages_per_sec=pages / m['secs'])
+    return df
+
+
+def bench_parse(results, base_url, pages, workers):
+    from data_fetcher import parse_fintables_holdings
+    from scanner import scan_concurrently
+
+    urls = [f"{base_url}/fonlar/F{i:04d}" for i in range(pages)]
+    with Stage(results, 'ayristir') as m:
+        scanned = scan_concurrently(urls, parse_fintables_holdings, max_workers=workers)
+    errors = [err for _, _, err in scanned if err is not None]
+    if errors:
+        raise RuntimeError(f"ayrıştırma hataları: {errors[:3]}")
+    m.update(pages=pages, rows=sum(len(df) for _, df, _ in scanned), pages_per_sec=pages / m['secs'])
+
+
+def scaled_days(rows: int) -> int:
+    # mock_holdings `days + 1` gün üretir
+    return max(1, -(-rows // (N_FUNDS * PER_FUND)) - 1)
+
+
+def bench_ingest(results, tmp, rows):
+    from db_manager import FundDBManager, mock_holdings
+
+    funds = [f"FON {i:03d} PORTFÖY" for i in range(N_FUNDS)]
+    stocks = [f"H{i:04d}" for i in range(N_STOCKS)]
+    days = scaled_days(rows)
+    frame = mock_holdings(days=days, funds=funds, stocks=stocks, per_fund=PER_FUND, seed=1)
+
+    db = FundDBManager(os.path.join(tmp, 'ingest.db'), auto_populate=False)
+    with Stage(results, 'yazim') as m:
+        db.upsert_holdings_df(frame, kaynak='bench')
+    m.update(rows=len(frame), rows_per_sec=len(frame) / m['secs'])
+    db.close()
+    del frame
+
+    # Sorgu aşamasının veritabanı: seed_mock_data aynı üreticiyle ölçeklenir
+    query_db = FundDBManager(os.path.join(tmp, 'query.db'), auto_populate=False)
+    t0 = time.perf_counter()
+    seeded = query_db.seed_mock_data(days=days, funds=funds, stocks=stocks, per_fund=PER_FUND, seed=2)
+    m.update(seed_rows=seeded, seed_rows_per_sec=seeded / (time.perf_counter() - t0))
+    return query_db
+
+
+def bench_query(results, db, n_queries):
+    funds = db.get_all_funds()
+    rng = random.Random(3)
+    # Isınma: ilk sorgu sayfa önbelleğini doldurur
+    db.get_filtered_data(funds[:1], 30)
+    samples = []
+    rows = 0
+    with Stage(results, 'sorgu') as m:
+        for _ in range(n_queries):
+            selected = rng.sample(funds, rng.choice([1, 3, 10]))
+            days = rng.choice([7, 30, 90, 365])
+            t0 = time.perf_counter()
+            rows += len(db.get_filtered_data(selected, days))
+            samples.append((time.perf_counter() - t0) * 1000)
+    m.update(queries=n_queries, rows=rows, **percentiles(samples))
+
+
+def bench_render(results, db, df_whales, history_days=90):
+    import app
+    import charts
+
+    history = db.get_filtered_data(db.get_all_funds()[:10], history_days)
+    with Stage(results, 'cizim') as m:
+        df_final = app.enrich_with_market_data(df_whales.copy())
+        figs = [
+            charts.pie_chart(df_final, values='Portföy Değeri (TL)', names='Hisse', title='Hisse Bazlı Dağılım'),
+            charts.bar_chart(df_final, x='Fon Adı', y='Portföy Değeri (TL)', color='Hisse', title='Fon Bazlı Büyüklük'),
+            charts.line_chart(history, x='Tarih', y='Pay Oranı (%)', color='Fon Adı'),
+        ]
+        payload = sum(len(fig.to_json()) for fig in figs)
+    m.update(scan_rows=len(df_final), history_rows=len(history), payload_kb=payload / 1024)
+
+
+# --- Karşılaştırma ---
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """Baz sonuca göre değişimleri yazdırır; `tolerance`'tan büyük gerileme varsa True döner."""
+    print(f"\nkarşılaştırma: {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    if baseline['meta'].get('args') != current['meta'].get('args'):
+        print(f"  uyarı: parametreler farklı ({baseline['meta'].get('args')})")
+    print(f"{'aşama':10s} {'ölçüt':18s} {'önce':>12s} {'sonra':>12s} {'değişim':>9s}")
+    regressed = False
+    for stage, metric, higher_better in TRACKED:
+        old = baseline['stages'].get(stage, {}).get(metric)
+        new = current['stages'].get(stage, {}).get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_better else change
+        flag = ''
+        if worse > tolerance:
+            flag = '  !! gerileme'
+            regressed = True
+        print(f"{stage:10s} {metric:18s} {old:12.2f} {new:12.2f} {change:+8.1%}{flag}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=1_000_000, help='Sentetik sahiplik satırı (yazım ve sorgu)')
+    ap.add_argument('--pages', type=int, default=200, help='Taranan şirket / fon sayfası sayısı')
+    ap.add_argument('--workers', type=int, default=8)
+    ap.add_argument('--latency-ms', type=float, default=0, help='Sahte sunucunun yanıt gecikmesi')
+    ap.add_argument('--queries', type=int, default=100)
+    ap.add_argument('--out', default=None, help='Sonuç JSON yolu (varsayılan benchmarks/results/<commit>.json)')
+    ap.add_argument('--compare', default=None, help='Karşılaştırılacak önceki sonuç JSON')
+    ap.add_argument('--tolerance', type=float, default=0.10, help='İzin verilen gerileme oranı')
+    args = ap.parse_args()
+
+    # Çıplak modda her st.* çağrısı "missing ScriptRunContext" uyarısı basar
+    os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+    import data_fetcher
+    from http_cache import configure_cache
+
+    configure_cache(None)  # her sayfa gerçekten indirilip ayrıştırılsın
+    server = start_stub_server(args.latency_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    data_fetcher.get_latest_quotes_yfinance = stub_quotes(base_url)
+
+    stages: dict = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        df_whales = bench_scan(stages, base_url, args.pages, args.workers)
+        bench_parse(stages, base_url, args.pages, args.workers)
+        db = bench_ingest(stages, tmp, args.rows)
+        bench_query(stages, db, args.queries)
+        bench_render(stages, db, df_whales)
+        db.close()
+    server.shutdown()
+
+    commit = git_commit()
+    result = {
+        'meta': {
+            'commit': commit,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('out', 'compare', 'tolerance')},
+        },
+        'stages': stages,
+    }
+
+    print(f"{'aşama':10s} {'süre (s)':>9s} {'tepe RSS MB':>12s} {'artış MB':>9s}  ölçütler")
+    for name, m in stages.items():
+        extra = {k: v for k, v in m.items() if k not in ('secs', 'peak_rss_mb', 'delta_rss_mb')}
+        shown = ', '.join(f"{k}={v:,.1f}" if isinstance(v, float) else f"{k}={v:,}" for k, v in extra.items())
+        print(f"{name:10s} {m['secs']:9.2f} {m['peak_rss_mb']:12.0f} {m['delta_rss_mb']:9.0f}  {shown}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nsonuçlar: {out}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare(result, baseline, args.tolerance) else 0)
+
+
+if __name__ == '__main__':
+    main()
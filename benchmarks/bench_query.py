@@ -0,0 +1,117 @@
+"""
+`get_filtered_data` sorgu benchmark'ı: eski `date(tarih) >= date(?)` filtresi ile indeks
+kullanabilen `tarih >= ?` filtresinin karşılaştırması ve EXPLAIN QUERY PLAN kontrolleri.
+
+Sentetik tablo SQL tarafında (recursive CTE) üretilir; 10M satır birkaç dakika sürebilir.
+Oluşturulan veritabanı `--db` ile tekrar kullanılabilir.
+
+Kullanım: python benchmarks/bench_query.py [--rows 10000000] [--db /tmp/bench_query.db]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db_manager import FundDBManager  # noqa: E402
+
+N_FUNDS = 300
+N_STOCKS = 500
+
+
+def populate(db: FundDBManager, rows: int) -> None:
+    conn = db.get_connection()
+    have = conn.execute("SELECT COUNT(*) FROM portfoy_hareketleri").fetchone()[0]
+    if have >= rows:
+        return
+    per_day = N_FUNDS * 20  # her fon günde 20 hisse
+    print(f"{rows:,} satır üretiliyor...", flush=True)
+    t0 = time.perf_counter()
+    with conn:
+        conn.execute('''
+            WITH RECURSIVE seq(i) AS (SELECT ? UNION ALL SELECT i + 1 FROM seq WHERE i + 1 < ?)
+            INSERT OR IGNORE INTO portfoy_hareketleri (tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak)
+            SELECT date('2000-01-01', '+' || (i / ?) || ' days'),
+                   'FON ' || ((i % ?) / 20),
+                   'H' || (((i % ?) / 20 * 7 + i % 20 * 13) % ?),
+                   (i % 2000) / 100.0,
+                   i % 1000000,
+                   'bench'
+            FROM seq
+        ''', (have, rows, per_day, per_day, per_day, N_STOCKS))
+        conn.execute("ANALYZE")
+    print(f"üretim: {time.perf_counter() - t0:.1f} s", flush=True)
+
+
+def plan(conn, sql, params):
+    return [r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def run(conn, sql, params, repeat):
+    times = []
+    n = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = len(conn.execute(sql, params).fetchall())
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), max(times), n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=10_000_000)
+    ap.add_argument('--db', default=None)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    tmp = None
+    if args.db is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = os.path.join(tmp.name, 'bench_query.db')
+
+    db = FundDBManager(args.db, auto_populate=False)
+    populate(db, args.rows)
+    conn = db.get_connection()
+    last = conn.execute("SELECT MAX(tarih) FROM portfoy_hareketleri").fetchone()[0]
+    since = conn.execute("SELECT date(?, '-30 days')", (last,)).fetchone()[0]
+    funds = ['FON 1', 'FON 42', 'FON 199']
+    fund_ph = ', '.join('?' * len(funds))
+
+    cases = [
+        ("tarih (eski)", "SELECT * FROM portfoy_hareketleri WHERE date(tarih) >= date(?) ORDER BY tarih ASC", [since], None),
+        ("tarih (yeni)", *FundDBManager.build_filtered_query([], since), 'SEARCH'),
+        ("tarih+fon (eski)", f"SELECT * FROM portfoy_hareketleri WHERE date(tarih) >= date(?) AND fon_adi IN ({fund_ph}) ORDER BY tarih ASC",
+         [since] + funds, None),
+        ("tarih+fon (yeni)", *FundDBManager.build_filtered_query(funds, since), 'SEARCH'),
+        ("hisse geçmişi", "SELECT tarih, fon_adi, pay_orani FROM portfoy_hareketleri WHERE hisse_kodu = ? AND tarih >= ?",
+         ['H7', since], 'SEARCH'),
+    ]
+
+    total = conn.execute("SELECT COUNT(*) FROM portfoy_hareketleri").fetchone()[0]
+    print(f"tablo: {total:,} satır, filtre: tarih >= {since}\n")
+    print(f"{'senaryo':18s} {'medyan ms':>10s} {'max ms':>9s} {'satır':>8s}  plan")
+    failed = False
+    for name, sql, params, expect in cases:
+        steps = plan(conn, sql, params)
+        med, worst, n = run(conn, sql, params, args.repeat)
+        print(f"{name:18s} {med:10.1f} {worst:9.1f} {n:8d}  {' | '.join(steps)}")
+        # Sargable sorgular tam tablo taraması (SCAN) yerine indeks araması (SEARCH) yapmalı
+        if expect and (not any(s.startswith(expect) for s in steps) or any(s.startswith('SCAN') for s in steps)):
+            print(f"  !! beklenen plan: {expect}, tam tarama olmamalı")
+            failed = True
+        if 'IN (' in sql and expect and not any('COVERING INDEX ix_portfoy_fon_tarih' in s for s in steps):
+            print("  !! fon filtresi ix_portfoy_fon_tarih covering indeksini kullanmalı")
+            failed = True
+
+    db.close()
+    if tmp is not None:
+        tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import asyncio
+import atexit
+import logging
+import threading
+from typing import List, Optional, Sequence, Union
+from urllib.parse import urlparse
+
+# Render için gereksiz kaynak türleri ve analitik/reklam host'ları
+BLOCKED_RESOURCE_TYPES = frozenset(["image", "font", "media"])
+BLOCKED_HOST_PARTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "hotjar.com", "clarity.ms", "segment.io", "mixpanel.com", "yandex.ru/metrika", "mc.yandex",
+)
+DEFAULT_WAIT_SELECTOR = "table tbody tr"
+DEFAULT_POOL_SIZE = 4
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """
+    Uzun ömürlü headless Chromium havuzu.
+    Tek bir tarayıcı içinde `size` adet yeniden kullanılabilir context tutar; async Playwright
+    API'si arka plandaki kendi event loop thread'inde çalışır, böylece senkron koddan da
+    birden fazla URL eşzamanlı render edilebilir.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, wait_selector: str = DEFAULT_WAIT_SELECTOR, timeout: int = 20000):
+        self.size = size
+        self.wait_selector = wait_selector
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._free: Optional[asyncio.Queue] = None
+        self._lock = threading.Lock()
+
+    # --- yaşam döngüsü ---
+    def start(self) -> "BrowserPool":
+        with self._lock:
+            if self._loop is not None:
+                return self
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._astart(), loop).result()
+            except Exception:
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+            self._loop, self._thread = loop, thread
+        return self
+
+    async def _astart(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._free = asyncio.Queue()
+            for _ in range(self.size):
+                ctx = await self._browser.new_context()
+                await ctx.route("**/*", self._filter_request)
+                self._contexts.append(ctx)
+                self._free.put_nowait(ctx)
+        except Exception:
+            # Yarım kalan başlatmayı temizle ki sonraki çağrı baştan denesin
+            await self._aclose()
+            self._browser = self._playwright = None
+            raise
+
+    @staticmethod
+    async def _filter_request(route):
+        req = route.request
+        host_path = urlparse(req.url).netloc + urlparse(req.url).path
+        if req.resource_type in BLOCKED_RESOURCE_TYPES or any(h in host_path for h in BLOCKED_HOST_PARTS):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._aclose(), self._loop).result(timeout=30)
+            finally:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._loop = self._thread = None
+
+    async def _aclose(self):
+        for ctx in self._contexts:
+            await ctx.close()
+        self._contexts = []
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    # --- render ---
+    async def _arender(self, url: str, wait_selector: Optional[str], timeout: Optional[int]) -> str:
+        timeout = timeout or self.timeout
+        ctx = await self._free.get()
+        page = await ctx.new_page()
+        try:
+            await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+            # networkidle yerine doğrudan tablo satırlarının gelmesini bekle
+            await page.wait_for_selector(wait_selector or self.wait_selector, timeout=timeout)
+            return await page.content()
+        finally:
+            await page.close()
+            self._free.put_nowait(ctx)
+
+    async def _arender_many(self, urls, wait_selector, timeout):
+        return await asyncio.gather(*(self._arender(u, wait_selector, timeout) for u in urls), return_exceptions=True)
+
+    def render(self, url: str, wait_selector: Optional[str] = None, timeout: Optional[int] = None) -> str:
+        """Tek URL'yi render edip HTML döndürür."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._arender(url, wait_selector, timeout), self._loop).result()
+
+    def render_many(self, urls: Sequence[str], wait_selector: Optional[str] = None,
+                    timeout: Optional[int] = None) -> List[Union[str, Exception]]:
+        """
+        URL'leri havuzdaki context sayısı kadar eşzamanlı render eder.
+        Döndürür: girdi sırasıyla HTML veya hata nesnesi listesi.
+        """
+        self.start()
+        fut = asyncio.run_coroutine_threadsafe(self._arender_many(list(urls), wait_selector, timeout), self._loop)
+        return fut.result()
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool(size: Optional[int] = None) -> BrowserPool:
+    """
+    Süreç genelinde paylaşılan tarayıcı havuzunu döndürür (ilk kullanımda başlatılır).
+    `size` yalnızca havuzu oluşturan ilk çağrıda geçerlidir (varsayılan `DEFAULT_POOL_SIZE`); mevcut havuz
+    farklı boyutla istenirse uyarı yazılır ve mevcut havuz döner.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool(size=size or DEFAULT_POOL_SIZE)
+                atexit.register(_pool.close)
+                return _pool
+    if size is not None and size != _pool.size:
+        logger.warning("Tarayıcı havuzu zaten %d context ile çalışıyor; istenen boyut (%d) yok sayıldı",
+                       _pool.size, size)
+    return _pool
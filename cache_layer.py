@@ -0,0 +1,145 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple
+
+import instrumentation as instr
+
+# Türkiye 2016'dan beri sabit UTC+3 kullanıyor (yaz saati yok)
+ISTANBUL_TZ = timezone(timedelta(hours=3))
+# BIST pay piyasası: sürekli işlem + kapanış seansı, küçük tamponlarla
+SESSION_OPEN = dtime(9, 55)
+SESSION_CLOSE = dtime(18, 15)
+
+QUOTE_TTL_IN_SESSION = 5 * 60
+DB_QUERY_TTL = 60 * 60
+
+
+def _now_istanbul(now: Optional[datetime] = None) -> datetime:
+    if now is None:
+        return datetime.now(ISTANBUL_TZ)
+    return now.astimezone(ISTANBUL_TZ) if now.tzinfo else now.replace(tzinfo=ISTANBUL_TZ)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    now = _now_istanbul(now)
+    return now.weekday() < 5 and SESSION_OPEN <= now.time() < SESSION_CLOSE
+
+
+def seconds_until_next_open(now: Optional[datetime] = None) -> float:
+    """Bir sonraki seans açılışına kalan süre (hafta sonlarını atlar; resmi tatiller dikkate alınmaz)."""
+    now = _now_istanbul(now)
+    candidate = now.replace(hour=SESSION_OPEN.hour, minute=SESSION_OPEN.minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return (candidate - now).total_seconds()
+
+
+def last_settled_session(now: Optional[datetime] = None) -> Optional[date]:
+    """
+    Kapanışı kesinleşmiş son seans günü (hafta sonlarını atlar; resmi tatiller dikkate alınmaz).
+    Seans açıkken None döner: o sırada geçerli fiyat kayıtlı bir kapanış değil, canlı fiyattır.
+    """
+    now = _now_istanbul(now)
+    if is_market_open(now):
+        return None
+    day = now.date()
+    if now.weekday() >= 5 or now.time() < SESSION_CLOSE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def quote_ttl(now: Optional[datetime] = None) -> float:
+    """Canlı fiyatlar: seans içinde birkaç dakika, seans dışında bir sonraki açılışa kadar geçerli."""
+    if is_market_open(now):
+        return QUOTE_TTL_IN_SESSION
+    return max(QUOTE_TTL_IN_SESSION, seconds_until_next_open(now))
+
+
+def ownership_ttl(now: Optional[datetime] = None) -> float:
+    """Sahiplik tabloları en fazla günde bir değişir: bir sonraki seans açılışına kadar geçerli."""
+    return max(QUOTE_TTL_IN_SESSION, seconds_until_next_open(now))
+
+
+def make_key(*parts) -> str:
+    """Config, izleme listesi gibi parçalardan kararlı bir anahtar üretir."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Streamlit yeniden çalıştırmaları ve oturumlar arasında paylaşılan, süre ve veri sürümü
+    tabanlı sonuç önbelleği. `version` değiştiğinde (ör. yeni veri yazıldığında) kayıt geçersiz sayılır.
+    En fazla `max_entries` kayıt tutulur; en eski kullanılan kayıt atılır.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Any], ttl: float,
+                       version: Any = None, refresh: bool = False) -> Tuple[Any, dict]:
+        """
+        Geçerli kayıt varsa döndürür, yoksa `compute()` sonucunu saklar.
+        Döndürür: (değer, {'hit': bool, 'age': saniye, 'created_at': datetime})
+        """
+        slot = (namespace, key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and not refresh and entry['expires_at'] > now and entry['version'] == version:
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                instr.count(f"cache.{namespace}.hit")
+                return entry['value'], {'hit': True, 'age': now - entry['created_ts'], 'created_at': entry['created_at']}
+
+        # Hesaplama kilit dışında yapılır; uzun taramalar diğer okumaları bekletmez
+        instr.count(f"cache.{namespace}.miss")
+        value = compute()
+        created_ts = time.time()
+        entry = {'value': value, 'created_ts': created_ts, 'created_at': datetime.now(ISTANBUL_TZ),
+                 'expires_at': created_ts + ttl, 'version': version}
+        with self._lock:
+            self._entries[slot] = entry
+            self._entries.move_to_end(slot)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.misses += 1
+        return value, {'hit': False, 'age': 0.0, 'created_at': entry['created_at']}
+
+    def peek(self, namespace: str, key: str) -> Optional[Tuple[Any, dict]]:
+        """Hesaplama yapmadan, süresi dolmamış kaydı (sürüm kontrolü olmadan) döndürür."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry['expires_at'] <= now:
+                return None
+            return entry['value'], {'hit': True, 'age': now - entry['created_ts'], 'created_at': entry['created_at']}
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Verilen ad alanındaki (veya tüm) kayıtları siler."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for slot in [s for s in self._entries if s[0] == namespace]:
+                    del self._entries[slot]
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f} sn"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} dk"
+    return f"{seconds / 3600:.1f} sa"
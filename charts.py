@@ -0,0 +1,179 @@
+"""
+Panel grafikleri için sunucu tarafı küçültme.
+
+Plotly her noktayı tarayıcıya JSON olarak gönderir; yıllarca geçmiş ve çok sayıda seri için sayfa
+ağırlaşır. Bu modül grafikleri oluşturmadan önce veriyi ekranın çizebileceği kadar küçültür:
+
+- Zaman serileri seri başına nokta bütçesine LTTB (Largest-Triangle-Three-Buckets) ya da min/max
+  kovalarıyla indirilir; toplam nokta `WEBGL_THRESHOLD`'u aşarsa izler `scattergl` (WebGL) olur.
+- Pasta grafiğinde küçük dilimler "Diğer" altında toplanır; çubuk grafikte aynı (x, renk) satırları
+  toplanır ve en büyük `max_bars` kategori dışındakiler "Diğer" olur.
+- Üretilen figürün JSON boyutu `max_bytes`'ı aşarsa nokta bütçesi yarıya indirilerek yeniden kurulur.
+
+`plotly.express` ilk grafik çizilirken yüklenir; panelin soğuk açılışı bu maliyeti taşımaz.
+"""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import instrumentation as instr
+
+DEFAULT_WIDTH_PX = 1200  # sunucu tarafında kap genişliği bilinmez; geniş düzen için makul üst sınır
+WEBGL_THRESHOLD = 5_000  # toplam nokta; üstünde SVG yerine WebGL
+MAX_PAYLOAD_BYTES = 2 * 1024 * 1024
+MIN_POINTS_PER_SERIES = 32
+OTHER_LABEL = "Diğer"
+
+
+# --- Küçültme algoritmaları: seçilen satırların (artan) konumlarını döndürür ---
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: ilk ve son nokta korunur, aradaki her kovadan bir önceki seçilen
+    nokta ile sonraki kovanın ortalamasıyla en büyük üçgeni oluşturan nokta seçilir. `x` artan olmalı.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.nanargmax(area)) if hi > lo and not np.all(np.isnan(area)) else lo
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Eşit genişlikli kovaların her birinden en küçük ve en büyük değer (tepe noktaları kaybolmaz)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    buckets = np.arange(n) * (n_out // 2) // n
+    s = pd.Series(np.asarray(y, dtype=np.float64))
+    grouped = s.groupby(buckets)
+    picks = np.concatenate([grouped.idxmin().dropna().to_numpy(), grouped.idxmax().dropna().to_numpy(), [0, n - 1]])
+    return np.unique(picks.astype(np.int64))
+
+
+def _as_number(x: pd.Series) -> np.ndarray:
+    """Eksen değerlerini float'a çevirir; SQLite'tan gelen 'YYYY-MM-DD' metinleri tarih olarak okunur."""
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=np.float64)
+    if not pd.api.types.is_datetime64_any_dtype(x):
+        x = pd.to_datetime(x)
+    return x.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, color: Optional[str] = None,
+               max_points: int = DEFAULT_WIDTH_PX, method: str = 'lttb') -> pd.DataFrame:
+    """
+    Her seriyi (`color` gruplarını) en fazla `max_points` noktaya indirir; kısa seriler olduğu gibi kalır.
+    Satırlar `x`'e göre sıralanır, diğer kolonlar seçilen satırlarla birlikte korunur.
+    """
+    if method not in ('lttb', 'minmax'):
+        raise ValueError("method 'lttb' veya 'minmax' olmalı")
+    if df.empty:
+        return df
+    groups = df.groupby(color, observed=True, sort=False).indices.values() if color else [np.arange(len(df))]
+    keep: List[np.ndarray] = []
+    xs = _as_number(df[x])
+    ys = pd.to_numeric(df[y]).to_numpy(dtype=np.float64)
+    for idx in groups:
+        idx = idx[np.argsort(xs[idx], kind='stable')]
+        if len(idx) <= max_points:
+            keep.append(idx)
+            continue
+        pick = lttb_indices(xs[idx], ys[idx], max_points) if method == 'lttb' else minmax_indices(ys[idx], max_points)
+        keep.append(idx[pick])
+    rows = np.concatenate(keep) if keep else np.arange(0)
+    instr.count("cizim.nokta_atilan", len(df) - len(rows))
+    return df.iloc[rows]
+
+
+def figure_bytes(fig) -> int:
+    return len(fig.to_json())
+
+
+# --- Grafikler ---
+@instr.timed("cizim.line")
+def line_chart(df: pd.DataFrame, x: str, y: str, color: Optional[str] = None,
+               width_px: int = DEFAULT_WIDTH_PX, total_points: Optional[int] = None,
+               max_bytes: int = MAX_PAYLOAD_BYTES, method: str = 'lttb', **px_kwargs):
+    """
+    `px.line` karşılığı. Toplam nokta bütçesi (varsayılan 4 × `width_px`) seriler arasında bölünür;
+    seri başına en az `MIN_POINTS_PER_SERIES`, en çok `width_px` nokta gönderilir.
+    """
+    n_series = df[color].nunique() if color and not df.empty else 1
+    budget = total_points or 4 * width_px
+    per_series = int(min(width_px, max(MIN_POINTS_PER_SERIES, budget // max(n_series, 1))))
+    import plotly.express as px
+
+    while True:
+        data = downsample(df, x, y, color, max_points=per_series, method=method)
+        fig = px.line(data, x=x, y=y, color=color,
+                      render_mode='webgl' if len(data) > WEBGL_THRESHOLD else 'svg', **px_kwargs)
+        if per_series <= MIN_POINTS_PER_SERIES or figure_bytes(fig) <= max_bytes:
+            return fig
+        per_series = max(MIN_POINTS_PER_SERIES, per_series // 2)
+
+
+def top_n_with_other(values: pd.Series, n: int, min_share: float = 0.0, other_label: str = OTHER_LABEL) -> pd.Series:
+    """
+    Toplanmış (ad -> değer) serisinde en büyük `n - 1` kalemi (ve payı `min_share`'in üstündekileri, en çok `n`)
+    bırakır, kalanları `other_label` altında toplar.
+    """
+    values = values[values > 0].sort_values(ascending=False)
+    total = values.sum()
+    if len(values) <= n and (min_share <= 0 or total <= 0 or (values / total >= min_share).all()):
+        return values
+    keep = values.iloc[:max(n - 1, 1)]
+    if min_share > 0 and total > 0:
+        keep = keep[keep / total >= min_share]
+    rest = values.drop(keep.index).sum()
+    if rest > 0:
+        keep = pd.concat([keep, pd.Series({other_label: rest})])
+    return keep
+
+
+@instr.timed("cizim.pie")
+def pie_chart(df: pd.DataFrame, values: str, names: str, max_slices: int = 12, min_share: float = 0.01,
+              **px_kwargs):
+    """`px.pie` karşılığı; `max_slices` ve `min_share` dışındaki dilimler "Diğer" olur."""
+    totals = df.groupby(df[names].astype(str), sort=False)[values].sum()
+    sliced = top_n_with_other(totals, max_slices, min_share)
+    data = pd.DataFrame({names: sliced.index.astype(str), values: sliced.to_numpy()})
+    import plotly.express as px
+
+    return px.pie(data, values=values, names=names, **px_kwargs)
+
+
+@instr.timed("cizim.bar")
+def bar_chart(df: pd.DataFrame, x: str, y: str, color: Optional[str] = None, max_bars: int = 30,
+              max_colors: int = 12, **px_kwargs):
+    """
+    `px.bar` karşılığı: aynı (x, renk) satırları tek çubuk parçasına toplanır; en büyük `max_bars`
+    x kategorisi ve `max_colors` renk dışındakiler "Diğer" altında birleşir.
+    """
+    data = pd.DataFrame({x: df[x].astype(str), y: pd.to_numeric(df[y])})
+    if color:
+        data[color] = df[color].astype(str).to_numpy()
+        keep_colors = top_n_with_other(data.groupby(color)[y].sum(), max_colors).index
+        data[color] = data[color].where(data[color].isin(keep_colors), OTHER_LABEL)
+    keep_x = top_n_with_other(data.groupby(x)[y].sum(), max_bars).index
+    data[x] = data[x].where(data[x].isin(keep_x), OTHER_LABEL)
+    keys = [x, color] if color else [x]
+    data = data.groupby(keys, sort=False, as_index=False)[y].sum()
+    order = data.groupby(x)[y].sum().sort_values(ascending=False).index.tolist()
+    import plotly.express as px
+
+    fig = px.bar(data, x=x, y=y, color=color, category_orders={x: order}, **px_kwargs)
+    return fig
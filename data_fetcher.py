@@ -1,148 +1,186 @@
+import datetime
+import importlib.util
+import pandas as pd
+from typing import List, Optional
+import logging
+
+import instrumentation as instr
+from html_extract import extract_holdings_table
+from http_client import get_text
+from schema import PRICE_SCHEMA, apply_schema
+
+logger = logging.getLogger(__name__)
+
+# optional backend; yalnızca kurulu olup olmadığına bakılır, modül ilk render'da (browser_pool) yüklenir
+_HAS_PLAYWRIGHT = importlib.util.find_spec("playwright") is not None
+
+
 def extract_tickers_from_yandex(query: str, max_results: int = 10) -> list:
     """
-    Yandex Finance arama API'si veya web scraping ile BIST hisse kodlarını çeker.
+    Yandex Finance aramasından BIST hisse kodlarını (sonuç sırasıyla, tekil) çeker.
     query: Fon adı, şirket adı veya kısmi kod.
     Döndürür: ['THYAO.IS', 'ASELS.IS', ...]
     Not: Yandex'in resmi bir public API'si yoktur, bu fonksiyon HTML scraping ile çalışır.
+    Toplu ve doğrulamalı keşif için bkz. `ticker_discovery.discover_tickers`.
     """
-    url = f'https://yandex.com/quotes/search?text={query}'
-    resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, 'lxml')
-    tickers = []
-    for a in soup.select('a.QuotesListItem__link'):
-        text = a.get_text(strip=True)
-        # BIST kodları genellikle büyük harf ve 3-5 karakter
-        m = re.search(r'([A-Z]{3,5})', text)
-        if m:
-            code = m.group(1)
-            if not code.endswith('.IS'):
-                code = code + '.IS'
-            tickers.append(code)
-        if len(tickers) >= max_results:
-            break
-    return list(set(tickers))
+    from ticker_discovery import cached_master, tickers_from_yandex
+
+    valid, _ = cached_master().split(tickers_from_yandex(query, max_results=max_results))
+    return valid
+
+
 def extract_tickers_from_fintables(url: str) -> list:
     """
-    Fintables portföy tablosundan BIST hisse kodlarını otomatik tespit eder.
+    Fintables portföy tablosundan BIST hisse kodlarını (tablo sırasıyla, tekil) tespit eder.
     Döndürür: ['THYAO.IS', 'ASELS.IS', ...]
     """
-    df = parse_fintables_holdings(url)
-    # Hisse kodu kolonunu bul
-    hisse_col = None
-    for c in df.columns:
-        if 'hisse' in str(c).lower() or 'kod' in str(c).lower():
-            hisse_col = c
-            break
-    if hisse_col is None:
-        raise ValueError('Hisse kodu kolonu bulunamadı')
-    tickers = []
-    for val in df[hisse_col].dropna().unique():
-        code = str(val).strip().upper()
-        # BIST kodu ise .IS ekle
-        if not code.endswith('.IS'):
-            code = code + '.IS'
-        tickers.append(code)
-    return tickers
-
-def update_fund_sources_with_tickers(json_path: str = 'fund_sources.json'):
+    from ticker_discovery import cached_master, tickers_from_fintables
+
+    valid, _ = cached_master().split(tickers_from_fintables(url))
+    return valid
+
+
+def update_fund_sources_with_tickers(json_path: str = 'fund_sources.json', **kwargs) -> dict:
     """
     fund_sources.json dosyasındaki her fon için tickers alanı yoksa veya boşsa, Fintables sayfasından otomatik doldurur.
+    Fonlar eşzamanlı çözülür, kodlar BIST sembol listesiyle doğrulanır ve dosya tek seferde atomik yazılır;
+    `kwargs` `ticker_discovery.update_fund_sources`'a geçer.
+    Döndürür: {'updated': {fon: [ticker, ...]}, 'failed': {fon: hata mesajı},
+               'rejected': {fon: [geçersiz kod, ...]}, 'written': dosya yazıldı mı}
     """
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f'{json_path} bulunamadı')
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    changed = False
-    for fon, cfg in data.items():
-        if not cfg.get('tickers') or not isinstance(cfg['tickers'], list) or len(cfg['tickers']) == 0:
-            url = cfg.get('fintables_url')
-            if url:
-                try:
-                    tickers = extract_tickers_from_fintables(url)
-                    data[fon]['tickers'] = tickers
-                    changed = True
-                    print(f"{fon} için tickers otomatik dolduruldu: {tickers}")
-                except Exception as e:
-                    print(f"{fon} için tickers çekilemedi: {e}")
-    if changed:
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f'{json_path} güncellendi.')
-    else:
-        print('Değişiklik yok, tickers zaten dolu.')
-import datetime
-import pandas as pd
-import requests
-from typing import List
-import json
-import os
-import re
-from bs4 import BeautifulSoup
-
-try:
-    # optional import; may fail if playwright not installed
-    from playwright.sync_api import sync_playwright
-    _HAS_PLAYWRIGHT = True
-except Exception:
-    _HAS_PLAYWRIGHT = False
-
-def get_price_history_yfinance(tickers: List[str], days: int = 30):
+    from ticker_discovery import update_fund_sources
+
+    return update_fund_sources(json_path, **kwargs)
+
+
+def get_price_history_yfinance(tickers: List[str], days: int = 30,
+                               start: Optional[datetime.date] = None, end: Optional[datetime.date] = None):
     """
     Basit yfinance wrapper. `yfinance` paketinin yüklü olması gerekir.
+    `start`/`end` (dahil) verilirse `days` yerine bu aralık indirilir.
 
-    Döndürür: DataFrame with columns ['Date', 'Ticker', 'Close']
+    Döndürür: DataFrame with columns ['Tarih', 'Ticker', 'Kapanis'] (kompakt tipler, bkz. `schema.PRICE_SCHEMA`)
     """
     try:
         import yfinance as yf
     except Exception as e:
         raise RuntimeError("yfinance yüklü değil. requirements.txt'i güncelleyin ve yükleyin.") from e
 
-    end = datetime.datetime.now().date()
-    start = end - datetime.timedelta(days=days)
+    end = end or datetime.datetime.now().date()
+    start = start or end - datetime.timedelta(days=days)
 
     # yfinance.download returns wide dataframe; tidy it
-    data = yf.download(tickers, start=start.strftime("%Y-%m-%d"), end=(end + datetime.timedelta(days=1)).strftime("%Y-%m-%d"), progress=False)
+    with instr.timer("yfinance.gecmis"):
+        data = yf.download(tickers, start=start.strftime("%Y-%m-%d"), end=(end + datetime.timedelta(days=1)).strftime("%Y-%m-%d"), progress=False)
+    if data is None or data.empty:
+        return pd.DataFrame(columns=['Tarih', 'Ticker', 'Kapanis'])
 
     # Eğer tekil ticker verilmişse kolon yapısı farklı olabilir
-    if isinstance(tickers, str) or (isinstance(tickers, list) and len(tickers) == 1):
+    if (isinstance(tickers, str) or (isinstance(tickers, list) and len(tickers) == 1)) and isinstance(data['Close'], pd.Series):
         # data['Close'] is series-like
         close = data['Close'].reset_index()
         close['Ticker'] = tickers if isinstance(tickers, str) else tickers[0]
         close = close.rename(columns={'Date': 'Tarih', 'Close': 'Kapanis'})
-        return close[['Tarih', 'Ticker', 'Kapanis']]
+        return apply_schema(close[['Tarih', 'Ticker', 'Kapanis']], PRICE_SCHEMA)
 
     # Çoklu ticker -> columns are MultiIndex
     if ('Close' in data.columns.levels[0]) if hasattr(data.columns, 'levels') else ('Close' in data.columns):
         # Tidy close prices
         close = data['Close'].stack().reset_index()
         close.columns = ['Tarih', 'Ticker', 'Kapanis']
-        return close[['Tarih', 'Ticker', 'Kapanis']]
+        return apply_schema(close[['Tarih', 'Ticker', 'Kapanis']], PRICE_SCHEMA)
 
     # Fallback: try to extract 'Adj Close' or last column
     try:
         close = data.xs('Adj Close', axis=1, level=0).stack().reset_index()
         close.columns = ['Tarih', 'Ticker', 'Kapanis']
-        return close[['Tarih', 'Ticker', 'Kapanis']]
+        return apply_schema(close[['Tarih', 'Ticker', 'Kapanis']], PRICE_SCHEMA)
     except Exception:
         # As a last resort, return the dataframe as-is
         return data.reset_index()
 
 
-def parse_fintables_holdings(url: str) -> pd.DataFrame:
+def get_latest_quotes_yfinance(tickers: List[str]) -> pd.DataFrame:
     """
-    Basit Fintables parser: verilen URL'deki HTML tablolarını `pandas.read_html` ile çeker,
-    olası 'Hisse' / '% pay' sütunlarını arar ve en uygun tabloyu döndürür.
+    Tüm semboller için son fiyat ve önceki kapanışı tek bir toplu `yf.download` çağrısıyla çeker
+    (sembol başına `.info` isteği yapılmaz).
+
+    Döndürür: DataFrame ['Ticker', 'Fiyat', 'Önceki Kapanış']; veri gelmeyen semboller yer almaz.
+    """
+    try:
+        import yfinance as yf
+    except Exception as e:
+        raise RuntimeError("yfinance yüklü değil. requirements.txt'i güncelleyin ve yükleyin.") from e
+
+    empty = pd.DataFrame(columns=['Ticker', 'Fiyat', 'Önceki Kapanış'])
+    if not tickers:
+        return empty
+
+    # Son birkaç günlük günlük barlar: son satır güncel fiyat (seans içinde anlık), bir önceki önceki kapanış
+    with instr.timer("yfinance.anlik"):
+        data = yf.download(list(tickers), period='5d', interval='1d', group_by='column',
+                           auto_adjust=False, progress=False, threads=True)
+    instr.count("yfinance.symbols", len(tickers))
+    if data is None or data.empty or 'Close' not in data.columns.get_level_values(0):
+        return empty
+
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+
+    rows = []
+    for t in close.columns:
+        s = close[t].dropna()
+        if s.empty:
+            continue
+        last = float(s.iloc[-1])
+        prev = float(s.iloc[-2]) if len(s) > 1 else last
+        rows.append((t, last, prev))
+    return pd.DataFrame(rows, columns=['Ticker', 'Fiyat', 'Önceki Kapanış'])
+
+
+def get_bulk_quotes(tickers: List[str], stored: Optional[pd.DataFrame] = None):
+    """
+    Önce `stored` içindeki (ör. `FundDBManager.get_latest_closes` ile okunan taze) fiyatları kullanır,
+    kalan semboller için tek bir toplu yfinance isteği yapar.
+
+    Döndürür: (DataFrame ['Ticker', 'Fiyat', 'Önceki Kapanış', 'Kaynak'], eksik semboller listesi)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    parts = []
+    have = set()
+    if stored is not None and not stored.empty:
+        hit = stored[stored['Ticker'].isin(tickers)][['Ticker', 'Fiyat', 'Önceki Kapanış']].assign(Kaynak='DB')
+        parts.append(hit)
+        have = set(hit['Ticker'])
+
+    remaining = [t for t in tickers if t not in have]
+    if remaining:
+        fetched = get_latest_quotes_yfinance(remaining)
+        fetched = fetched[fetched['Ticker'].isin(remaining)]
+        parts.append(fetched.assign(Kaynak='yfinance'))
+        have |= set(fetched['Ticker'])
+
+    quotes = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['Ticker', 'Fiyat', 'Önceki Kapanış', 'Kaynak'])
+    missing = [t for t in tickers if t not in have]
+    return quotes, missing
+
+
+def parse_fintables_holdings(url: str, refresh: bool = False, rate_limiter=None) -> pd.DataFrame:
+    """
+    Basit Fintables parser: verilen URL'deki tabloların başlıklarında olası 'Hisse' / '% pay'
+    sütunlarını arar ve en uygun tabloyu (sayısal kolonlar float olarak) döndürür.
 
     Not: Bu fonksiyon genel amaçlıdır ve tüm sayfa yapıları için garanti vermez.
-    Eğer sayfa JavaScript ile dinamik içerik yüklüyorsa pandas.read_html çalışmayacaktır.
+    Eğer sayfa JavaScript ile dinamik içerik yüklüyorsa statik HTML'de tablo bulunmaz.
+    `refresh=True` HTTP önbelleğindeki taze kaydı yok sayar; `rate_limiter` `http_client.fetch`'e geçer.
     """
-    # Basit GET ile sayfayı al
-    resp = requests.get(url, headers={"User-Agent": "fon-tracer-bot/1.0 (+https://github.com)"}, timeout=15)
-    resp.raise_for_status()
+    # Ortak HTTP istemcisi (ve önbelleği) ile sayfayı al
+    html = get_text(url, refresh=refresh, rate_limiter=rate_limiter)
 
-    tables = pd.read_html(resp.text)
-    if not tables:
+    # Yalnızca tablo başlıkları puanlanır, en uygun tablonun satırları okunur
+    df_best = extract_holdings_table(html)
+    if df_best is None:
         # Eğer statik HTML ile tablo bulunamadıysa ve Playwright yüklüyse, JS-rendered sayfayı deneyelim
         if _HAS_PLAYWRIGHT:
             try:
@@ -152,85 +190,54 @@ def parse_fintables_holdings(url: str) -> pd.DataFrame:
         else:
             raise ValueError("Sayfada tablo bulunamadı veya tablo statik HTML içinde değil. Playwright yüklü değilse dinamik sayfalar için yükleyin.")
 
-    # Aranan anahtarlar
-    keywords = ['Hisse', 'Hisse Kodu', 'Hisse Adı', '%', 'Pay', 'Pay Oranı']
+    return normalize_holdings_columns(df_best)
 
-    def score_table(df: pd.DataFrame) -> int:
-        s = 0
-        cols = [str(c) for c in df.columns]
-        for k in keywords:
-            for c in cols:
-                if k.lower() in c.lower():
-                    s += 1
-        return s
 
-    scored = [(score_table(t), idx) for idx, t in enumerate(tables)]
-    scored.sort(reverse=True)
-
-    best_score, best_idx = scored[0]
-    if best_score == 0:
-        # hiçbir anahtar bulunmadı — yine de ilk tabloyu döndür
-        return tables[0]
-
-    df_best = tables[best_idx]
-
-    # Basit normalize: sütun adlarını olası hedef isimlere çevir
+def normalize_holdings_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Basit normalize: sütun adlarını olası hedef isimlere çevir."""
     rename_map = {}
-    for c in df_best.columns:
+    for c in df.columns:
         cn = str(c).lower()
         if 'hisse' in cn or 'kod' in cn:
             rename_map[c] = 'Hisse'
         if '%' in cn or 'pay' in cn:
             rename_map[c] = 'Pay Oranı (%)'
-    df_best = df_best.rename(columns=rename_map)
-
-    return df_best
+    return df.rename(columns=rename_map)
 
 
 def parse_fintables_with_playwright(url: str, timeout: int = 20000) -> pd.DataFrame:
     """
     Playwright kullanarak sayfayı render edip HTML içinden tabloları alır.
-    Bu fonksiyon sync Playwright API'sini kullanır.
+    Her çağrıda yeni tarayıcı açmak yerine paylaşılan `BrowserPool` kullanılır.
 
     Gereksinimler:
     - `playwright` Python paketi yüklü olmalı
     - Tarayıcılar `playwright install` ile yüklenmiş olmalı
     """
+    return parse_fintables_many_with_playwright([url], timeout=timeout)[url]
+
+
+def parse_fintables_many_with_playwright(urls: List[str], timeout: int = 20000) -> dict:
+    """
+    Birden fazla JS-rendered Fintables sayfasını tarayıcı havuzunda eşzamanlı render eder.
+    Döndürür: {url: DataFrame}. Herhangi bir sayfa başarısız olursa ilk hata fırlatılır;
+    hataları tek tek ele almak için `get_browser_pool().render_many` doğrudan kullanılabilir.
+    """
     if not _HAS_PLAYWRIGHT:
         raise RuntimeError("Playwright yüklü değil. requirements.txt'e ekleyip `pip install -r requirements.txt` ve `playwright install` çalıştırın.")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, timeout=timeout)
-        # Beklenmedik JS yüklemeleri için kısa bekleme veriyoruz
-        page.wait_for_load_state('networkidle', timeout=timeout)
-        html = page.content()
-        browser.close()
-
-    tables = pd.read_html(html)
-    if not tables:
-        raise ValueError("Playwright ile render sonrası bile tablo bulunamadı.")
-    # Aynı mantıkla en iyi tabloyu seç
-    keywords = ['Hisse', 'Hisse Kodu', 'Hisse Adı', '%', 'Pay', 'Pay Oranı']
-
-    def score_table(df: pd.DataFrame) -> int:
-        s = 0
-        cols = [str(c) for c in df.columns]
-        for k in keywords:
-            for c in cols:
-                if k.lower() in c.lower():
-                    s += 1
-        return s
-
-    scored = [(score_table(t), idx) for idx, t in enumerate(tables)]
-    scored.sort(reverse=True)
-
-    best_score, best_idx = scored[0]
-    if best_score == 0:
-        return tables[0]
-
-    return tables[best_idx]
+    from browser_pool import get_browser_pool
+
+    pages = get_browser_pool().render_many(urls, timeout=timeout)
+    out = {}
+    for url, html in zip(urls, pages):
+        if isinstance(html, Exception):
+            raise html
+        df_best = extract_holdings_table(html)
+        if df_best is None:
+            raise ValueError("Playwright ile render sonrası bile tablo bulunamadı.")
+        out[url] = normalize_holdings_columns(df_best)
+    return out
 
 
 if __name__ == '__main__':
@@ -1,20 +1,230 @@
 import sqlite3
+import threading
+import time
+import numpy as np
 import pandas as pd
-import random
 import os
 import json
+import logging
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Callable, List, Optional
+
+import instrumentation as instr
+from schema import HOLDINGS_SCHEMA, PRICE_SCHEMA, apply_schema
+
+logger = logging.getLogger(__name__)
+
+def _iso_dates(values: pd.Series) -> List[str]:
+    """Tarih kolonunu vektörel olarak 'YYYY-MM-DD' string listesine çevirir."""
+    dates = pd.to_datetime(values)
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    if dates.isna().any():
+        raise ValueError("Geçersiz veya boş tarih değeri")
+    return dates.to_numpy(dtype='datetime64[D]').astype(str).tolist()
+
+
+MOCK_FUNDS = ["ATLAS PORTFÖY", "TERA PORTFÖY", "HEDEF PORTFÖY", "MAC PORTFÖY"]
+MOCK_STOCKS = ["THYAO", "ASELS", "KCHOL", "GARAN", "ASTOR", "TUPRS"]
+
+
+def mock_holdings(days: int = 60, funds: Optional[List[str]] = None, stocks: Optional[List[str]] = None,
+                  per_fund: int = 3, end: Optional[datetime] = None, seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    `seed_mock_data` üreticisi: `end`'e kadar `days + 1` gün × fon × `per_fund` satır.
+    Pay oranı 5 ± (−0.5, +1.5), lot = pay × 20000; %5 ve üzeri 'KAP (%5+)', altı 'Aylık Rapor' kaynaklıdır.
+    Kolonlar: 'Tarih' ('YYYY-MM-DD'), 'Fon Adı', 'Hisse', 'Pay Oranı (%)', 'Tahmini Lot', 'Kaynak'.
+    """
+    funds = np.asarray(funds or MOCK_FUNDS, dtype=object)
+    stocks = np.asarray(stocks or MOCK_STOCKS, dtype=object)
+    if not 0 < per_fund <= len(stocks):
+        raise ValueError("per_fund 1 ile hisse sayısı arasında olmalı")
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now()
+    dates = [(end - timedelta(days=days - i)).strftime("%Y-%m-%d") for i in range(days + 1)]
+
+    # Her (gün, fon) için tekrarsız hisse seçimi: rastgele anahtarların en küçük `per_fund` tanesi
+    picks = np.concatenate([
+        np.argpartition(rng.random((len(funds), len(stocks))), per_fund - 1, axis=1)[:, :per_fund]
+        for _ in dates
+    ]).ravel()
+    n = len(picks)
+    rate = np.round(5.0 + rng.uniform(-0.5, 1.5, n), 2)
+    return pd.DataFrame({
+        'Tarih': np.repeat(np.asarray(dates, dtype=object), len(funds) * per_fund),
+        'Fon Adı': np.tile(np.repeat(funds, per_fund), len(dates)),
+        'Hisse': stocks[picks],
+        'Pay Oranı (%)': rate,
+        'Tahmini Lot': (rate * 20000).astype('int64'),
+        'Kaynak': np.where(rate >= 5.0, "KAP (%5+)", "Aylık Rapor").astype(object),
+    })
+
+
+# Okuma ağırlıklı panel kullanımı için bağlantı ayarları:
+# WAL ile okuyucular yazıcıyı beklemez, NORMAL senkronizasyon WAL'da güvenli ve hızlıdır.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",  # ~64 MB sayfa önbelleği
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
+BUSY_TIMEOUT_SECONDS = 30
+
+# Sürümlü şema göçleri: (sürüm, [SQL, ...]). Temel tablolar `initialize_db` içinde oluşturulur.
+SCHEMA_MIGRATIONS = [
+    (1, [
+        # Fon filtresi + tarih aralığı; kalan kolonlar sayesinde get_filtered_data tablodan okumaz (covering)
+        '''CREATE INDEX IF NOT EXISTS ix_portfoy_fon_tarih
+           ON portfoy_hareketleri(fon_adi, tarih, hisse_kodu, pay_orani, tahmini_lot, kaynak)''',
+        # Hisse bazlı geçmiş sorguları
+        '''CREATE INDEX IF NOT EXISTS ix_portfoy_hisse_tarih
+           ON portfoy_hareketleri(hisse_kodu, tarih, fon_adi, pay_orani, tahmini_lot)''',
+        # Ticker bazlı fiyat aralıkları, son kapanışlar ve MIN/MAX(tarih)
+        '''CREATE INDEX IF NOT EXISTS ix_price_ticker_tarih
+           ON price_history(ticker, tarih, close)''',
+        "ANALYZE",
+    ]),
+    (2, [
+        # Önbellek geçersizleştirme için yazımlarda artan veri sürümü
+        '''CREATE TABLE IF NOT EXISTS meta (
+               key TEXT PRIMARY KEY,
+               value INTEGER NOT NULL
+           )''',
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 0)",
+    ]),
+    (3, [
+        # Değişim kayıtları: yalnızca girişler, çıkışlar ve eşik üstü pay değişimleri
+        '''CREATE TABLE IF NOT EXISTS holding_events (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               tarih DATE NOT NULL,
+               fon_adi TEXT NOT NULL,
+               hisse_kodu TEXT NOT NULL,
+               olay TEXT NOT NULL CHECK (olay IN ('giris', 'cikis', 'degisim')),
+               pay_orani REAL,
+               onceki_pay REAL,
+               tahmini_lot INTEGER,
+               kaynak TEXT
+           )''',
+        # Bir tarihteki pozisyonun yeniden kurulması: (fon, hisse) başına son olay
+        '''CREATE UNIQUE INDEX IF NOT EXISTS ux_events_fon_hisse_tarih
+           ON holding_events(fon_adi, hisse_kodu, tarih)''',
+        # "Şu tarihten beri ne değişti?" sorgusu
+        "CREATE INDEX IF NOT EXISTS ix_events_tarih ON holding_events(tarih)",
+        # Fark alma için son kaydedilen durum (çıkışta satır silinir)
+        '''CREATE TABLE IF NOT EXISTS holding_state (
+               fon_adi TEXT NOT NULL,
+               hisse_kodu TEXT NOT NULL,
+               tarih DATE NOT NULL,
+               pay_orani REAL,
+               tahmini_lot INTEGER,
+               PRIMARY KEY (fon_adi, hisse_kodu)
+           ) WITHOUT ROWID''',
+    ]),
+    (4, [
+        # Fon/hisse bazında günlük tahmini değer; fiyat ve sahiplik yazımlarından sonra artımlı güncellenir
+        '''CREATE TABLE IF NOT EXISTS portfolio_valuation (
+               fon_adi TEXT NOT NULL,
+               tarih DATE NOT NULL,
+               hisse_kodu TEXT NOT NULL,
+               tahmini_lot INTEGER,
+               kapanis REAL,
+               deger REAL,
+               gunluk_kz REAL,
+               agirlik REAL,
+               PRIMARY KEY (fon_adi, tarih, hisse_kodu)
+           ) WITHOUT ROWID''',
+        # Yeniden hesaplanması gereken en erken tarih (YYYYMMDD); 0 = tamamı
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('valuation_dirty_from', 0)",
+    ]),
+    (5, [
+        # Fiyat ve sahiplik geçmişine her yazımda artar; Parquet deposunun güncelliği bununla karşılaştırılır
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('history_version', 0)",
+    ]),
+]
+
+HOLDINGS_MODES = ('snapshot', 'delta', 'both')
+# Yüzde puan; bunun altındaki pay değişimleri olay olarak kaydedilmez
+DEFAULT_DELTA_THRESHOLD = 0.1
+EVENT_COLUMNS = {
+    "tarih": "Tarih", "fon_adi": "Fon Adı", "hisse_kodu": "Hisse", "olay": "Olay",
+    "pay_orani": "Pay Oranı (%)", "onceki_pay": "Önceki Pay (%)", "tahmini_lot": "Tahmini Lot", "kaynak": "Kaynak",
+}
+# `valuation_dirty_from` için "güncel" değeri
+VALUATION_CLEAN = 99999999
+# İlk günün günlük K/Z'si için önceki kapanışın aranacağı geriye dönük pencere (bayram tatillerini kapsar)
+VALUATION_PRICE_LOOKBACK_DAYS = 14
+VALUATION_COLUMNS = {
+    "tarih": "Tarih", "fon_adi": "Fon Adı", "hisse_kodu": "Hisse", "tahmini_lot": "Tahmini Lot",
+    "kapanis": "Kapanış", "deger": "Tahmini Değer (TL)", "gunluk_kz": "Günlük K/Z (TL)", "agirlik": "Ağırlık",
+}
 
-from data_fetcher import get_price_history_yfinance, parse_fintables_holdings
 
 class FundDBManager:
-    def __init__(self, db_name="fon_takip.db"):
+    def __init__(self, db_name="fon_takip.db", auto_populate: bool = True, holdings_mode: str = 'snapshot',
+                 parquet_store=None):
+        """
+        `holdings_mode`: 'snapshot' her taramayı `portfoy_hareketleri`'ne tam yazar, 'delta' yalnızca
+        değişimleri `holding_events`'e kaydeder, 'both' ikisini birden yapar.
+        `parquet_store` (`parquet_store.ParquetStore`) verilirse fiyat ve tam sahiplik yazımları oraya da yapılır.
+        """
+        if holdings_mode not in HOLDINGS_MODES:
+            raise ValueError(f"Geçersiz holdings_mode: {holdings_mode} (beklenen: {', '.join(HOLDINGS_MODES)})")
         self.db_name = db_name
+        self.auto_populate = auto_populate
+        self.holdings_mode = holdings_mode
+        self.parquet_store = parquet_store
+        self._local = threading.local()
+        self._conn_lock = threading.Lock()
+        self._connections = []  # [(thread, connection), ...]
+        self._population_lock = threading.Lock()
+        self._population = {'state': 'idle', 'done': 0, 'total': 0, 'current': None,
+                            'started_at': None, 'finished_at': None, 'error': None}
         self.initialize_db()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_name, check_same_thread=False)
+        """
+        Çağıran thread'e ait kalıcı bağlantıyı döndürür (yoksa pragmalarla açar).
+        `with conn:` blokları yalnızca commit/rollback yapar; bağlantılar `close()` ile kapanır.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        self._local.conn = conn
+        with self._conn_lock:
+            self._prune_dead_connections()
+            self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _prune_dead_connections(self):
+        # Sonlanmış thread'lerden kalan bağlantıları kapat
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    def close(self):
+        """Bu yöneticinin açtığı tüm bağlantıları kapatır."""
+        with self._conn_lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+            # Diğer thread'lerdeki referanslar da geçersiz; yeni threading.local ile sıfırla
+            self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def initialize_db(self):
         with self.get_connection() as conn:
@@ -55,77 +265,316 @@ class FundDBManager:
             ''')
             conn.commit()
 
+            self.apply_migrations(conn)
+
         # Zorunlu: gerçek veri ile çalışılmasını sağla.
-        # Eğer veritabanı boşsa `fund_sources.json` bulunup otomatik çekme denenir.
-        if self.is_db_empty():
-            sources = self.load_fund_sources()
-            if sources:
-                try:
-                    self.auto_populate_from_sources(sources)
-                except Exception as e:
-                    raise RuntimeError(f"Gerçek veri çekilirken hata oluştu: {e}")
-            else:
-                raise RuntimeError(
-                    "Veritabanı boş. Uygulama yalnızca gerçek veri ile çalışacak şekilde yapılandırıldı."
-                    " Lütfen proje köküne 'fund_sources.json' ekleyin veya veritabanını manuel doldurun."
+        # Eğer veritabanı boşsa `fund_sources.json` bulunup arka planda otomatik çekme başlatılır;
+        # yönetici bu sırada mevcut (kısmi) veriyle hemen kullanılabilir.
+        if self.auto_populate and self.is_db_empty():
+            self.start_background_population()
+
+    def start_background_population(self, sources: Optional[dict] = None, days: int = 30) -> bool:
+        """
+        `auto_populate_from_sources` işini arka plan thread'inde başlatır.
+        Zaten çalışan bir iş varsa yenisini başlatmaz ve False döner. Durum için `population_status()`.
+        """
+        with self._population_lock:
+            if self._population['state'] == 'running':
+                return False
+            sources = sources if sources is not None else self.load_fund_sources()
+            if not sources:
+                self._population = dict(
+                    self._population, state='error', finished_at=datetime.now(),
+                    error=("Veritabanı boş. Uygulama yalnızca gerçek veri ile çalışacak şekilde yapılandırıldı."
+                           " Lütfen proje köküne 'fund_sources.json' ekleyin veya veritabanını manuel doldurun."),
                 )
+                return False
+            self._population = {
+                'state': 'running', 'done': 0, 'total': len(sources), 'current': None,
+                'started_at': datetime.now(), 'finished_at': None, 'error': None,
+            }
+
+        def run():
+            try:
+                self.auto_populate_from_sources(sources, days=days, progress=self._on_population_progress)
+                state, error = 'done', None
+            except Exception as e:
+                state, error = 'error', f"Gerçek veri çekilirken hata oluştu: {e}"
+            with self._population_lock:
+                self._population.update(state=state, error=error, current=None, finished_at=datetime.now())
+
+        threading.Thread(target=run, name='db-populate', daemon=True).start()
+        return True
+
+    def _on_population_progress(self, done: int, total: int, fon: str) -> None:
+        with self._population_lock:
+            self._population.update(done=done, total=total, current=fon)
+
+    def population_status(self) -> dict:
+        """
+        Arka plan doldurma işinin durumunu döndürür:
+        {'state': 'idle' | 'running' | 'done' | 'error', 'done', 'total', 'current', 'started_at', 'finished_at', 'error'}
+        """
+        with self._population_lock:
+            return dict(self._population)
+
+    def wait_for_population(self, timeout: Optional[float] = None) -> dict:
+        """Çalışan doldurma işi bitene (veya zaman aşımına) kadar bekler; son durumu döndürür."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.population_status()['state'] == 'running':
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.1)
+        return self.population_status()
+
+    def apply_migrations(self, conn) -> int:
+        """
+        `SCHEMA_MIGRATIONS` içinde henüz uygulanmamış sürümleri sırayla, her biri tek transaction'da uygular.
+        Uygulanan son sürüm `PRAGMA user_version` içinde tutulur. Güncel sürümü döndürür.
+        """
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, statements in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN")
+            try:
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            current = version
+        return current
+
+    @staticmethod
+    def _bump_data_version(conn) -> None:
+        # Yazımla aynı transaction içinde çağrılır
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+    @staticmethod
+    def _bump_history_version(conn) -> int:
+        # Geçmiş tablolarına yazımla aynı transaction içinde çağrılır; yeni sürümü döndürür
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'history_version'")
+        return conn.execute("SELECT value FROM meta WHERE key = 'history_version'").fetchone()[0]
+
+    @staticmethod
+    def _mark_valuation_dirty(conn, since: str) -> None:
+        # `since` ('YYYY-MM-DD') ve sonrası `refresh_valuation` ile yeniden hesaplanacak
+        conn.execute("UPDATE meta SET value = MIN(value, ?) WHERE key = 'valuation_dirty_from'",
+                     (int(since.replace('-', '')),))
+
+    def data_version(self) -> int:
+        """Her veri yazımında artan sayaç; önbellek anahtarlarında sürüm olarak kullanılır."""
+        row = self.get_connection().execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+        return row[0] if row else 0
+
+    def history_version(self) -> int:
+        """Fiyat ve sahiplik geçmişine her yazımda artan sayaç (değerleme yazımları saymaz)."""
+        row = self.get_connection().execute("SELECT value FROM meta WHERE key = 'history_version'").fetchone()
+        return row[0] if row else 0
+
+    def parquet_is_current(self) -> bool:
+        """
+        Parquet deposu SQLite geçmişinin son hâlini yansıtıyor mu? Depoya yazmadan (`parquet_store` olmadan)
+        yapılan her geçmiş yazımı damgayı geride bırakır; bu durumda okuyucular SQLite'a dönmelidir.
+        """
+        return self.parquet_store is not None and self.parquet_store.watermark() == self.history_version()
 
     def is_db_empty(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM portfoy_hareketleri")
-            return cursor.fetchone()[0] == 0
-
-    def seed_mock_data(self):
-        fonlar = ["ATLAS PORTFÖY", "TERA PORTFÖY", "HEDEF PORTFÖY", "MAC PORTFÖY"]
-        hisseler = ["THYAO", "ASELS", "KCHOL", "GARAN", "ASTOR", "TUPRS"]
-        mock_data = []
-        start_date = datetime.now() - timedelta(days=60)
-
-        for i in range(61):
-            current_date = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            for fon in fonlar:
-                selected_stocks = random.sample(hisseler, 3)
-                for stock in selected_stocks:
-                    base_rate = 5.0
-                    variation = random.uniform(-0.5, 1.5)
-                    final_rate = round(base_rate + variation, 2)
-                    kaynak = "KAP (%5+)" if final_rate >= 5.0 else "Aylık Rapor"
-                    mock_data.append((current_date, fon, stock, final_rate, int(final_rate * 20000), kaynak))
+            cursor.execute('''
+                SELECT EXISTS (SELECT 1 FROM portfoy_hareketleri) OR EXISTS (SELECT 1 FROM holding_events)
+            ''')
+            return not cursor.fetchone()[0]
+
+    def seed_mock_data(self, days: int = 60, funds: Optional[List[str]] = None, stocks: Optional[List[str]] = None,
+                       per_fund: int = 3, seed: Optional[int] = None) -> int:
+        """
+        Demo verisi: son `days` günün her günü, her fon için `per_fund` farklı hisse.
+        Varsayılanlar panelin demo verisidir; benchmark'lar aynı üreticiyi milyonlarca satıra ölçekler.
+        Döndürür: yazılan satır sayısı.
+        """
+        mock = mock_holdings(days=days, funds=funds, stocks=stocks, per_fund=per_fund, seed=seed)
+        rows = zip(mock['Tarih'].tolist(), mock['Fon Adı'].tolist(), mock['Hisse'].tolist(),
+                   mock['Pay Oranı (%)'].tolist(), mock['Tahmini Lot'].tolist(), mock['Kaynak'].tolist())
 
         with self.get_connection() as conn:
             conn.cursor().executemany('''
                 INSERT INTO portfoy_hareketleri (tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', mock_data)
+            ''', rows)
+            self._bump_data_version(conn)
+            self._bump_history_version(conn)
+            self._mark_valuation_dirty(conn, mock['Tarih'].iloc[0])
             conn.commit()
+        return len(mock)
 
-    def get_filtered_data(self, selected_funds, days):
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-
-        query = "SELECT * FROM portfoy_hareketleri WHERE date(tarih) >= date(?)"
-        params = [start_date.strftime("%Y-%m-%d")]
+    @staticmethod
+    def build_filtered_query(selected_funds, start_date: str):
+        """
+        `get_filtered_data` sorgusunu (sql, params) olarak üretir.
+        Filtreler indeks kullanabilir (sargable) biçimdedir.
+        """
+        # tarih 'YYYY-MM-DD' metni olarak saklanır; kolonu fonksiyona sarmadan karşılaştırmak indeks kullanımını sağlar
+        query = "SELECT * FROM portfoy_hareketleri WHERE tarih >= ?"
+        params = [start_date]
 
         if selected_funds:
             placeholders = ', '.join(['?'] * len(selected_funds))
             query += f" AND fon_adi IN ({placeholders})"
             params.extend(selected_funds)
+            # '+tarih': planlayıcı sıralama için tarih indeksini yürümek yerine
+            # ix_portfoy_fon_tarih (covering) ile arar ve küçük sonucu sıralar
+            query += " ORDER BY +tarih ASC"
+        else:
+            query += " ORDER BY tarih ASC"
+        return query, params
 
-        query += " ORDER BY tarih ASC"
+    @instr.timed("db.get_filtered_data")
+    def get_filtered_data(self, selected_funds, days, source: str = 'sqlite'):
+        """
+        Son `days` gündeki sahiplik kayıtları (kompakt tipler, bkz. `schema.HOLDINGS_SCHEMA`). `source='parquet'` iken SQLite yerine Parquet deposundan
+        (bellek eşlemeli, filtreler dosyalara itilerek) okunur; bu durumda 'id' kolonu dönmez.
+        Değişim kayıtlarıyla çalışan veritabanında (bkz. `_reads_events`) tam kayıtlar `holding_events`'ten yeniden kurulur.
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
 
-        with self.get_connection() as conn:
-            df = pd.read_sql_query(query, conn, params=params)
+        if source == 'parquet':
+            store = self._require_parquet()
+            df = store.read_holdings(selected_funds or None, start=start_date.date())
+            df = df.sort_values('tarih', kind='stable').reset_index(drop=True)
+        elif self._reads_events():
+            with self.get_connection() as conn:
+                df = self._snapshots_from_events(conn, start_date.strftime("%Y-%m-%d"), funds=selected_funds or None)
+        else:
+            query, params = self.build_filtered_query(selected_funds, start_date.strftime("%Y-%m-%d"))
+            with self.get_connection() as conn:
+                df = pd.read_sql_query(query, conn, params=params)
+        instr.count("db.rows_read", len(df))
 
-        return df.rename(columns={
+        return apply_schema(df.rename(columns={
             "tarih": "Tarih", "fon_adi": "Fon Adı", "hisse_kodu": "Hisse",
             "pay_orani": "Pay Oranı (%)", "tahmini_lot": "Tahmini Lot", "kaynak": "Kaynak"
+        }), HOLDINGS_SCHEMA)
+
+    @instr.timed("db.get_price_history")
+    def get_price_history(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+                          end: Optional[str] = None, source: str = 'sqlite') -> pd.DataFrame:
+        """
+        Analiz kodu için fiyat geçmişi: ['Tarih', 'Ticker', 'Kapanis'], ticker ve tarih sırasıyla.
+        `source='parquet'` Parquet deposunu kullanır.
+        """
+        if source == 'parquet':
+            df = self._require_parquet().read_prices(tickers, start=start, end=end)
+            df = df.sort_values(['ticker', 'tarih'], kind='stable').reset_index(drop=True)
+        else:
+            where, params = [], []
+            if tickers:
+                where.append(f"ticker IN ({', '.join(['?'] * len(tickers))})")
+                params.extend(tickers)
+            if start:
+                where.append("tarih >= ?")
+                params.append(start)
+            if end:
+                where.append("tarih <= ?")
+                params.append(end)
+            clause = f"WHERE {' AND '.join(where)}" if where else ""
+            with self.get_connection() as conn:
+                df = pd.read_sql_query(f"SELECT tarih, ticker, close FROM price_history {clause} ORDER BY ticker, tarih",
+                                       conn, params=params)
+        return apply_schema(df.rename(columns={'tarih': 'Tarih', 'ticker': 'Ticker', 'close': 'Kapanis'}), PRICE_SCHEMA)
+
+    def _parquet_lock(self):
+        """
+        Parquet deposu varsa onun süreçler arası yazma kilidi. Geçmiş yazımı (SQLite + Parquet + damga) bu kilit
+        altında yapılır: sürümler depoya sırayla yansır ve eşzamanlı yazıcılar birbirinin bölümlerini ezmez.
+        """
+        return self.parquet_store.locked() if self.parquet_store is not None else nullcontext()
+
+    def _require_parquet(self):
+        if self.parquet_store is None:
+            raise ValueError("Parquet deposu yapılandırılmamış (FundDBManager(parquet_store=...))")
+        return self.parquet_store
+
+    def export_to_parquet(self, chunk_rows: int = 500_000) -> dict:
+        """
+        Mevcut SQLite fiyat ve sahiplik tablolarını Parquet deposuna aktarır. Değişim kayıtlarıyla çalışan
+        veritabanında sahiplik tam kayıtları `holding_events`'ten yeniden kurularak yazılır.
+        Döndürür: {tablo: satır sayısı}
+        """
+        store = self._require_parquet()
+        counts = {}
+        # Depo kilidi altında: depoyu yansıtan yazıcılar aktarım bitene kadar bekler; kilidi almayan (depoya
+        # yazmayan) yazıcıların aktarım sırasındaki yazımları damgayı geride bırakır
+        with store.locked(), self.get_connection() as conn:
+            version = self.history_version()
+            for name, sql, write in (
+                ('price_history', "SELECT tarih, ticker, close FROM price_history ORDER BY tarih", store.write_prices),
+                ('portfoy_hareketleri', '''SELECT tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak
+                                           FROM portfoy_hareketleri ORDER BY tarih''', store.write_holdings),
+            ):
+                counts[name] = 0
+                if name == 'portfoy_hareketleri' and self._reads_events(conn):
+                    snaps = self._snapshots_from_events(conn)
+                    chunks = (snaps.iloc[i:i + chunk_rows] for i in range(0, len(snaps), chunk_rows))
+                else:
+                    chunks = pd.read_sql_query(sql, conn, chunksize=chunk_rows)
+                for chunk in chunks:
+                    write(chunk)
+                    counts[name] += len(chunk)
+            store.stamp(version)
+        return counts
+
+    @instr.timed("db.get_latest_closes")
+    def get_latest_closes(self, tickers: List[str], fresh_since: Optional[str] = None,
+                          fresh_until: Optional[str] = None) -> pd.DataFrame:
+        """
+        `price_history` tablosundan her ticker için son iki kapanışı okur.
+        `fresh_since` ('YYYY-MM-DD') verilirse son kaydı bu tarihten eski, `fresh_until` verilirse bu tarihten
+        yeni olan (ör. seans içinde yazılmış yarım bar) ticker'lar dönmez.
+        Döndürür: DataFrame ['Ticker', 'Tarih', 'Fiyat', 'Önceki Kapanış']
+        """
+        columns = ['Ticker', 'Tarih', 'Fiyat', 'Önceki Kapanış']
+        if not tickers:
+            return pd.DataFrame(columns=columns)
+
+        placeholders = ', '.join(['?'] * len(tickers))
+        query = f'''
+            SELECT ticker, tarih, close, rn FROM (
+                SELECT ticker, tarih, close,
+                       ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY tarih DESC) AS rn
+                FROM price_history
+                WHERE ticker IN ({placeholders}) AND close IS NOT NULL
+            ) WHERE rn <= 2
+        '''
+        with self.get_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=list(tickers))
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        last = df[df['rn'] == 1].set_index('ticker')
+        prev = df[df['rn'] == 2].set_index('ticker')['close']
+        out = pd.DataFrame({
+            'Ticker': last.index,
+            'Tarih': last['tarih'].values,
+            'Fiyat': last['close'].values,
+            'Önceki Kapanış': prev.reindex(last.index).fillna(last['close']).values,
         })
+        if fresh_since:
+            out = out[out['Tarih'] >= fresh_since]
+        if fresh_until:
+            out = out[out['Tarih'] <= fresh_until]
+        return out.reset_index(drop=True)
 
+    @instr.timed("db.get_all_funds")
     def get_all_funds(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT fon_adi FROM portfoy_hareketleri ORDER BY fon_adi")
+            cursor.execute("SELECT fon_adi FROM portfoy_hareketleri UNION SELECT fon_adi FROM holding_events ORDER BY fon_adi")
             return [row[0] for row in cursor.fetchall()]
 
     def load_fund_sources(self, path: str = 'fund_sources.json') -> dict:
@@ -144,29 +593,42 @@ class FundDBManager:
             with open(path, 'r', encoding='utf-8') as f:
                 return json.load(f)
 
-    def auto_populate_from_sources(self, sources: dict, days: int = 30) -> None:
+    def auto_populate_from_sources(self, sources: dict, days: int = 30, refresh: bool = False,
+                                   progress: Optional[Callable[[int, int, str], None]] = None) -> None:
             """
             sources dict'inden çekim yapar ve veritabanını doldurur.
+            `refresh=True` HTTP önbelleğini atlayıp sayfaları yeniden indirir.
+            `progress(tamamlanan, toplam, fon)` her fon bittiğinde çağrılır.
             """
-            for fon, cfg in sources.items():
+            total = len(sources)
+            for i, (fon, cfg) in enumerate(sources.items()):
                 fintables_url = cfg.get('fintables_url')
                 tickers = cfg.get('tickers', [])
 
                 if fintables_url:
                     try:
-                        self.fetch_and_store_fintables(fintables_url, fon_adi=fon, kaynak='Fintables')
+                        self.fetch_and_store_fintables(fintables_url, fon_adi=fon, kaynak='Fintables', refresh=refresh)
                     except Exception as e:
-                        print(f"Fintables çekim hatası ({fon}): {e}")
+                        logger.warning("Fintables çekim hatası (%s): %s", fon, e)
 
                 if tickers:
                     try:
-                        self.fetch_and_store_prices(tickers, days=days, kaynak='yfinance')
+                        self.fetch_and_store_prices(tickers, days=days, kaynak='yfinance', incremental=True)
                     except Exception as e:
-                        print(f"Fiyat çekim hatası ({fon} -> {tickers}): {e}")
+                        logger.warning("Fiyat çekim hatası (%s -> %s): %s", fon, tickers, e)
+
+                if progress:
+                    progress(i + 1, total, fon)
+
+            try:
+                self.refresh_valuation()
+            except Exception as e:
+                logger.warning("Portföy değerlemesi güncellenemedi: %s", e)
 
     # -----------------
     # Upsert / Import helpers
     # -----------------
+    @instr.timed("db.upsert_holdings_df")
     def upsert_holdings_df(self, df: pd.DataFrame, kaynak: str = "External") -> None:
         """
         Beklenen kolonlar: 'Tarih', 'Fon Adı', 'Hisse', 'Pay Oranı (%)', optional 'Tahmini Lot'
@@ -177,30 +639,436 @@ class FundDBManager:
             if c not in df.columns:
                 raise ValueError(f"Eksik kolon: {c}")
 
-        rows = []
-        for _, r in df.iterrows():
-            tarih = pd.to_datetime(r['Tarih']).strftime('%Y-%m-%d')
-            fon = str(r['Fon Adı'])
-            hisse = str(r['Hisse'])
-            pay = float(r.get('Pay Oranı (%)', 0) or 0)
-            lot = int(r.get('Tahmini Lot', 0) or 0)
-            rows.append((tarih, fon, hisse, pay, lot, kaynak))
+        # Kolon bazında (vektörel) dönüştür, satır satır pandas çağrısı yapma
+        n = len(df)
+        tarih = _iso_dates(df['Tarih'])
+        fon = df['Fon Adı'].astype(str).tolist()
+        hisse = df['Hisse'].astype(str).tolist()
+        pay = pd.to_numeric(df['Pay Oranı (%)']).astype('float64').tolist()
+        if 'Tahmini Lot' in df.columns:
+            lot = pd.to_numeric(df['Tahmini Lot']).fillna(0).astype('int64').tolist()
+        else:
+            lot = [0] * n
+        rows = zip(tarih, fon, hisse, pay, lot, [kaynak] * n)
+
+        # Tek transaction içinde toplu yazım; Parquet yansıtması ve damga aynı depo kilidi altında
+        with self._parquet_lock():
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                cur.executemany('''
+                    INSERT OR REPLACE INTO portfoy_hareketleri (tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                self._bump_data_version(conn)
+                version = self._bump_history_version(conn)
+                if tarih:
+                    self._mark_valuation_dirty(conn, min(tarih))
+                conn.commit()
+
+            if self.parquet_store is not None:
+                self.parquet_store.write_holdings(pd.DataFrame({
+                    'tarih': tarih, 'fon_adi': fon, 'hisse_kodu': hisse, 'pay_orani': pay, 'tahmini_lot': lot,
+                    'kaynak': kaynak,
+                }))
+                self.parquet_store.stamp(version)
+
+    def store_holdings(self, df: pd.DataFrame, kaynak: str = "External", scope: str = 'fund') -> None:
+        """Taramayı `holdings_mode`'a göre tam kayıt ve/veya değişim olarak yazar."""
+        if self.holdings_mode in ('snapshot', 'both'):
+            self.upsert_holdings_df(df, kaynak=kaynak)
+        if self.holdings_mode in ('delta', 'both'):
+            # 'both' modunda tarama tam kayıt olarak zaten yazıldı (ve Parquet'e yansıtıldı)
+            self.ingest_holdings_delta(df, kaynak=kaynak, scope=scope, mirrored=self.holdings_mode == 'both')
+
+    @instr.timed("db.ingest_holdings_delta")
+    def ingest_holdings_delta(self, df: pd.DataFrame, kaynak: str = "External", scope: str = 'fund',
+                              threshold: float = DEFAULT_DELTA_THRESHOLD, mirrored: bool = False) -> dict:
+        """
+        Taramayı (fon, hisse) başına son kaydedilen durumla karşılaştırır; yalnızca girişleri, çıkışları ve
+        `threshold` yüzde puanından büyük pay değişimlerini `holding_events`'e yazar.
+        `scope` taramanın neyi eksiksiz kapsadığını belirtir: 'fund' (fon sayfası; fonun listede olmayan
+        hisseleri çıkış sayılır) veya 'stock' (şirket sayfası; hissenin listede olmayan fonları çıkış sayılır).
+        Tarihler sırayla işlenir; kayıtlı durumdan eski tarihli anlık görüntüler atlanır.
+        `mirrored=True`: aynı tarama tam kayıt olarak da yazıldı; geçmiş sürümü (Parquet damgası) değişmez.
+        Döndürür: {'giris': n, 'cikis': n, 'degisim': n, 'atlanan': n}
+        """
+        for c in ['Tarih', 'Fon Adı', 'Hisse', 'Pay Oranı (%)']:
+            if c not in df.columns:
+                raise ValueError(f"Eksik kolon: {c}")
+        if scope not in ('fund', 'stock'):
+            raise ValueError(f"Geçersiz scope: {scope}")
+
+        frame = pd.DataFrame({
+            'tarih': _iso_dates(df['Tarih']),
+            'fon_adi': df['Fon Adı'].astype(str).tolist(),
+            'hisse_kodu': df['Hisse'].astype(str).tolist(),
+            'pay_orani': pd.to_numeric(df['Pay Oranı (%)']).fillna(0).astype('float64').tolist(),
+            'tahmini_lot': (pd.to_numeric(df['Tahmini Lot']).fillna(0).astype('int64').tolist()
+                            if 'Tahmini Lot' in df.columns else 0),
+            # Satır bazında 'Kaynak' kolonu varsa `kaynak` parametresinin yerine geçer
+            'kaynak': df['Kaynak'].tolist() if 'Kaynak' in df.columns else kaynak,
+        }).drop_duplicates(['tarih', 'fon_adi', 'hisse_kodu'], keep='last')
+        key_col = 'fon_adi' if scope == 'fund' else 'hisse_kodu'
+        counts = {'giris': 0, 'cikis': 0, 'degisim': 0, 'atlanan': 0}
+        first_event = None
 
         with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.executemany('''
-                INSERT OR REPLACE INTO portfoy_hareketleri (tarih, fon_adi, hisse_kodu, pay_orani, tahmini_lot, kaynak)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', rows)
+            for tarih, snap in frame.groupby('tarih', sort=True):
+                keys = snap[key_col].unique().tolist()
+                placeholders = ', '.join(['?'] * len(keys))
+                state = pd.read_sql_query(f'''
+                    SELECT fon_adi, hisse_kodu, tarih AS son_tarih, pay_orani AS onceki_pay, tahmini_lot AS onceki_lot
+                    FROM holding_state WHERE {key_col} IN ({placeholders})
+                ''', conn, params=keys)
+
+                # Durumdan eski tarihli görüntüler geçmişi yeniden yazmasın diye atlanır
+                stale = set(state.loc[state['son_tarih'] > tarih, key_col])
+                if stale:
+                    counts['atlanan'] += int(snap[key_col].isin(stale).sum())
+                    snap = snap[~snap[key_col].isin(stale)]
+                    state = state[~state[key_col].isin(stale)]
+
+                m = snap.merge(state, on=['fon_adi', 'hisse_kodu'], how='outer', indicator=True)
+                entered = (m['_merge'] == 'left_only').to_numpy()
+                exited = (m['_merge'] == 'right_only').to_numpy()
+                changed = ((m['_merge'] == 'both') & ((m['pay_orani'] - m['onceki_pay']).abs() >= threshold - 1e-9)).to_numpy()
+
+                m['olay'] = None
+                m.loc[entered, 'olay'] = 'giris'
+                m.loc[exited, 'olay'] = 'cikis'
+                m.loc[changed, 'olay'] = 'degisim'
+                m.loc[exited, ['pay_orani', 'tahmini_lot']] = 0
+                # Çıkışın kaynağı: pozisyonu artık listelemeyen taramanın kaynağı
+                scan_source = snap.drop_duplicates(key_col).set_index(key_col)['kaynak']
+                m.loc[exited, 'kaynak'] = m.loc[exited, key_col].map(scan_source)
+                events = m[m['olay'].notna()]
+                for olay in ('giris', 'cikis', 'degisim'):
+                    counts[olay] += int((events['olay'] == olay).sum())
+
+                if not events.empty:
+                    onceki = events['onceki_pay'].astype(object).where(events['onceki_pay'].notna(), None).tolist()
+                    # Aynı gün tekrar taranırsa olayın ilk türü ve önceki payı korunur
+                    conn.executemany('''
+                        INSERT INTO holding_events (tarih, fon_adi, hisse_kodu, olay, pay_orani, onceki_pay, tahmini_lot, kaynak)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (fon_adi, hisse_kodu, tarih) DO UPDATE SET
+                            olay = CASE WHEN holding_events.olay = 'giris' AND excluded.olay = 'degisim'
+                                        THEN 'giris' ELSE excluded.olay END,
+                            pay_orani = excluded.pay_orani,
+                            tahmini_lot = excluded.tahmini_lot,
+                            kaynak = excluded.kaynak
+                    ''', zip([tarih] * len(events), events['fon_adi'].tolist(), events['hisse_kodu'].tolist(),
+                             events['olay'].tolist(), events['pay_orani'].astype('float64').tolist(), onceki,
+                             events['tahmini_lot'].astype('int64').tolist(), events['kaynak'].tolist()))
+
+                # Durum: görülen her satırın tarihi ilerler, pay/lot yalnızca olay kaydedildiyse güncellenir
+                seen = m[~exited]
+                recorded = (entered | changed)[~exited]
+                pay = seen['pay_orani'].where(recorded, seen['onceki_pay'])
+                lot = seen['tahmini_lot'].where(recorded, seen['onceki_lot'])
+                conn.executemany('''
+                    INSERT OR REPLACE INTO holding_state (fon_adi, hisse_kodu, tarih, pay_orani, tahmini_lot)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', zip(seen['fon_adi'].tolist(), seen['hisse_kodu'].tolist(), [tarih] * len(seen),
+                         pay.astype('float64').tolist(), lot.astype('int64').tolist()))
+                conn.executemany("DELETE FROM holding_state WHERE fon_adi = ? AND hisse_kodu = ?",
+                                 zip(m.loc[exited, 'fon_adi'].tolist(), m.loc[exited, 'hisse_kodu'].tolist()))
+                if not events.empty and first_event is None:
+                    first_event = tarih
+
+            if first_event is not None:
+                self._bump_data_version(conn)
+                # Olaylar Parquet'e yazılmaz; tam kaydı yansıtılmamış bir taramadan sonra depo güncel sayılmaz
+                if not mirrored:
+                    self._bump_history_version(conn)
+                self._mark_valuation_dirty(conn, first_event)
             conn.commit()
+        return counts
+
+    def rebuild_holding_events(self, threshold: float = DEFAULT_DELTA_THRESHOLD, batch_days: int = 30) -> dict:
+        """
+        `holding_events` ve `holding_state`'i `portfoy_hareketleri`'ndeki tam kayıtlardan (fon kapsamıyla)
+        baştan üretir. Mevcut bir veritabanını değişim moduna geçirmek için kullanılır.
+        """
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM holding_events")
+            conn.execute("DELETE FROM holding_state")
+            self._bump_history_version(conn)
+            conn.commit()
+            dates = [r[0] for r in conn.execute("SELECT DISTINCT tarih FROM portfoy_hareketleri ORDER BY tarih")]
+
+        totals = {'giris': 0, 'cikis': 0, 'degisim': 0, 'atlanan': 0}
+        for i in range(0, len(dates), batch_days):
+            batch = dates[i:i + batch_days]
+            df = self._read_snapshots(batch[0], batch[-1])
+            for k, v in self.ingest_holdings_delta(df, scope='fund', threshold=threshold).items():
+                totals[k] += v
+        return totals
+
+    def _read_snapshots(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """`portfoy_hareketleri`'nden [start_date, end_date] aralığındaki tam kayıtlar."""
+        with self.get_connection() as conn:
+            df = pd.read_sql_query(
+                "SELECT * FROM portfoy_hareketleri WHERE tarih BETWEEN ? AND ? ORDER BY tarih",
+                conn, params=[start_date, end_date])
+        return df.rename(columns={
+            "tarih": "Tarih", "fon_adi": "Fon Adı", "hisse_kodu": "Hisse",
+            "pay_orani": "Pay Oranı (%)", "tahmini_lot": "Tahmini Lot", "kaynak": "Kaynak"
+        })
+
+    @instr.timed("db.get_holdings_as_of")
+    def get_holdings_as_of(self, as_of: str, selected_funds: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        `holding_events`'ten verilen tarihteki ('YYYY-MM-DD', dahil) pozisyonları yeniden kurar:
+        her (fon, hisse) için o tarihe kadarki son olay alınır, çıkışla bitenler dışarıda kalır.
+        Döndürür: ['Tarih' (son değişim), 'Fon Adı', 'Hisse', 'Pay Oranı (%)', 'Tahmini Lot', 'Kaynak']
+        """
+        fund_filter, params = "", [as_of]
+        if selected_funds:
+            fund_filter = f" AND fon_adi IN ({', '.join(['?'] * len(selected_funds))})"
+            params.extend(selected_funds)
+        query = f'''
+            SELECT e.tarih, e.fon_adi, e.hisse_kodu, e.pay_orani, e.tahmini_lot, e.kaynak
+            FROM holding_events e
+            JOIN (
+                SELECT fon_adi, hisse_kodu, MAX(tarih) AS tarih
+                FROM holding_events
+                WHERE tarih <= ?{fund_filter}
+                GROUP BY fon_adi, hisse_kodu
+            ) son USING (fon_adi, hisse_kodu, tarih)
+            WHERE e.olay != 'cikis'
+            ORDER BY e.fon_adi, e.pay_orani DESC
+        '''
+        with self.get_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        return df.rename(columns=EVENT_COLUMNS)
+
+    def _reads_events(self, conn=None) -> bool:
+        """
+        Sahiplik okumaları `holding_events`'ten mi kurulmalı? 'delta' modunda her zaman; varsayılan 'snapshot'
+        modunda ise tam kayıt hiç yokken değişim kaydı varsa (ör. panel, 'delta' ile yazılan bir veritabanını
+        okurken). 'both' modunda tam kayıtlar kullanılır.
+        """
+        if self.holdings_mode != 'snapshot':
+            return self.holdings_mode == 'delta'
+        conn = conn or self.get_connection()
+        return bool(conn.execute('''
+            SELECT NOT EXISTS (SELECT 1 FROM portfoy_hareketleri) AND EXISTS (SELECT 1 FROM holding_events)
+        ''').fetchone()[0])
+
+    def _snapshots_from_events(self, conn, start: Optional[str] = None, end: Optional[str] = None,
+                               funds: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        `holding_events`'ten tam kayıt geçmişi kurar: ['tarih', 'fon_adi', 'hisse_kodu', 'pay_orani',
+        'tahmini_lot', 'kaynak'], `portfoy_hareketleri` ile aynı kolonlar.
+        Her fon için [start, end] içindeki olay günlerinde ve son tarama gününde (`holding_state`) fonun o gün
+        geçerli tüm pozisyonları yazılır; `start`'tan önce açılmış pozisyonlar `start` tarihli bir kayıtla başlar.
+        Değişmeyen günlerin taramaları kaydedilmediğinden bu günler geçmişte yer almaz.
+        """
+        columns = ['tarih', 'fon_adi', 'hisse_kodu', 'pay_orani', 'tahmini_lot', 'kaynak']
+        where, params = [], []
+        if end is not None:
+            where.append("tarih <= ?")
+            params.append(end)
+        if funds:
+            where.append(f"fon_adi IN ({', '.join(['?'] * len(funds))})")
+            params.extend(funds)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        ev = pd.read_sql_query(f'''
+            SELECT tarih AS olay_tarihi, fon_adi, hisse_kodu, olay, pay_orani, tahmini_lot, kaynak
+            FROM holding_events {clause}
+        ''', conn, params=params)
+        if ev.empty:
+            return pd.DataFrame(columns=columns)
+
+        # Fon başına kayıt günleri: aralıktaki olay günleri, son tarama günü ve (önceden pozisyon varsa) start
+        last_scan = pd.read_sql_query("SELECT fon_adi, MAX(tarih) AS tarih FROM holding_state GROUP BY fon_adi", conn)
+        last_scan = last_scan[last_scan['fon_adi'].isin(ev['fon_adi'].unique())]
+        days = [ev[['fon_adi', 'olay_tarihi']].rename(columns={'olay_tarihi': 'tarih'}), last_scan]
+        if start is not None:
+            days.append(ev.loc[ev['olay_tarihi'] < start, ['fon_adi']].assign(tarih=start))
+        days = pd.concat(days, ignore_index=True).drop_duplicates()
+        if start is not None:
+            days = days[days['tarih'] >= start]
+        if end is not None:
+            days = days[days['tarih'] <= end]
+        days['t'] = pd.to_datetime(days['tarih'])
 
-    def fetch_and_store_fintables(self, url: str, fon_adi: Optional[str] = None, kaynak: str = 'Fintables') -> pd.DataFrame:
+        ev['s'] = pd.to_datetime(ev['olay_tarihi'])
+        pairs = ev[['fon_adi', 'hisse_kodu']].drop_duplicates().merge(days, on='fon_adi')
+        snaps = pd.merge_asof(pairs.sort_values('t'), ev.sort_values('s'), left_on='t', right_on='s',
+                              by=['fon_adi', 'hisse_kodu'], direction='backward')
+        snaps = snaps[snaps['olay'].notna() & (snaps['olay'] != 'cikis')]
+        snaps = snaps.sort_values(['tarih', 'fon_adi', 'pay_orani'], ascending=[True, True, False], kind='stable')
+        snaps['tahmini_lot'] = snaps['tahmini_lot'].fillna(0).astype('int64')
+        return snaps[columns].reset_index(drop=True)
+
+    def get_changes_since(self, since: str, selected_funds: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        `since` tarihinden ('YYYY-MM-DD', hariç) sonraki giriş/çıkış/değişim olayları, tarih sırasıyla.
+        Döndürür: ['Tarih', 'Fon Adı', 'Hisse', 'Olay', 'Pay Oranı (%)', 'Önceki Pay (%)', 'Tahmini Lot', 'Kaynak']
+        """
+        query = '''
+            SELECT tarih, fon_adi, hisse_kodu, olay, pay_orani, onceki_pay, tahmini_lot, kaynak
+            FROM holding_events WHERE tarih > ?
+        '''
+        params = [since]
+        if selected_funds:
+            query += f" AND fon_adi IN ({', '.join(['?'] * len(selected_funds))})"
+            params.extend(selected_funds)
+        query += " ORDER BY tarih, fon_adi, hisse_kodu"
+        with self.get_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        return df.rename(columns=EVENT_COLUMNS)
+
+    # -----------------
+    # Portföy değerlemesi
+    # -----------------
+    @instr.timed("db.refresh_valuation")
+    def refresh_valuation(self, full: bool = False) -> int:
+        """
+        `portfolio_valuation` tablosunu, son yazımlardan etkilenen en erken tarihten itibaren yeniden hesaplar
+        (`full=True` tamamını). Güncelse hiçbir şey yapmaz. Yazılan satır sayısını döndürür.
+        """
+        conn = self.get_connection()
+        # Hesaplama sırasında yeni yazım gelip işaret kaybolmasın diye yazma kilidi baştan alınır
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            dirty = 0 if full else conn.execute(
+                "SELECT value FROM meta WHERE key = 'valuation_dirty_from'").fetchone()[0]
+            if dirty >= VALUATION_CLEAN:
+                conn.execute("ROLLBACK")
+                return 0
+            start = '0000-01-01' if dirty == 0 else f"{dirty // 10000:04d}-{dirty // 100 % 100:02d}-{dirty % 100:02d}"
+
+            frame = self._compute_valuation(conn, start)
+            conn.execute("DELETE FROM portfolio_valuation WHERE tarih >= ?", (start,))
+            conn.executemany('''
+                INSERT INTO portfolio_valuation (fon_adi, tarih, hisse_kodu, tahmini_lot, kapanis, deger, gunluk_kz, agirlik)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', zip(frame['fon_adi'].tolist(), frame['tarih'].tolist(), frame['hisse_kodu'].tolist(),
+                     frame['tahmini_lot'].tolist(), frame['kapanis'].tolist(), frame['deger'].tolist(),
+                     frame['gunluk_kz'].astype(object).where(frame['gunluk_kz'].notna(), None).tolist(),
+                     frame['agirlik'].tolist()))
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'valuation_dirty_from'", (VALUATION_CLEAN,))
+            self._bump_data_version(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(frame)
+
+    def _compute_valuation(self, conn, start: str) -> pd.DataFrame:
+        """`start` ve sonrasındaki her fiyat günü için fon × hisse değerlemesi (vektörel)."""
+        columns = ['fon_adi', 'tarih', 'hisse_kodu', 'tahmini_lot', 'kapanis', 'deger', 'gunluk_kz', 'agirlik']
+        lookback = '0000-01-01' if start == '0000-01-01' else (
+            datetime.strptime(start, '%Y-%m-%d') - timedelta(days=VALUATION_PRICE_LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+        prices = pd.read_sql_query('''
+            SELECT tarih, ticker, close AS kapanis FROM price_history
+            WHERE tarih >= ? AND close IS NOT NULL AND ticker LIKE '%.IS'
+            ORDER BY ticker, tarih
+        ''', conn, params=[lookback])
+        prices['onceki'] = prices.groupby('ticker')['kapanis'].shift()
+        prices = prices[prices['tarih'] >= start]
+        if prices.empty:
+            return pd.DataFrame(columns=columns)
+        prices['kod'] = prices['ticker'].str[:-3]
+
+        dates = sorted(prices['tarih'].unique())
+        positions = self._positions_for_dates(conn, dates)
+        if positions.empty:
+            return pd.DataFrame(columns=columns)
+        # Sahiplik tablosunda kod '.IS' ile veya onsuz gelebilir
+        positions['kod'] = positions['hisse_kodu'].str.replace(r'\.IS$', '', regex=True)
+
+        v = positions.merge(prices[['tarih', 'kod', 'kapanis', 'onceki']], on=['tarih', 'kod'])
+        lot = v['tahmini_lot'].astype('float64')
+        v['deger'] = lot * v['kapanis']
+        v['gunluk_kz'] = lot * (v['kapanis'] - v['onceki'])
+        total = v.groupby(['tarih', 'fon_adi'])['deger'].transform('sum')
+        v['agirlik'] = (v['deger'] / total.where(total > 0)).fillna(0.0)
+        v['tahmini_lot'] = v['tahmini_lot'].astype('int64')
+        return v[columns]
+
+    def _positions_for_dates(self, conn, dates: List[str]) -> pd.DataFrame:
+        """
+        Her değerleme günü için geçerli pozisyonlar: ['tarih', 'fon_adi', 'hisse_kodu', 'tahmini_lot'].
+        Tam kayıtlarda fonun o güne kadarki son taraması, değişim kayıtlarında (fon, hisse) başına son olay kullanılır.
+        """
+        start, end = dates[0], dates[-1]
+        grid = pd.DataFrame({'tarih': dates})
+        grid['t'] = pd.to_datetime(grid['tarih'])
+
+        if self._reads_events(conn):
+            ev = pd.read_sql_query('''
+                SELECT tarih AS olay_tarihi, fon_adi, hisse_kodu, olay, tahmini_lot
+                FROM holding_events WHERE tarih <= ?
+            ''', conn, params=[end])
+            if ev.empty:
+                return pd.DataFrame(columns=['tarih', 'fon_adi', 'hisse_kodu', 'tahmini_lot'])
+            ev['s'] = pd.to_datetime(ev['olay_tarihi'])
+            pairs = ev[['fon_adi', 'hisse_kodu']].drop_duplicates().merge(grid, how='cross')
+            pos = pd.merge_asof(pairs.sort_values('t'), ev.sort_values('s'), left_on='t', right_on='s',
+                                by=['fon_adi', 'hisse_kodu'], direction='backward')
+            pos = pos[pos['olay'].notna() & (pos['olay'] != 'cikis')]
+            return pos[['tarih', 'fon_adi', 'hisse_kodu', 'tahmini_lot']]
+
+        # Başlangıçta geçerli olan tarama her fon için farklı bir güne denk gelebilir
+        asof = dict(conn.execute(
+            "SELECT fon_adi, MAX(tarih) FROM portfoy_hareketleri WHERE tarih <= ? GROUP BY fon_adi", (start,)).fetchall())
+        lower = min(asof.values()) if asof else start
+        snaps = pd.read_sql_query('''
+            SELECT tarih AS tarama, fon_adi, hisse_kodu, tahmini_lot FROM portfoy_hareketleri
+            WHERE tarih >= ? AND tarih <= ?
+        ''', conn, params=[lower, end])
+        if snaps.empty:
+            return pd.DataFrame(columns=['tarih', 'fon_adi', 'hisse_kodu', 'tahmini_lot'])
+        scans = snaps[['fon_adi', 'tarama']].drop_duplicates()
+        scans['s'] = pd.to_datetime(scans['tarama'])
+        funds = scans[['fon_adi']].drop_duplicates().merge(grid, how='cross')
+        pos = pd.merge_asof(funds.sort_values('t'), scans.sort_values('s'), left_on='t', right_on='s',
+                            by='fon_adi', direction='backward')
+        pos = pos[pos['tarama'].notna()].merge(snaps, on=['fon_adi', 'tarama'])
+        return pos[['tarih', 'fon_adi', 'hisse_kodu', 'tahmini_lot']]
+
+    @instr.timed("db.get_portfolio_valuation")
+    def get_portfolio_valuation(self, selected_funds: Optional[List[str]] = None, days: Optional[int] = None,
+                                by_stock: bool = False) -> pd.DataFrame:
+        """
+        Önceden hesaplanmış değerleme serisi. `by_stock=False` fon bazında günlük toplam değer ve K/Z döndürür:
+        ['Tarih', 'Fon Adı', 'Tahmini Değer (TL)', 'Günlük K/Z (TL)']; `by_stock=True` hisse kırılımını döndürür.
+        """
+        where, params = [], []
+        if days is not None:
+            where.append("tarih >= ?")
+            params.append((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"))
+        if selected_funds:
+            where.append(f"fon_adi IN ({', '.join(['?'] * len(selected_funds))})")
+            params.extend(selected_funds)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        if by_stock:
+            query = f'''
+                SELECT tarih, fon_adi, hisse_kodu, tahmini_lot, kapanis, deger, gunluk_kz, agirlik
+                FROM portfolio_valuation {clause} ORDER BY fon_adi, tarih, deger DESC
+            '''
+        else:
+            query = f'''
+                SELECT tarih, fon_adi, SUM(deger) AS deger, SUM(gunluk_kz) AS gunluk_kz
+                FROM portfolio_valuation {clause} GROUP BY fon_adi, tarih ORDER BY fon_adi, tarih
+            '''
+        with self.get_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        return df.rename(columns=VALUATION_COLUMNS)
+
+    def fetch_and_store_fintables(self, url: str, fon_adi: Optional[str] = None, kaynak: str = 'Fintables', refresh: bool = False) -> pd.DataFrame:
         """
         Fintables sayfasını parse edip veriyi veritabanına yazar.
         `fon_adi` verilirse tabloya bu fon adı atanır; verilmezse tabloda 'Fon Adı' kolonu aranır.
         Döndürür: Normalleştirilmiş DataFrame.
         """
-        df = parse_fintables_holdings(url)
+        from data_fetcher import parse_fintables_holdings
+
+        df = parse_fintables_holdings(url, refresh=refresh)
 
         # Normalize sütun adları -> hedef isimler
         # Eğer zaten var ise bırak
@@ -215,6 +1083,8 @@ class FundDBManager:
                 cols[c] = 'Tarih'
             if 'fon' in lc:
                 cols[c] = 'Fon Adı'
+            if 'lot' in lc or 'adet' in lc:
+                cols[c] = 'Tahmini Lot'
 
         df = df.rename(columns=cols)
 
@@ -240,33 +1110,144 @@ class FundDBManager:
         # Sıralı ve gerekli sütunları koru
         df = df[['Tarih', 'Fon Adı', 'Hisse', 'Pay Oranı (%)', 'Tahmini Lot']]
 
-        # Upsert
-        self.upsert_holdings_df(df, kaynak=kaynak)
+        self.store_holdings(df, kaynak=kaynak)
         return df
 
-    def fetch_and_store_prices(self, tickers: List[str], days: int = 30, kaynak: str = 'yfinance') -> pd.DataFrame:
+    def fetch_and_store_prices(self, tickers: List[str], days: int = 30, kaynak: str = 'yfinance',
+                               incremental: bool = False) -> pd.DataFrame:
         """
         yfinance ile fiyat geçmişini alır, `price_history` tablosuna upsert eder ve DataFrame döndürür.
+        `incremental=True` iken yalnızca son kayıtlı günden (dahil) sonrası indirilir (bkz. `sync_prices`).
         """
+        if incremental:
+            return self.sync_prices(tickers, days=days)
+
+        from data_fetcher import get_price_history_yfinance
+
         df = get_price_history_yfinance(tickers, days=days)
+        self._store_prices_df(df, replace=True)
+        return df
 
+    @instr.timed("db.store_prices_df")
+    def _store_prices_df(self, df: pd.DataFrame, replace: bool = True) -> int:
+        """
+        'Tarih', 'Ticker', 'Kapanis' kolonlu DataFrame'i `price_history` tablosuna yazar.
+        `replace=False` iken mevcut (tarih, ticker) satırlarına dokunulmaz. Yazılan satır sayısını döndürür.
+        """
         # Beklenen kolonlar: 'Tarih', 'Ticker', 'Kapanis'
         if 'Tarih' not in df.columns or 'Ticker' not in df.columns:
             raise ValueError('get_price_history_yfinance beklenen formatta döndürmedi')
 
-        rows = []
-        for _, r in df.iterrows():
-            tarih = pd.to_datetime(r['Tarih']).strftime('%Y-%m-%d')
-            ticker = str(r['Ticker'])
-            close = float(r.get('Kapanis', r.get('Close', 0) or 0))
-            rows.append((tarih, ticker, close))
+        close_col = 'Kapanis' if 'Kapanis' in df.columns else 'Close'
+        closes = pd.to_numeric(df[close_col]).astype('float64') if close_col in df.columns else pd.Series(0.0, index=df.index)
+        dates = _iso_dates(df['Tarih'])
+        tickers = df['Ticker'].astype(str).tolist()
+        rows = zip(dates, tickers, closes.tolist())
+
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        with self._parquet_lock():
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                cur.executemany(f'''
+                    {verb} INTO price_history (tarih, ticker, close)
+                    VALUES (?, ?, ?)
+                ''', rows)
+                written = cur.rowcount
+                if written:
+                    self._bump_data_version(conn)
+                    version = self._bump_history_version(conn)
+                    self._mark_valuation_dirty(conn, min(dates))
+                conn.commit()
+
+            if written and self.parquet_store is not None:
+                self.parquet_store.write_prices(
+                    pd.DataFrame({'tarih': dates, 'ticker': tickers, 'close': closes.tolist()}), replace=replace)
+                self.parquet_store.stamp(version)
+        return written
 
+    def get_price_date_bounds(self, tickers: List[str]) -> dict:
+        """
+        Her ticker için `price_history` içindeki ilk ve son tarihi döndürür.
+        Döndürür: {ticker: (ilk_tarih, son_tarih)}; hiç kaydı olmayan ticker'lar için (None, None).
+        """
+        bounds = {t: (None, None) for t in tickers}
+        if not tickers:
+            return bounds
+        placeholders = ', '.join(['?'] * len(tickers))
         with self.get_connection() as conn:
             cur = conn.cursor()
-            cur.executemany('''
-                INSERT OR REPLACE INTO price_history (tarih, ticker, close)
-                VALUES (?, ?, ?)
-            ''', rows)
-            conn.commit()
+            cur.execute(f"SELECT ticker, MIN(tarih), MAX(tarih) FROM price_history WHERE ticker IN ({placeholders}) GROUP BY ticker", list(tickers))
+            for ticker, first, last in cur.fetchall():
+                bounds[ticker] = (first, last)
+        return bounds
+
+    def _download_ranges(self, plan: dict, chunk_days: int, replace: bool = False) -> pd.DataFrame:
+        """
+        plan: {(başlangıç, bitiş): [ticker, ...]} — aynı aralığa ihtiyaç duyan ticker'lar tek istekte indirilir,
+        uzun aralıklar `chunk_days` günlük parçalara bölünür. `replace=False` iken yeni satırlar eklenir,
+        mevcutlar korunur; `replace=True` iken aralıktaki mevcut satırların üzerine yazılır.
+        """
+        from data_fetcher import get_price_history_yfinance
+
+        frames = []
+        for (start, end), group in sorted(plan.items()):
+            chunk_start = start
+            while chunk_start <= end:
+                chunk_end = min(end, chunk_start + timedelta(days=chunk_days - 1))
+                df = get_price_history_yfinance(group, start=chunk_start, end=chunk_end)
+                if not df.empty:
+                    self._store_prices_df(df, replace=replace)
+                    frames.append(df)
+                chunk_start = chunk_end + timedelta(days=1)
+        if not frames:
+            return pd.DataFrame(columns=['Tarih', 'Ticker', 'Kapanis'])
+        return pd.concat(frames, ignore_index=True)
 
-        return df
\ No newline at end of file
+    def sync_prices(self, tickers: List[str], days: int = 30, chunk_days: int = 365) -> pd.DataFrame:
+        """
+        Artımlı fiyat senkronizasyonu: her ticker için son kayıtlı tarihten (dahil) bugüne kadar olan aralığı indirir.
+        Son kayıtlı gün yeniden indirilip üzerine yazılır; böylece seans içinde kaydedilmiş yarım bir günlük
+        bar, sonraki senkronizasyonda kesin kapanışla düzeltilir. Hiç kaydı olmayan ticker'lar için son `days`
+        gün alınır. Aynı aralığa sahip ticker'lar tek `yf.download` çağrısını paylaşır. Döndürür: indirilen satırlar.
+        """
+        return self._download_ranges(self.plan_price_sync(tickers, days=days), chunk_days, replace=True)
+
+    def plan_price_sync(self, tickers: List[str], days: int = 30) -> dict:
+        """
+        `sync_prices`'ın indireceği aralıklar: {(başlangıç, bitiş): [ticker, ...]}. İş kuyruğu bu planı
+        (ticker grubu, tarih aralığı) işlerine bölmek için kullanır.
+        """
+        today = datetime.now().date()
+        default_start = today - timedelta(days=days)
+        plan = {}
+        for ticker, (_, last) in self.get_price_date_bounds(list(tickers)).items():
+            # Son kayıtlı gün dahil: o günün satırı seans içi (yarım) bir bar olabilir
+            start = datetime.strptime(last, '%Y-%m-%d').date() if last else default_start
+            if start <= today:
+                plan.setdefault((start, today), []).append(ticker)
+        return plan
+
+    def download_price_range(self, tickers: List[str], start, end, chunk_days: int = 365) -> pd.DataFrame:
+        """
+        `tickers` için [start, end] aralığını indirip yazar; aralıktaki mevcut satırların üzerine yazılır
+        (bkz. `sync_prices`). Tarihler date ya da 'YYYY-MM-DD'.
+        """
+        if isinstance(start, str):
+            start = datetime.strptime(start, '%Y-%m-%d').date()
+        if isinstance(end, str):
+            end = datetime.strptime(end, '%Y-%m-%d').date()
+        return self._download_ranges({(start, end): list(tickers)}, chunk_days, replace=True)
+
+    def backfill_prices(self, tickers: List[str], years: int = 5, chunk_days: int = 365) -> pd.DataFrame:
+        """
+        Uzun geçmişi (yıllar) `chunk_days` günlük parçalar halinde geriye doğru doldurur:
+        her ticker için hedef başlangıç ile ilk kayıtlı tarih arasındaki boşluk indirilir.
+        """
+        today = datetime.now().date()
+        target_start = today - timedelta(days=365 * years)
+        plan = {}
+        for ticker, (first, _) in self.get_price_date_bounds(list(tickers)).items():
+            end = (datetime.strptime(first, '%Y-%m-%d').date() - timedelta(days=1)) if first else today
+            if target_start <= end:
+                plan.setdefault((target_start, end), []).append(ticker)
+        return self._download_ranges(plan, chunk_days)
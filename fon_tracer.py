@@ -0,0 +1,531 @@
+"""
+fon_tracer: panelden bağımsız veri toplama komut satırı aracı ve zamanlanmış daemon.
+
+Örnekler:
+    python fon_tracer.py populate --days 30
+    python fon_tracer.py update-tickers
+    python fon_tracer.py sync-prices --backfill-years 5
+    python fon_tracer.py daemon --quote-interval 15 --ownership-at 02:00
+    python fon_tracer.py enqueue --days 30 && python fon_tracer.py worker --exit-when-empty
+
+Aynı veritabanı üzerinde çalışan tüm komutlar bir dosya kilidi alır; böylece örneğin
+daemon çalışırken elle başlatılan bir `populate` işi yazımları birbirine karıştıramaz.
+İstisna kuyruk komutlarıdır (`enqueue`, `worker`, `queue-status`): işler `job_queue` üzerinden
+kiralandığı için istenildiği kadar worker süreci aynı anda çalışabilir.
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime, timedelta
+from typing import Callable, List, Optional
+
+import instrumentation as instr
+from cache_layer import ISTANBUL_TZ, is_market_open
+from db_manager import DEFAULT_DELTA_THRESHOLD, HOLDINGS_MODES, FundDBManager
+from job_queue import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DEFAULT_QUEUE, JobQueue, Worker
+from parquet_store import ParquetStore
+
+logger = logging.getLogger("fon_tracer")
+
+DEFAULT_DB = "fon_takip.db"
+DEFAULT_SOURCES = "fund_sources.json"
+
+# Kuyruk iş türleri
+JOB_OWNERSHIP = "sahiplik"  # payload: {'fon', 'url', 'refresh'}
+JOB_PRICES = "fiyat"        # payload: {'tickers', 'start', 'end'}
+PRICE_BATCH = 20            # bir fiyat işindeki en fazla ticker (tek yf.download çağrısı)
+QUEUE_COMMANDS = ("enqueue", "worker", "queue-status")
+
+
+class LockHeldError(RuntimeError):
+    """Kilit başka bir süreç tarafından tutuluyor."""
+
+
+class ProcessLock:
+    """
+    Süreçler arası, bloklamayan dosya kilidi (POSIX'te flock, Windows'ta msvcrt).
+    Süreç ölürse işletim sistemi kilidi bırakır; bayat kilit dosyası sorun çıkarmaz.
+    Kilit tutulurken dosyada "<rol> <pid>" yazar (ör. "daemon 4242"); bkz. `is_daemon_running`.
+    """
+
+    def __init__(self, path: str, role: str = "cli"):
+        self.path = path
+        self.role = role
+        self._fh = None
+
+    def acquire(self) -> "ProcessLock":
+        fh = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            raise LockHeldError(f"{self.path} kilitli: başka bir fon_tracer süreci çalışıyor")
+        fh.seek(0)
+        fh.truncate()
+        fh.write(f"{self.role} {os.getpid()}")
+        fh.flush()
+        self._fh = fh
+        return self
+
+    def release(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                # Temiz çıkışta rol ve PID silinir; `is_daemon_running` boş dosyayı "çalışmıyor" okur
+                self._fh.seek(0)
+                self._fh.truncate()
+                self._fh.flush()
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def lock_path_for(db_path: str) -> str:
+    return db_path + ".lock"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)  # sinyal göndermez, yalnızca sürecin varlığını sınar
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # başka kullanıcının süreci
+    return True
+
+
+def _lock_held(path: str) -> bool:
+    """Kilit şu an bir süreçte mi? Ayrı bir tanıtıcıyla bloklamadan denenir, alınırsa hemen bırakılır."""
+    if os.name == "nt":
+        try:
+            ProcessLock(path).acquire().release()
+            return False
+        except LockHeldError:
+            return True
+    import fcntl
+    with open(path, "r") as fh:
+        try:
+            # Paylaşımlı kilit yeterli: tutulan LOCK_EX ile çakışır, başka bir yoklamayla çakışmaz
+            fcntl.flock(fh.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        return False
+
+
+def is_daemon_running(db_path: str = DEFAULT_DB) -> bool:
+    """
+    Veritabanını bir `daemon` süreci mi tutuyor? (Panel, kendi kendine çekim yapıp yapmayacağına buna göre karar verir.)
+    Kilit dosyasında "daemon <pid>" yazmalı, PID yaşamalı ve kilit hâlâ tutuluyor olmalı; diğer komutların
+    kilidi ve PID'i başka bir sürece geçmiş bayat dosyalar sayılmaz. Kilit yalnızca bu koşullar sağlanınca
+    yoklanır; boş ya da başka rollü dosyada kilide hiç dokunulmaz.
+    """
+    path = lock_path_for(db_path)
+    try:
+        with open(path, "r") as fh:
+            role, _, pid = fh.read().strip().partition(" ")
+        pid = int(pid)
+    except (OSError, ValueError):
+        return False
+    if role != "daemon" or pid <= 0:
+        return False
+    # Windows'ta `os.kill` süreci sonlandırır; orada yalnızca kilit yoklanır
+    if os.name != "nt" and not _pid_alive(pid):
+        return False
+    return _lock_held(path)
+
+
+# --- İşler ---
+def collect_tickers(sources: dict) -> List[str]:
+    """Kaynaklardaki tüm ticker'ları sırayı koruyarak tekilleştirir."""
+    return list(dict.fromkeys(t for cfg in sources.values() for t in cfg.get("tickers") or []))
+
+
+def run_populate(db: FundDBManager, sources_path: str, days: int = 30, refresh: bool = False) -> None:
+    sources = db.load_fund_sources(sources_path)
+    if not sources:
+        raise FileNotFoundError(f"{sources_path} bulunamadı veya boş")
+
+    def progress(done, total, fon):
+        logger.info("sahiplik: %s (%d/%d)", fon, done, total)
+
+    db.auto_populate_from_sources(sources, days=days, refresh=refresh, progress=progress)
+
+
+def run_update_tickers(sources_path: str, only_missing: bool = True, workers: int = 8) -> dict:
+    from data_fetcher import update_fund_sources_with_tickers
+
+    result = update_fund_sources_with_tickers(sources_path, only_missing=only_missing, max_workers=workers)
+    logger.info("ticker güncelleme: %d fon güncellendi, %d hata, %d fonda geçersiz kod",
+                len(result["updated"]), len(result["failed"]), len(result["rejected"]))
+    return result
+
+
+def run_sync_prices(db: FundDBManager, sources_path: str, days: int = 30, backfill_years: int = 0) -> int:
+    """
+    Kaynaklardaki ticker'lar için eksik günleri indirir. Son kayıtlı gün de yeniden indirilip üzerine
+    yazıldığından (bkz. `FundDBManager.sync_prices`) seans içi son fiyat aynı indirmeyle güncellenir.
+    """
+    tickers = collect_tickers(db.load_fund_sources(sources_path))
+    if not tickers:
+        logger.info("fiyat senkronizasyonu: ticker yok")
+        return 0
+    rows = len(db.sync_prices(tickers, days=days))
+    if backfill_years:
+        rows += len(db.backfill_prices(tickers, years=backfill_years))
+    logger.info("fiyat senkronizasyonu: %d ticker, %d satır", len(tickers), rows)
+    if rows:
+        logger.info("değerleme: %d satır yeniden hesaplandı", db.refresh_valuation())
+    return rows
+
+
+# --- Kuyruk ---
+def enqueue_jobs(queue: JobQueue, db: FundDBManager, sources_path: str, days: int = 30, refresh: bool = False,
+                 requeue: bool = False, price_batch: int = PRICE_BATCH) -> dict:
+    """
+    Sahiplik (fon, URL) ve fiyat (ticker grubu, tarih aralığı) işlerini kuyruğa ekler.
+    Sahiplik anahtarları güne bağlıdır: aynı gün içinde tekrar çalıştırmak bitmiş fonları yeniden çekmez.
+    Fiyat aralıkları `plan_price_sync` ile eksik günlerden hesaplanır.
+    Döndürür: {tür: eklenen iş sayısı}
+    """
+    sources = db.load_fund_sources(sources_path)
+    if not sources:
+        raise FileNotFoundError(f"{sources_path} bulunamadı veya boş")
+    today = datetime.now().strftime("%Y-%m-%d")
+    ownership = [
+        (f"{fon}|{today}", {'fon': fon, 'url': cfg['fintables_url'], 'refresh': refresh})
+        for fon, cfg in sources.items() if cfg.get('fintables_url')
+    ]
+    prices = []
+    for (start, end), group in sorted(db.plan_price_sync(collect_tickers(sources), days=days).items()):
+        for i in range(0, len(group), price_batch):
+            chunk = group[i:i + price_batch]
+            prices.append((f"{start}|{end}|{','.join(chunk)}",
+                           {'tickers': chunk, 'start': str(start), 'end': str(end)}))
+    added = {
+        JOB_OWNERSHIP: queue.enqueue_many(JOB_OWNERSHIP, ownership, requeue=requeue),
+        JOB_PRICES: queue.enqueue_many(JOB_PRICES, prices, requeue=requeue),
+    }
+    logger.info("kuyruğa eklendi: %s (toplam %d sahiplik, %d fiyat işi)", added, len(ownership), len(prices))
+    return added
+
+
+def build_handlers(db: FundDBManager) -> dict:
+    """İş türü -> handler; yazımlar `FundDBManager` upsert'leriyle yapılır (tekrar çalışması zararsızdır)."""
+    def ownership(p):
+        db.fetch_and_store_fintables(p['url'], fon_adi=p['fon'], kaynak='Fintables', refresh=p.get('refresh', False))
+
+    def prices(p):
+        db.download_price_range(p['tickers'], p['start'], p['end'])
+
+    return {JOB_OWNERSHIP: ownership, JOB_PRICES: prices}
+
+
+def run_worker(db: FundDBManager, queue: JobQueue, args) -> dict:
+    kinds = args.kind or [JOB_OWNERSHIP, JOB_PRICES]
+    handlers = {k: h for k, h in build_handlers(db).items() if k in kinds}
+
+    def idle():
+        # Kuyruk boşaldı: biriken fiyat/sahiplik değişikliklerini değerlemeye yansıt
+        try:
+            logger.info("değerleme: %d satır yeniden hesaplandı", db.refresh_valuation())
+        except Exception as e:
+            logger.warning("Portföy değerlemesi güncellenemedi: %s", e)
+
+    worker = Worker(queue, handlers, worker_id=args.id, batch=args.batch, poll_seconds=args.poll, on_idle=idle)
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+    logger.info("worker %s başladı (%s)", worker.worker_id, ", ".join(kinds))
+    result = worker.run(exit_when_empty=args.exit_when_empty, max_jobs=args.max_jobs)
+    logger.info("worker %s bitti: %s; kuyruk: %s", worker.worker_id, result, queue.stats())
+    return result
+
+
+def run_queue_status(queue: JobQueue, args) -> None:
+    if args.requeue_dead:
+        logger.info("dead-letter'dan geri alınan: %d", queue.requeue_dead())
+    if args.purge_days is not None:
+        logger.info("silinen bitmiş iş: %d", queue.purge(older_than_seconds=args.purge_days * 86400))
+    logger.info("kuyruk: %s", queue.stats())
+    for job in queue.dead_letters(limit=20):
+        logger.info("dead: %s %s (%d deneme): %s", job['kind'], job['key'], job['attempts'], job['last_error'])
+
+
+# --- Zamanlayıcı ---
+class Job:
+    """
+    Zamanlanmış iş. `every` (saniye) ile periyodik veya `at` (İstanbul saati) ile günlük çalışır.
+    `market_hours_only=True` periyodik işi yalnızca seans saatlerinde tetikler.
+    """
+
+    def __init__(self, name: str, func: Callable[[], object], every: Optional[float] = None,
+                 at: Optional[dtime] = None, market_hours_only: bool = False, run_at_start: bool = False):
+        if (every is None) == (at is None):
+            raise ValueError("Job için `every` veya `at` parametrelerinden yalnızca biri verilmeli")
+        self.name = name
+        self.func = func
+        self.every = every
+        self.at = at
+        self.market_hours_only = market_hours_only
+        self.next_run = datetime.now(ISTANBUL_TZ) if run_at_start else self._following(datetime.now(ISTANBUL_TZ))
+        self.last_result: Optional[str] = None
+
+    def _following(self, now: datetime) -> datetime:
+        if self.every is not None:
+            return now + timedelta(seconds=self.every)
+        candidate = now.replace(hour=self.at.hour, minute=self.at.minute, second=0, microsecond=0)
+        return candidate if candidate > now else candidate + timedelta(days=1)
+
+    def due(self, now: datetime) -> bool:
+        return now >= self.next_run
+
+    def schedule_next(self, now: datetime) -> None:
+        self.next_run = self._following(now)
+
+
+class Scheduler:
+    """
+    Basit zamanlayıcı: vakti gelen işleri iş parçacığı havuzuna gönderir.
+    Aynı iş hâlâ çalışıyorsa (ör. uzun süren gece çekimi) yeni tetikleme atlanır.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.jobs: List[Job] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fon-tracer")
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, job: Job) -> None:
+        self.jobs.append(job)
+
+    def submit(self, job: Job) -> bool:
+        """İşi havuza gönderir; aynı isimli iş zaten sıradaysa/çalışıyorsa False döner."""
+        with self._lock:
+            if job.name in self._running:
+                return False
+            self._running.add(job.name)
+        self._executor.submit(self._run, job)
+        return True
+
+    def _run(self, job: Job) -> None:
+        started = datetime.now(ISTANBUL_TZ)
+        logger.info("%s başladı", job.name)
+        try:
+            job.func()
+            job.last_result = "ok"
+            logger.info("%s bitti (%.1f sn)", job.name, (datetime.now(ISTANBUL_TZ) - started).total_seconds())
+        except Exception as e:
+            job.last_result = f"hata: {e}"
+            logger.exception("%s başarısız", job.name)
+        finally:
+            with self._lock:
+                self._running.discard(job.name)
+
+    def tick(self, now: Optional[datetime] = None) -> None:
+        now = now or datetime.now(ISTANBUL_TZ)
+        for job in self.jobs:
+            if not job.due(now):
+                continue
+            job.schedule_next(now)
+            if job.market_hours_only and not is_market_open(now):
+                continue
+            if not self.submit(job):
+                logger.warning("%s hâlâ çalışıyor, bu tetikleme atlandı", job.name)
+
+    def run_forever(self, poll_seconds: float = 1.0) -> None:
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                self._stop.wait(poll_seconds)
+        finally:
+            logger.info("çalışan işlerin bitmesi bekleniyor...")
+            self._executor.shutdown(wait=True)
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+
+def build_daemon(db: FundDBManager, args) -> Scheduler:
+    scheduler = Scheduler(workers=args.workers)
+    ownership_at = datetime.strptime(args.ownership_at, "%H:%M").time()
+
+    def nightly():
+        # Önce eksik ticker listelerini doldur, sonra sahiplik tablolarını ve fiyatları çek
+        run_update_tickers(args.sources)
+        run_populate(db, args.sources, days=args.days)
+
+    scheduler.add(Job("sahiplik", nightly, at=ownership_at, run_at_start=args.run_now))
+    scheduler.add(Job(
+        "fiyat", lambda: run_sync_prices(db, args.sources, days=args.days),
+        every=args.quote_interval * 60, market_hours_only=not args.all_hours, run_at_start=True,
+    ))
+    return scheduler
+
+
+# --- Komut satırı ---
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="fon_tracer", description="Fon sahiplik ve fiyat verisi toplayıcı")
+    ap.add_argument("--db", default=DEFAULT_DB, help="SQLite veritabanı yolu")
+    ap.add_argument("--sources", default=DEFAULT_SOURCES, help="fund_sources.json yolu")
+    ap.add_argument("--holdings-mode", choices=HOLDINGS_MODES, default="snapshot",
+                    help="Sahiplik yazımı: tam kayıt, yalnızca değişimler veya ikisi")
+    ap.add_argument("--parquet-root", default=None,
+                    help="Verilirse fiyat ve sahiplik yazımları bu Parquet deposuna da yapılır")
+    ap.add_argument("--log-level", default="INFO")
+    ap.add_argument("--log-file", default=None)
+    ap.add_argument("--instrument", action="store_true",
+                    help="Aşama sürelerini ve sayaçları ölç; özet JSON olarak loglanır")
+    ap.add_argument("--queue", default=DEFAULT_QUEUE, help="İş kuyruğu (SQLite) yolu")
+    ap.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                    help="Kuyruk işi kira süresi (sn); worker'lar arasında aynı olmalı")
+    ap.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                    help="Bu kadar başarısız denemeden sonra iş dead-letter'a taşınır")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("populate", help="Sahiplik tablolarını ve fiyatları bir kez çek")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--refresh", action="store_true", help="HTTP önbelleğini atla")
+
+    p = sub.add_parser("update-tickers", help="fund_sources.json içindeki boş ticker listelerini doldur")
+    p.add_argument("--all", action="store_true", help="Dolu listeleri de yeniden keşfet")
+    p.add_argument("--workers", type=int, default=8, help="Eşzamanlı istek sayısı")
+
+    p = sub.add_parser("sync-prices", help="Eksik fiyat günlerini indir")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--backfill-years", type=int, default=0)
+
+    p = sub.add_parser("rebuild-events", help="Değişim kayıtlarını mevcut tam kayıtlardan yeniden üret")
+    p.add_argument("--threshold", type=float, default=DEFAULT_DELTA_THRESHOLD, help="Yüzde puan eşiği")
+
+    sub.add_parser("export-parquet", help="SQLite geçmişini --parquet-root deposuna aktar")
+
+    p = sub.add_parser("refresh-valuation", help="Portföy değerleme tablosunu güncelle")
+    p.add_argument("--full", action="store_true", help="Tamamını yeniden hesapla")
+
+    p = sub.add_parser("daemon", help="Zamanlanmış işlerle sürekli çalış")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--quote-interval", type=float, default=15, help="Fiyat güncelleme aralığı (dakika)")
+    p.add_argument("--ownership-at", default="02:00", help="Gece sahiplik çekimi saati (İstanbul, SS:DD)")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--all-hours", action="store_true", help="Fiyatları seans dışında da güncelle")
+    p.add_argument("--run-now", action="store_true", help="Sahiplik işini başlangıçta da çalıştır")
+
+    p = sub.add_parser("enqueue", help="Sahiplik ve eksik fiyat işlerini kuyruğa ekle")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--refresh", action="store_true", help="Sahiplik işlerinde HTTP önbelleğini atla")
+    p.add_argument("--requeue", action="store_true", help="Bitmiş veya dead-letter'daki aynı işleri yeniden çalıştır")
+    p.add_argument("--price-batch", type=int, default=PRICE_BATCH, help="Fiyat işi başına ticker")
+
+    p = sub.add_parser("worker", help="Kuyruktan iş alıp çalıştır (birden fazla süreç/makinede çalışabilir)")
+    p.add_argument("--id", default=None, help="Worker kimliği (varsayılan host:pid)")
+    p.add_argument("--kind", action="append", choices=[JOB_OWNERSHIP, JOB_PRICES],
+                   help="Yalnızca bu türdeki işleri al (tekrarlanabilir)")
+    p.add_argument("--batch", type=int, default=1, help="Tek seferde kiralanacak iş sayısı")
+    p.add_argument("--poll", type=float, default=5.0, help="Kuyruk boşken bekleme (sn)")
+    p.add_argument("--exit-when-empty", action="store_true", help="Hazır iş kalmayınca çık")
+    p.add_argument("--max-jobs", type=int, default=None)
+
+    p = sub.add_parser("queue-status", help="Kuyruk durumunu ve dead-letter'ları göster")
+    p.add_argument("--requeue-dead", action="store_true", help="Dead-letter'daki işleri yeniden kuyruğa al")
+    p.add_argument("--purge-days", type=float, default=None, help="Bu kadar günden eski bitmiş işleri sil")
+    return ap
+
+
+def run_queue_command(args) -> int:
+    """Kuyruk komutları süreç kilidi almaz; eşzamanlılık iş kiralamayla sağlanır."""
+    with JobQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts) as queue:
+        if args.command == "queue-status":
+            run_queue_status(queue, args)
+            return 0
+        store = ParquetStore(args.parquet_root) if args.parquet_root else None
+        with FundDBManager(args.db, auto_populate=False, holdings_mode=args.holdings_mode, parquet_store=store) as db:
+            if args.command == "enqueue":
+                enqueue_jobs(queue, db, args.sources, days=args.days, refresh=args.refresh,
+                             requeue=args.requeue, price_batch=args.price_batch)
+                return 0
+            result = run_worker(db, queue, args)
+            return 1 if result['dead'] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(threadName)s %(name)s: %(message)s",
+        filename=args.log_file,
+    )
+    if args.instrument:
+        instr.enable()
+
+    if args.command in QUEUE_COMMANDS:
+        try:
+            return run_queue_command(args)
+        finally:
+            if args.instrument:
+                instr.log_summary(label=args.command)
+
+    try:
+        lock = ProcessLock(lock_path_for(args.db), role=args.command).acquire()
+    except LockHeldError as e:
+        logger.error("%s", e)
+        return 2
+
+    try:
+        if args.command == "update-tickers":
+            result = run_update_tickers(args.sources, only_missing=not args.all, workers=args.workers)
+            return 1 if result["failed"] else 0
+
+        store = ParquetStore(args.parquet_root) if args.parquet_root else None
+        with FundDBManager(args.db, auto_populate=False, holdings_mode=args.holdings_mode, parquet_store=store) as db:
+            if args.command == "populate":
+                run_populate(db, args.sources, days=args.days, refresh=args.refresh)
+            elif args.command == "sync-prices":
+                run_sync_prices(db, args.sources, days=args.days, backfill_years=args.backfill_years)
+            elif args.command == "rebuild-events":
+                logger.info("değişim kayıtları: %s", db.rebuild_holding_events(threshold=args.threshold))
+            elif args.command == "export-parquet":
+                if store is None:
+                    logger.error("export-parquet için --parquet-root gerekli")
+                    return 2
+                logger.info("Parquet aktarımı: %s", db.export_to_parquet())
+            elif args.command == "refresh-valuation":
+                logger.info("değerleme: %d satır yeniden hesaplandı", db.refresh_valuation(full=args.full))
+            elif args.command == "daemon":
+                scheduler = build_daemon(db, args)
+                signal.signal(signal.SIGINT, scheduler.stop)
+                signal.signal(signal.SIGTERM, scheduler.stop)
+                logger.info("daemon başladı (pid %d)", os.getpid())
+                scheduler.run_forever()
+        return 0
+    finally:
+        lock.release()
+        if args.instrument:
+            instr.log_summary(label=args.command)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
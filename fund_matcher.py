@@ -0,0 +1,90 @@
+"""
+Fon adı eşleştirme: tablo satırındaki fon adını hedef fon listesine, satır başına hedef sayısından
+bağımsız sürede eşler.
+
+Hedefler ve satırlar Türkçe kurallarıyla küçük harfe çevrilip (I→ı, İ→i) aksanlardan arındırılarak
+kelimelere bölünür; hedef kelime dizileri bir kelime ağacında (trie) tutulur. Satır taranırken her
+kelimeden başlayan en uzun hedef aranır, böylece "DENİZ PORTFÖY" ile "DENİZ YATIRIM" ayrı hedefler
+olarak tanımlanabilir ve "DENIZ", "Deniz", "DENİZ" aynı fona düşer. Eşleşme kelime bütününde yapılır;
+"ATLAS" hedefi "ATLASPORT" adını yakalamaz.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+_TR_UPPER = str.maketrans({'I': 'ı', 'İ': 'i'})
+# Türkçe harfler ASCII karşılıklarına: elle yazılmış "PORTFOY" ile sayfadaki "PORTFÖY" eşleşsin
+_TR_ASCII = str.maketrans({'ı': 'i', 'ç': 'c', 'ğ': 'g', 'ö': 'o', 'ş': 's', 'ü': 'u'})
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+_END = ''  # trie düğümünde hedef kimliğinin tutulduğu anahtar (kelimeler hiçbir zaman boş değildir)
+
+Targets = Union[Iterable[str], Mapping[str, Sequence[str]]]
+
+
+def turkish_fold(text: str) -> str:
+    """Türkçe duyarlı küçük harf + aksan temizliği: 'DENİZ', 'Deniz', 'DENIZ' -> 'deniz'."""
+    text = unicodedata.normalize('NFC', text).translate(_TR_UPPER).lower().translate(_TR_ASCII)
+    # Kalan birleşik aksanlar (ör. â, î) düşürülür
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Katlanmış metni harf/rakam kelimelerine böler; noktalama ve boşluklar ayırıcıdır."""
+    return _TOKEN_RE.findall(turkish_fold(text))
+
+
+class FundMatcher:
+    """
+    Hedef fon listesinden bir kez kurulan kelime ağacı.
+
+    targets: ['TERA', 'DENİZ PORTFÖY', ...] (her ad kendi kimliğidir) ya da
+             {'DENİZ': ['DENİZ PORTFÖY', 'DENİZBANK'], ...} (kimlik -> takma adlar).
+    """
+
+    def __init__(self, targets: Targets):
+        self._root: Dict[str, dict] = {}
+        self.ids: List[str] = []
+        items = targets.items() if isinstance(targets, Mapping) else ((t, [t]) for t in targets)
+        for fund_id, aliases in items:
+            self.ids.append(fund_id)
+            for alias in aliases:
+                self._add(alias, fund_id)
+
+    def _add(self, alias: str, fund_id: str) -> None:
+        tokens = tokenize(alias)
+        if not tokens:
+            raise ValueError(f"Boş hedef fon adı: {alias!r}")
+        node = self._root
+        for tok in tokens:
+            node = node.setdefault(tok, {})
+        # Aynı takma ad iki kimliğe verilirse ilk tanım geçerli kalır
+        node.setdefault(_END, fund_id)
+
+    def _scan(self, tokens: List[str]) -> Iterable[Tuple[int, int, str]]:
+        """Her başlangıç kelimesi için en uzun eşleşmeyi (başlangıç, uzunluk, kimlik) verir."""
+        for i in range(len(tokens)):
+            node, best = self._root, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if _END in node:
+                    best = (i, j - i + 1, node[_END])
+            if best is not None:
+                yield best
+
+    def match(self, name: str) -> Optional[str]:
+        """Addaki en uzun (eşitse en soldaki) hedefin kimliği; eşleşme yoksa None."""
+        best = None
+        for start, length, fund_id in self._scan(tokenize(name)):
+            if best is None or length > best[0]:
+                best = (length, fund_id)
+        return best[1] if best else None
+
+    def match_all(self, name: str) -> List[str]:
+        """Addaki tüm hedef kimlikleri (tekrarsız, görülme sırasıyla)."""
+        return list(dict.fromkeys(fund_id for _, _, fund_id in self._scan(tokenize(name))))
+
+    def __len__(self) -> int:
+        return len(self.ids)
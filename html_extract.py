@@ -0,0 +1,180 @@
+import re
+from typing import Iterable, List, Optional, Sequence
+
+import pandas as pd
+from lxml import etree, html as lxml_html
+
+import instrumentation as instr
+
+# Fintables sahiplik kutusu ve portföy tablolarında aranan başlık anahtarları
+HOLDINGS_KEYWORDS = ['Hisse', 'Hisse Kodu', 'Hisse Adı', '%', 'Pay', 'Pay Oranı']
+
+_WS_RE = re.compile(r'\s+')
+_THOUSANDS_RE = re.compile(r'^-?\d{1,3}(\.\d{3})+$')
+# Tam sayı (adet) kolonları: tek nokta grubu da binlik ayırıcıdır ('12.345' lot)
+_COUNT_HEADER_RE = re.compile(r'lot|adet', re.IGNORECASE)
+_SIMPLE_SELECTOR_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*|\*)?((?:[.#][\w-]+)*)$')
+
+
+def css_to_xpath(selector: str) -> str:
+    """
+    Basit CSS seçicisini XPath'e çevirir: `div.a.b`, `#id`, `table tbody tr` gibi
+    etiket/sınıf/id ve boşlukla ayrılmış alt öğe kombinasyonları desteklenir.
+    Daha karmaşık seçiciler için `cssselect` paketi yüklüyse ona devreder.
+    """
+    parts = []
+    for token in selector.split():
+        m = _SIMPLE_SELECTOR_RE.match(token)
+        if not m:
+            try:
+                from lxml.cssselect import CSSSelector
+            except Exception as e:
+                raise ValueError(f"Desteklenmeyen seçici: {selector}") from e
+            return CSSSelector(selector).path
+        tag = m.group(1) or '*'
+        conds = []
+        for kind, name in re.findall(r'([.#])([\w-]+)', m.group(2)):
+            if kind == '.':
+                conds.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')")
+            else:
+                conds.append(f"@id='{name}'")
+        parts.append(tag + (f"[{' and '.join(conds)}]" if conds else ''))
+    return 'descendant-or-self::' + '/descendant::'.join(parts)
+
+
+def parse_tr_number(text, integer: bool = False) -> float:
+    """
+    Türkçe biçimli sayıyı float'a çevirir: '3.055.350' -> 3055350.0, '%5,23' -> 5.23.
+    Virgül yokken tek noktalı değer ('0.123', '12.345') ondalık sayılır; yalnızca birden fazla binlik grubu
+    ('3.055.350') ya da `integer=True` (lot/adet kolonları) iken noktalar binlik ayırıcı olarak atılır.
+    Çevrilemezse NaN döndürür.
+    """
+    if text is None:
+        return float('nan')
+    s = str(text).strip().replace('%', '').replace('\xa0', '').replace(' ', '')
+    if not s or s in ('-', '—'):
+        return float('nan')
+    if ',' in s:
+        s = s.replace('.', '').replace(',', '.')
+    elif _THOUSANDS_RE.match(s) and (integer or s.count('.') > 1):
+        s = s.replace('.', '')
+    try:
+        return float(s)
+    except ValueError:
+        return float('nan')
+
+
+def _parse_document(html):
+    if isinstance(html, str):
+        # lxml, encoding bildirimi içeren str girdiyi kabul etmez
+        html = html.encode('utf-8')
+    try:
+        return lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _cell_text(el) -> str:
+    return _WS_RE.sub(' ', el.text_content()).strip()
+
+
+def _header_cells(table) -> List[str]:
+    cells = table.xpath('./thead/tr[1]/th | ./thead/tr[1]/td')
+    if not cells:
+        first = table.xpath('.//tr[1]')
+        if first:
+            cells = first[0].xpath('./th')
+    return [_cell_text(c) for c in cells]
+
+
+def _body_rows(table, skip_header: bool) -> List[List[str]]:
+    rows = table.xpath('./tbody/tr')
+    if not rows:
+        rows = table.xpath('.//tr')
+        if skip_header and rows:
+            rows = rows[1:]
+    return [[_cell_text(c) for c in r.xpath('./td | ./th')] for r in rows]
+
+
+def extract_rows(html, container_selector: Optional[str] = None) -> List[List[str]]:
+    """
+    `container_selector` ile bulunan kutudaki ilk tablonun gövde satırlarını hücre metinleri olarak döndürür.
+    Seçici verilmezse sayfadaki ilk tablo kullanılır. Bulunamazsa boş liste döner.
+    """
+    doc = _parse_document(html)
+    if doc is None:
+        return []
+    if container_selector:
+        found = doc.xpath(css_to_xpath(container_selector))
+        if not found:
+            return []
+        doc = found[0]
+    tables = doc.xpath('descendant-or-self::table')
+    if not tables:
+        return []
+    table = tables[0]
+    return _body_rows(table, skip_header=not table.xpath('./thead'))
+
+
+@instr.timed("ayristirma")
+def extract_fund_holders(html, container_selector: str, min_cols: int = 3) -> pd.DataFrame:
+    """
+    Fintables 'şirket bilgileri' sayfasındaki ortaklık tablosunu okur.
+    Döndürür: DataFrame ['Fon Adı' (str), 'Lot (Adet)' (float), 'Pay Oranı (%)' (float)]
+    """
+    rows = [r for r in extract_rows(html, container_selector) if len(r) >= min_cols]
+    instr.count("parse.rows", len(rows))
+    return pd.DataFrame({
+        'Fon Adı': pd.Series([r[0] for r in rows], dtype=object),
+        'Lot (Adet)': pd.Series([parse_tr_number(r[1], integer=True) for r in rows], dtype='float64'),
+        'Pay Oranı (%)': pd.Series([parse_tr_number(r[2]) for r in rows], dtype='float64'),
+    })
+
+
+def _score_headers(headers: Sequence[str], keywords: Iterable[str]) -> int:
+    s = 0
+    for k in keywords:
+        for c in headers:
+            if k.lower() in c.lower():
+                s += 1
+    return s
+
+
+def _typed_frame(headers: List[str], rows: List[List[str]]) -> pd.DataFrame:
+    width = max([len(headers)] + [len(r) for r in rows]) if rows or headers else 0
+    cols = list(headers) + [str(i) for i in range(len(headers), width)]
+    data = {}
+    for i, c in enumerate(cols):
+        values = [r[i] if i < len(r) else '' for r in rows]
+        # Tamamı sayıya çevrilebilen kolonları float yap
+        integer = bool(_COUNT_HEADER_RE.search(c))
+        parsed = [parse_tr_number(v, integer=integer) for v in values]
+        numeric = any(values) and all(p == p for p, v in zip(parsed, values) if v)
+        data[c] = pd.Series(parsed, dtype='float64') if numeric else pd.Series(values, dtype=object)
+    return pd.DataFrame(data, columns=cols)
+
+
+@instr.timed("ayristirma")
+def extract_holdings_table(html, keywords: Sequence[str] = HOLDINGS_KEYWORDS) -> Optional[pd.DataFrame]:
+    """
+    Sayfadaki tabloların yalnızca başlıklarını puanlar, en uygun tablonun satırlarını okur.
+    Sayısal kolonlar float'a çevrilir. Sayfada tablo yoksa None döner.
+    """
+    doc = _parse_document(html)
+    if doc is None:
+        return None
+    tables = doc.xpath('//table')
+    if not tables:
+        return None
+
+    best_score, best_idx, best_headers = -1, 0, []
+    for idx, table in enumerate(tables):
+        headers = _header_cells(table)
+        score = _score_headers(headers, keywords)
+        if score > best_score:
+            best_score, best_idx, best_headers = score, idx, headers
+
+    table = tables[best_idx]
+    rows = _body_rows(table, skip_header=bool(best_headers) and not table.xpath('./thead'))
+    instr.count("parse.rows", len(rows))
+    return _typed_frame(best_headers, rows)
@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Kaynak (host) bazlı tazelik süreleri — saniye
+DEFAULT_TTLS: Dict[str, float] = {
+    "fintables.com": 12 * 3600,  # sahiplik tabloları en fazla günde bir değişir
+    "yandex.com": 6 * 3600,
+}
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def source_of(url: str) -> str:
+    """URL'nin kaynak anahtarını (www'suz host) döndürür."""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class ResponseCache:
+    """
+    SQLite tabanlı kalıcı HTTP yanıt önbelleği.
+    URL ile anahtarlanır; kaynak bazlı TTL ve toplam boyut sınırı (LRU tahliye) uygular.
+    """
+
+    def __init__(self, path: str = "http_cache.db", max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None, default_ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                encoding TEXT,
+                size INTEGER NOT NULL,
+                content BLOB NOT NULL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_access ON responses(last_access)")
+        self._conn.commit()
+
+    def ttl_for(self, url: str) -> float:
+        return self.ttls.get(source_of(url), self.default_ttl)
+
+    def get(self, url: str) -> Optional[Tuple[bytes, Optional[str], float, Optional[str], Optional[str]]]:
+        """
+        Kayıt varsa (content, encoding, fetched_at, etag, last_modified) döndürür; tazelik kontrolü yapmaz.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, encoding, fetched_at, etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None:
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+        return row
+
+    def is_fresh(self, fetched_at: float, url: str) -> bool:
+        return (time.time() - fetched_at) < self.ttl_for(url)
+
+    def put(self, url: str, content: bytes, encoding: Optional[str] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO responses
+                    (url, source, fetched_at, last_access, etag, last_modified, encoding, size, content)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, source_of(url), now, now, etag, last_modified, encoding, len(content), sqlite3.Binary(content)))
+            self._evict_locked()
+
+    def touch(self, url: str) -> None:
+        """304 sonrası kaydın tazelik süresini yeniler."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+
+    def _evict_locked(self) -> None:
+        # Toplam boyut sınırı aşıldıysa en uzun süredir erişilmeyen kayıtları sil
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_access ASC"):
+            victims.append((url,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_cache_disabled = False
+
+
+def configure_cache(path: Optional[str] = "http_cache.db", **kwargs) -> Optional[ResponseCache]:
+    """
+    Paylaşılan önbelleği yapılandırır. `path=None` önbelleği tamamen kapatır.
+    """
+    global _cache, _cache_disabled
+    with _cache_lock:
+        _cache_disabled = path is None
+        _cache = ResponseCache(path, **kwargs) if path else None
+    return _cache
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Paylaşılan önbelleği döndürür (ilk çağrıda varsayılan ayarlarla oluşturulur)."""
+    global _cache
+    if _cache is None and not _cache_disabled:
+        with _cache_lock:
+            if _cache is None and not _cache_disabled:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,167 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation as instr
+from http_cache import get_cache
+
+# brotli (veya brotlicffi) yüklüyse urllib3 'br' içeriğini otomatik çözer
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except Exception:
+    try:
+        import brotlicffi  # noqa: F401
+        _ACCEPT_ENCODING = "gzip, deflate, br"
+    except Exception:
+        _ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; fon-tracer/1.0; +https://github.com/uzunenes/fon_tracer)",
+    "Accept-Encoding": _ACCEPT_ENCODING,
+    "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
+}
+# (bağlantı, okuma) zaman aşımı — saniye
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 15)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 16
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# url -> (etag, last_modified, content, encoding) ; önbellek kapalıyken koşullu GET için
+_validators: Dict[str, Tuple[Optional[str], Optional[str], bytes, Optional[str]]] = {}
+_validators_lock = threading.Lock()
+
+
+def _build_retry(total: int = 3, backoff_factor: float = 0.5, backoff_jitter: float = 0.5) -> Retry:
+    kwargs = dict(
+        total=total,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(backoff_jitter=backoff_jitter, **kwargs)
+    except TypeError:
+        # urllib3 < 2.0 jitter desteklemez
+        return Retry(**kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Tüm scraper'ların paylaştığı keep-alive Session'ı döndürür.
+    Bağlantı havuzu ve 429/5xx için üstel geri çekilmeli (jitter'lı) retry içerir.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=_build_retry())
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update(DEFAULT_HEADERS)
+                _session = s
+    return _session
+
+
+def _response_from_validator(resp: requests.Response, content: bytes, encoding: Optional[str]) -> requests.Response:
+    # 304 yanıtını, saklanan gövdeyle 200 gibi davranan bir yanıta çevir
+    resp.status_code = 200
+    resp._content = content
+    resp.encoding = encoding
+    resp.from_cache = True
+    return resp
+
+
+def _response_from_cache(url: str, content: bytes, encoding: Optional[str]) -> requests.Response:
+    # Ağa hiç çıkmadan önbellekteki gövdeden yanıt oluştur
+    resp = requests.Response()
+    resp.url = url
+    resp.status_code = 200
+    resp._content = content
+    resp.encoding = encoding
+    resp.from_cache = True
+    return resp
+
+
+def fetch(
+    url: str,
+    headers: Optional[dict] = None,
+    timeout=DEFAULT_TIMEOUT,
+    conditional: bool = True,
+    use_cache: bool = True,
+    refresh: bool = False,
+    rate_limiter=None,
+) -> requests.Response:
+    """
+    Paylaşılan Session ile GET isteği yapar.
+
+    - `use_cache=True` iken kalıcı önbellekte (bkz. `http_cache`) TTL'i dolmamış kayıt varsa ağa çıkılmaz.
+    - `refresh=True` taze kaydı yok sayar ve sayfayı yeniden doğrular/indirir.
+    - `conditional=True` iken bilinen ETag/Last-Modified değerleri gönderilir;
+      sunucu 304 dönerse önceki gövde yeniden kullanılır (`resp.from_cache == True`).
+    - `rate_limiter` verilirse (`acquire(url)` metodu olan nesne) yalnızca ağ isteğinden önce çağrılır.
+
+    Hata durumunda `requests.HTTPError` fırlatır.
+    """
+    cache = get_cache() if use_cache else None
+    cached = None
+    if cache is not None:
+        entry = cache.get(url)
+        if entry is not None:
+            content, encoding, fetched_at, etag, last_modified = entry
+            if not refresh and cache.is_fresh(fetched_at, url):
+                instr.count("http.cache_hit")
+                return _response_from_cache(url, content, encoding)
+            cached = (etag, last_modified, content, encoding)
+    elif conditional:
+        with _validators_lock:
+            cached = _validators.get(url)
+
+    req_headers = dict(headers or {})
+    if conditional and cached:
+        etag, last_modified, _, _ = cached
+        if etag:
+            req_headers["If-None-Match"] = etag
+        if last_modified:
+            req_headers["If-Modified-Since"] = last_modified
+
+    if rate_limiter is not None:
+        with instr.timer("ag.bekleme"):
+            rate_limiter.acquire(url)
+    with instr.timer("ag"):
+        resp = get_session().get(url, headers=req_headers, timeout=timeout)
+    instr.count("http.requests")
+
+    if resp.status_code == 304 and cached:
+        instr.count("http.not_modified")
+        if cache is not None:
+            cache.touch(url)
+        return _response_from_validator(resp, cached[2], cached[3])
+
+    resp.raise_for_status()
+    resp.from_cache = False
+    instr.count("http.bytes", len(resp.content))
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if cache is not None:
+        cache.put(url, resp.content, resp.encoding, etag, last_modified)
+    elif conditional and (etag or last_modified):
+        with _validators_lock:
+            _validators[url] = (etag, last_modified, resp.content, resp.encoding)
+
+    return resp
+
+
+def get_text(url: str, **kwargs) -> str:
+    """`fetch` ile sayfayı alıp metnini döndürür."""
+    return fetch(url, **kwargs).text
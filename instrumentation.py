@@ -0,0 +1,222 @@
+"""
+Hafif ölçüm katmanı: aşama süreleri, sayaçlar ve isteğe bağlı profil çıkarma.
+
+Sıcak yollar (`http_client.fetch`, HTML çıkarıcılar, yfinance çağrıları, `FundDBManager` okuma/yazımları,
+Streamlit tarama/fiyat/çizim adımları) `timer('aşama')` / `@timed('aşama')` ve `count('sayaç', n)` ile
+işaretlenir. Ölçüm kapalıyken bunlar tek bir bayrak kontrolüdür; açmak için `enable()` çağrılır ya da
+`FON_TRACER_INSTRUMENT=1` ortam değişkeni verilir.
+
+Kayıtlar varsayılan olarak süreç genelinde tek bir `Recorder`'da toplanır (CLI). Aynı süreçte birbirinden
+bağımsız çalıştırmalar (ör. Streamlit oturumları) `with recording() as rec:` ile kendi `Recorder`'larını
+kurar: kayıt `contextvars` ile bağlama bağlanır, global bayrağa ve global kayda dokunulmaz.
+`scanner.scan_concurrently` işleri çağıranın bağlamıyla çalıştırdığından worker thread'lerinin ölçümleri
+de aynı kayda düşer.
+Her tamamlanan ölçüm DEBUG düzeyinde, `summary()` ise `log_summary()` ile INFO düzeyinde tek satır JSON
+olarak `instrumentation` logger'ına yazılır.
+
+Profil: `profile('aşama')` yalnızca çağıran thread'i profiller; pyinstrument yüklüyse ve `FON_TRACER_PROFILE=pyinstrument`
+ise onu, aksi halde cProfile'ı kullanır.
+"""
+import contextvars
+import cProfile
+import functools
+import importlib.util
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Optional
+
+# optional backend; yalnızca profil çıkarmak için, modül ilk profilde yüklenir
+_HAS_PYINSTRUMENT = importlib.util.find_spec("pyinstrument") is not None
+
+logger = logging.getLogger("instrumentation")
+
+PROFILE_TOP_N = 25
+
+_enabled = os.environ.get("FON_TRACER_INSTRUMENT", "").lower() in ("1", "true", "yes")
+_NULL = nullcontext()
+
+
+class Recorder:
+    """Thread güvenli süre ve sayaç toplayıcısı."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # aşama -> [çağrı sayısı, toplam sn, en uzun sn]
+            self.timers: Dict[str, list] = {}
+            self.counters: Dict[str, float] = {}
+            self.profiles: Dict[str, str] = {}
+            self.started_at = time.time()
+
+    def add_time(self, stage: str, secs: float) -> None:
+        with self._lock:
+            t = self.timers.get(stage)
+            if t is None:
+                self.timers[stage] = [1, secs, secs]
+            else:
+                t[0] += 1
+                t[1] += secs
+                t[2] = max(t[2], secs)
+
+    def add_count(self, name: str, n: float) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_profile(self, stage: str, report: str) -> None:
+        with self._lock:
+            self.profiles[stage] = report
+
+    def summary(self) -> dict:
+        """{'timers': {aşama: {'calls', 'total_ms', 'avg_ms', 'max_ms'}}, 'counters': {...}, 'window_s': ...}"""
+        with self._lock:
+            timers = {
+                stage: {'calls': calls, 'total_ms': total * 1000, 'avg_ms': total / calls * 1000, 'max_ms': worst * 1000}
+                for stage, (calls, total, worst) in self.timers.items()
+            }
+            return {'timers': timers, 'counters': dict(self.counters), 'window_s': time.time() - self.started_at}
+
+
+_recorder = Recorder()
+# Bağlama (çalıştırmaya) özel kayıt; kurulu değilse global kayıt (`_enabled` iken) kullanılır
+_run_recorder: "contextvars.ContextVar[Optional[Recorder]]" = contextvars.ContextVar("instrumentation_recorder",
+                                                                                     default=None)
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def get_recorder() -> Recorder:
+    return _recorder
+
+
+def active_recorder() -> Optional[Recorder]:
+    """Bu bağlamda ölçümlerin yazılacağı kayıt; ölçüm kapalıysa None."""
+    rec = _run_recorder.get()
+    if rec is not None:
+        return rec
+    return _recorder if _enabled else None
+
+
+@contextmanager
+def recording(enabled: bool = True):
+    """
+    Bloğun ölçümlerini yeni bir `Recorder`'a yazar ve onu verir (`enabled=False` iken None verir, hiçbir şey
+    kurmaz). Global `enable()` bayrağı ve `get_recorder()` kaydı değişmez.
+    """
+    if not enabled:
+        yield None
+        return
+    rec = Recorder()
+    token = _run_recorder.set(rec)
+    try:
+        yield rec
+    finally:
+        _run_recorder.reset(token)
+
+
+def reset() -> None:
+    _recorder.reset()
+
+
+def summary() -> dict:
+    return _recorder.summary()
+
+
+def count(name: str, n: float = 1) -> None:
+    """Sayaç artırır (ör. 'http.bytes', 'parse.rows', 'cache.hit'); ölçüm kapalıysa hiçbir şey yapmaz."""
+    rec = active_recorder()
+    if rec is not None:
+        rec.add_count(name, n)
+
+
+@contextmanager
+def _timing(stage: str, rec: Recorder):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        secs = time.perf_counter() - t0
+        rec.add_time(stage, secs)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({'stage': stage, 'ms': round(secs * 1000, 3),
+                                     'thread': threading.current_thread().name}, ensure_ascii=False))
+
+
+def timer(stage: str):
+    """`with timer('sqlite.get_filtered_data'):` — ölçüm kapalıyken paylaşılan boş bağlam döner."""
+    rec = active_recorder()
+    return _NULL if rec is None else _timing(stage, rec)
+
+
+def timed(stage: str) -> Callable:
+    """Fonksiyonun her çağrısını `stage` altında ölçen dekoratör."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            rec = active_recorder()
+            if rec is None:
+                return fn(*args, **kwargs)
+            with _timing(stage, rec):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile(stage: str, enabled: bool = True, top_n: int = PROFILE_TOP_N):
+    """
+    Bloğu profiller ve metin raporunu etkin kaydın (bkz. `active_recorder`; yoksa global kaydın)
+    `profiles[stage]` alanına yazar.
+    Not: yalnızca çağıran thread profillenir; thread havuzundaki işler rapora girmez.
+    """
+    if not enabled:
+        yield
+        return
+    rec = active_recorder() or _recorder
+    use_pyinstrument = _HAS_PYINSTRUMENT and os.environ.get("FON_TRACER_PROFILE", "").lower() == "pyinstrument"
+    if use_pyinstrument:
+        from pyinstrument import Profiler
+
+        prof = Profiler()
+        prof.start()
+        try:
+            yield
+        finally:
+            prof.stop()
+            rec.add_profile(stage, prof.output_text(unicode=True, color=False))
+        return
+
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats(top_n)
+        rec.add_profile(stage, out.getvalue())
+
+
+def log_summary(level: int = logging.INFO, label: Optional[str] = None,
+                recorder: Optional[Recorder] = None) -> dict:
+    """Özeti (`recorder` verilmezse global kaydın) tek satır JSON olarak loglar ve döndürür."""
+    data = (recorder or _recorder).summary()
+    if label:
+        data = {'label': label, **data}
+    logger.log(level, json.dumps(data, ensure_ascii=False, default=float))
+    return data
@@ -0,0 +1,371 @@
+"""
+SQLite tabanlı kalıcı iş kuyruğu: çekim işlerini birden fazla worker sürecine dağıtmak için.
+
+İş yaşam döngüsü:
+    pending --claim--> leased --ack--> done
+                         |--fail--> pending (üstel geri çekilmeyle `available_at` ileri atılır)
+                         |--fail (max_attempts)--> dead
+                         '--kira süresi doldu--> başka bir worker tekrar alabilir
+
+- `claim` tek bir `BEGIN IMMEDIATE` işleminde seçip kiralar; aynı iş iki worker'a verilmez.
+- Kirayı tutan worker ölürse `lease_expires` geçince iş yeniden alınır; uzun işler `heartbeat` ile kirayı uzatır.
+- Her iş `(kind, key)` ile tekildir: aynı anahtarla tekrar kuyruğa eklemek bitmiş işi yeniden çalıştırmaz,
+  böylece çöken bir çekim yeniden başlatıldığında tamamlanan işler tekrar indirilmez.
+- `max_attempts` denemede başarılamayan işler `dead` olur (dead-letter); `requeue_dead` ile geri alınır.
+
+Kuyruk dosyası veritabanından ayrıdır. Birden fazla makineden kullanmak için dosya kilitlemeyi doğru
+destekleyen ortak bir dosya sistemi gerekir (SQLite'ın NFS üzerindeki kısıtlarına dikkat).
+"""
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "jobs.db"
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 30.0   # sn; n. başarısızlıktan sonra base * 2**(n-1)
+DEFAULT_BACKOFF_MAX = 3600.0
+BUSY_TIMEOUT_SECONDS = 30
+
+STATUSES = ("pending", "leased", "done", "dead")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class QueuedJob:
+    """Kiralanmış iş. `payload` JSON'dan çözülmüş sözlüktür; `attempts` bu kiralama dahil deneme sayısıdır."""
+
+    __slots__ = ("id", "kind", "key", "payload", "attempts")
+
+    def __init__(self, id: int, kind: str, key: str, payload: dict, attempts: int):
+        self.id = id
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"QueuedJob({self.id}, {self.kind!r}, {self.key!r}, deneme={self.attempts})"
+
+
+class JobQueue:
+    """
+    Süreçler arası paylaşılabilen iş kuyruğu. Tek bağlantı bir kilitle korunur (thread güvenli);
+    süreçler arası tutarlılığı SQLite'ın yazma kilidi sağlar.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        # isolation_level=None: işlemler (BEGIN IMMEDIATE) elle yönetilir
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE(kind, key)
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs(status, available_at)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write(self, fn):
+        """`fn(conn)`'u tek bir yazma işleminde (BEGIN IMMEDIATE) çalıştırır."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    # --- Kuyruğa ekleme ---
+    def enqueue(self, kind: str, key: str, payload: dict, delay: float = 0, requeue: bool = False) -> bool:
+        """Tek iş ekler; eklendiyse True. Bkz. `enqueue_many`."""
+        return self.enqueue_many(kind, [(key, payload)], delay=delay, requeue=requeue) == 1
+
+    def enqueue_many(self, kind: str, items: Iterable[Tuple[str, dict]], delay: float = 0,
+                     requeue: bool = False) -> int:
+        """
+        `(key, payload)` çiftlerini ekler. Aynı `(kind, key)` zaten varsa dokunulmaz; `requeue=True` iken
+        bitmiş veya dead-letter'daki iş (deneme sayacı sıfırlanarak) yeniden bekleyen yapılır.
+        Döndürür: eklenen veya yeniden kuyruğa alınan iş sayısı.
+        """
+        now = time.time()
+        rows = [(kind, key, json.dumps(payload, ensure_ascii=False), now + delay, now, now) for key, payload in items]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT INTO jobs (kind, key, payload, available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(kind, key) DO NOTHING
+            ''', rows)
+            if requeue:
+                conn.executemany('''
+                    UPDATE jobs SET status = 'pending', attempts = 0, payload = ?, available_at = ?,
+                        lease_owner = NULL, lease_expires = NULL, last_error = NULL, updated_at = ?
+                    WHERE kind = ? AND key = ? AND status IN ('done', 'dead')
+                ''', [(p, avail, now, k, key) for k, key, p, avail, _, _ in rows])
+            return conn.total_changes - before
+
+        return self._write(insert)
+
+    # --- Worker tarafı ---
+    def claim(self, worker_id: str, kinds: Optional[List[str]] = None, limit: int = 1) -> List[QueuedJob]:
+        """
+        Hazır (`pending` ve vakti gelmiş) veya kirası dolmuş en fazla `limit` işi kiralar.
+        Kirası dolmuş ve deneme hakkı bitmiş işler alınmak yerine dead-letter'a taşınır.
+        """
+        now = time.time()
+        kind_sql = f" AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        kind_params = list(kinds or [])
+
+        def take(conn):
+            # Kira süresi içinde bitirilemeyen (worker çökmesi vb.) ve hakkı kalmayan işler
+            conn.execute(f'''
+                UPDATE jobs SET status = 'dead', lease_owner = NULL, lease_expires = NULL, updated_at = ?,
+                    last_error = COALESCE(last_error, 'kira süresi doldu')
+                WHERE status = 'leased' AND lease_expires <= ? AND attempts >= ?{kind_sql}
+            ''', [now, now, self.max_attempts] + kind_params)
+            rows = conn.execute(f'''
+                SELECT id, kind, key, payload, attempts FROM jobs
+                WHERE ((status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires <= ?)){kind_sql}
+                ORDER BY available_at, id LIMIT ?
+            ''', [now, now] + kind_params + [limit]).fetchall()
+            if rows:
+                conn.executemany('''
+                    UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?,
+                        lease_expires = ?, updated_at = ?
+                    WHERE id = ?
+                ''', [(worker_id, now + self.lease_seconds, now, r[0]) for r in rows])
+            return rows
+
+        return [QueuedJob(id_, kind, key, json.loads(payload), attempts + 1)
+                for id_, kind, key, payload, attempts in self._write(take)]
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Kirayı uzatır; kira başka bir worker'a geçmişse False."""
+        now = time.time()
+        return self._write(lambda conn: conn.execute('''
+            UPDATE jobs SET lease_expires = ?, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+        ''', (now + self.lease_seconds, now, job_id, worker_id)).rowcount == 1)
+
+    def ack(self, job_id: int, worker_id: str) -> bool:
+        """İşi tamamlandı olarak işaretler; kira kaybedilmişse False (iş başka worker'da)."""
+        now = time.time()
+        return self._write(lambda conn: conn.execute('''
+            UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL, last_error = NULL,
+                updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+        ''', (now, job_id, worker_id)).rowcount == 1)
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Çalıştırılmadan bırakılan kiralı işi (deneme sayılmadan) hemen tekrar `pending` yapar."""
+        now = time.time()
+        return self._write(lambda conn: conn.execute('''
+            UPDATE jobs SET status = 'pending', attempts = attempts - 1, available_at = ?, lease_owner = NULL,
+                lease_expires = NULL, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+        ''', (now, now, job_id, worker_id)).rowcount == 1)
+
+    def backoff(self, attempts: int) -> float:
+        """n. başarısızlıktan sonraki bekleme: base * 2**(n-1), üst sınırlı ve ±%10 rastgele sapmalı."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(attempts - 1, 0)))
+        return delay * random.uniform(0.9, 1.1)
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[str]:
+        """
+        Başarısız denemeyi kaydeder: hakkı varsa geri çekilmeyle tekrar `pending`, yoksa `dead` olur.
+        Döndürür: yeni durum; kira kaybedilmişse None.
+        """
+        now = time.time()
+
+        def mark(conn):
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                               (job_id, worker_id)).fetchone()
+            if row is None:
+                return None
+            status = 'dead' if row[0] >= self.max_attempts else 'pending'
+            conn.execute('''
+                UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,
+                    last_error = ?, updated_at = ?
+                WHERE id = ?
+            ''', (status, now + (self.backoff(row[0]) if status == 'pending' else 0), str(error)[:2000], now, job_id))
+            return status
+
+        return self._write(mark)
+
+    # --- Yönetim ---
+    def stats(self) -> Dict[str, int]:
+        """{durum: iş sayısı} — tüm durumlar (0 olanlar dahil)."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {s: counts.get(s, 0) for s in STATUSES}
+
+    def next_available_in(self) -> Optional[float]:
+        """Bir sonraki işin alınabilir olmasına kalan saniye (bekleyen/kiralı iş yoksa None)."""
+        with self._lock:
+            row = self._conn.execute('''
+                SELECT MIN(CASE status WHEN 'pending' THEN available_at ELSE lease_expires END)
+                FROM jobs WHERE status IN ('pending', 'leased')
+            ''').fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def dead_letters(self, limit: int = 100) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT id, kind, key, attempts, last_error, updated_at FROM jobs
+                WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        return [dict(zip(('id', 'kind', 'key', 'attempts', 'last_error', 'updated_at'), r)) for r in rows]
+
+    def requeue_dead(self, kind: Optional[str] = None) -> int:
+        """Dead-letter'daki işleri deneme sayacını sıfırlayarak yeniden kuyruğa alır."""
+        now = time.time()
+        sql = '''UPDATE jobs SET status = 'pending', attempts = 0, available_at = ?, last_error = NULL, updated_at = ?
+                 WHERE status = 'dead' '''
+        params = [now, now]
+        if kind:
+            sql += "AND kind = ?"
+            params.append(kind)
+        return self._write(lambda conn: conn.execute(sql, params).rowcount)
+
+    def purge(self, older_than_seconds: float = 7 * 86400) -> int:
+        """Belirtilen süreden eski bitmiş işleri siler (dead-letter'lar korunur)."""
+        cutoff = time.time() - older_than_seconds
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (cutoff,)).rowcount)
+
+
+class Worker:
+    """
+    Kuyruktan iş alıp `handlers[kind](payload)` ile çalıştıran döngü. İş sürerken kira arka planda
+    `lease_seconds / 3` aralıkla uzatılır; handler istisna fırlatırsa iş `fail` ile geri çekilir.
+    Kuyruk boşaldığında (ve öncesinde en az bir iş bittiyse) `on_idle()` bir kez çağrılır.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[dict], object]],
+                 worker_id: Optional[str] = None, batch: int = 1, poll_seconds: float = 5.0,
+                 on_idle: Optional[Callable[[], None]] = None):
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.batch = batch
+        self.poll_seconds = poll_seconds
+        self.on_idle = on_idle
+        self.processed = {'done': 0, 'failed': 0, 'dead': 0, 'lost': 0}
+        self._stop = threading.Event()
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+    def _keep_alive(self, job: QueuedJob, done: threading.Event) -> None:
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not done.wait(interval):
+            if not self.queue.heartbeat(job.id, self.worker_id):
+                logger.warning("%r: kira kaybedildi", job)
+                return
+
+    def run_job(self, job: QueuedJob) -> None:
+        done = threading.Event()
+        beat = threading.Thread(target=self._keep_alive, args=(job, done), daemon=True,
+                                name=f"kira-{job.id}")
+        beat.start()
+        started = time.perf_counter()
+        try:
+            self.handlers[job.kind](job.payload)
+        except Exception as e:
+            done.set()
+            status = self.queue.fail(job.id, self.worker_id, f"{type(e).__name__}: {e}")
+            key = 'lost' if status is None else 'dead' if status == 'dead' else 'failed'
+            self.processed[key] += 1
+            log = logger.error if status == 'dead' else logger.warning
+            log("%r başarısız (%s): %s", job, status or 'kira kaybedildi', e)
+            return
+        finally:
+            done.set()
+            beat.join()
+        if self.queue.ack(job.id, self.worker_id):
+            self.processed['done'] += 1
+            logger.info("%r bitti (%.1f sn)", job, time.perf_counter() - started)
+        else:
+            # Kira süresi dolup iş başka worker'a geçmiş; sonuç yine de yazıldı, ikinci çalışma upsert olduğundan zararsız
+            self.processed['lost'] += 1
+            logger.warning("%r bitti ama kira kaybedilmişti", job)
+
+    def run(self, exit_when_empty: bool = False, max_jobs: Optional[int] = None) -> dict:
+        """
+        Durdurulana kadar (veya `exit_when_empty` iken hazır iş kalmayınca, ya da `max_jobs` işten sonra) çalışır.
+        Geri çekilmede bekleyen işler `exit_when_empty` çıkışını engellemez; sonraki çalıştırmada alınırlar.
+        Döndürür: {'done', 'failed', 'dead', 'lost'} sayaçları.
+        """
+        kinds = list(self.handlers)
+        pending_idle = False
+        handled = 0
+        while not self._stop.is_set():
+            jobs = self.queue.claim(self.worker_id, kinds=kinds, limit=self.batch)
+            if not jobs:
+                if pending_idle and self.on_idle:
+                    self.on_idle()
+                pending_idle = False
+                if exit_when_empty:
+                    break
+                wait = self.queue.next_available_in()
+                self._stop.wait(self.poll_seconds if wait is None else min(self.poll_seconds, max(wait, 0.1)))
+                continue
+            for i, job in enumerate(jobs):
+                self.run_job(job)
+                handled += 1
+                pending_idle = True
+                if self._stop.is_set() or (max_jobs is not None and handled >= max_jobs):
+                    # Kiralanıp başlanmamış işleri kira süresini beklemeden geri bırak
+                    for rest in jobs[i + 1:]:
+                        self.queue.release(rest.id, self.worker_id)
+                    break
+            if max_jobs is not None and handled >= max_jobs:
+                break
+        if pending_idle and self.on_idle:
+            self.on_idle()
+        return dict(self.processed)
@@ -0,0 +1,231 @@
+"""
+Fiyat ve sahiplik geçmişi için yıl/ay bölümlü Parquet deposu.
+
+Yazım, SQLite'a yazan ingest yoluyla birlikte yapılır (bkz. `FundDBManager(parquet_store=...)`);
+okuma Arrow dataset API'si ile bellek eşlemeli (mmap) dosyalardan, ticker/fon ve tarih filtreleri
+bölüm ve row group istatistiklerine itilerek yapılır. `pyarrow` isteğe bağlıdır.
+"""
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+try:
+    # optional import; Parquet deposu yalnızca pyarrow yüklüyse kullanılabilir
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs as pafs
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+DEFAULT_ROOT = "fon_parquet"
+PART_FILE = "part.parquet"
+# Deponun yansıttığı SQLite geçmiş sürümü (`FundDBManager.history_version`)
+WATERMARK_FILE = "_watermark.json"
+# Aynı kökü kullanan süreçler yazımları bu dosya üzerindeki kilitle sıralar
+LOCK_FILE = ".lock"
+ROW_GROUP_SIZE = 64 * 1024
+
+# Veri kümesi -> (tekil anahtar kolonları, dosya içi sıralama)
+DATASETS = {
+    "prices": (["tarih", "ticker"], ["ticker", "tarih"]),
+    "holdings": (["tarih", "fon_adi", "hisse_kodu"], ["fon_adi", "tarih", "hisse_kodu"]),
+}
+
+
+def _require_pyarrow():
+    if not _HAS_PYARROW:
+        raise RuntimeError("pyarrow yüklü değil. Parquet deposu için `pip install pyarrow` çalıştırın.")
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    return pd.Timestamp(value).date()
+
+
+class ParquetStore:
+    """
+    `root/<veri kümesi>/yil=YYYY/ay=M/part.parquet` düzeninde bölümlü depo.
+    Her yazım yalnızca etkilenen ayları yeniden yazar (mevcut + yeni satırlar, anahtar bazında tekil);
+    dosyalar önce geçici isimle yazılıp atomik olarak yerine konur, okuyucular yarım dosya görmez.
+    Oku-birleştir-yaz adımları ve damga, kökteki kilit dosyasıyla süreçler arasında da sıralanır (`locked`).
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        _require_pyarrow()
+        self.root = root
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._lock_fh = None
+        # mmap: okuma sayfa önbelleğinden yapılır, dosya içeriği süreç belleğine kopyalanmaz
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+
+    def _dataset_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def locked(self):
+        """
+        Depoya özel yazma kilidi: süreç içinde iş parçacıkları, süreçler arasında kökteki `LOCK_FILE` üzerinde
+        (POSIX'te flock, Windows'ta msvcrt) bloklayan kilit. Aynı iş parçacığında iç içe alınabilir; çağıran
+        SQLite yazımını, Parquet yazımını ve damgayı tek kilit altında yaparak sürümleri sırayla yansıtır.
+        """
+        with self._lock:
+            if self._depth == 0:
+                os.makedirs(self.root, exist_ok=True)
+                fh = open(os.path.join(self.root, LOCK_FILE), "a+")
+                try:
+                    if os.name == "nt":
+                        import msvcrt
+                        fh.seek(0)
+                        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    else:
+                        import fcntl
+                        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                except OSError:
+                    fh.close()
+                    raise
+                self._lock_fh = fh
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fh, self._lock_fh = self._lock_fh, None
+                    try:
+                        if os.name == "nt":
+                            import msvcrt
+                            fh.seek(0)
+                            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+                        else:
+                            import fcntl
+                            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+                    finally:
+                        fh.close()
+
+    # --- yazım ---
+    def write(self, name: str, df: pd.DataFrame, replace: bool = True) -> int:
+        """
+        `df` (kolonlar SQLite tablosuyla aynı; 'tarih' 'YYYY-MM-DD' veya tarih tipinde) satırlarını yazar.
+        `replace=False` iken mevcut anahtarlar korunur. Yeniden yazılan bölüm sayısını döndürür.
+        """
+        keys, sort_by = DATASETS[name]
+        if df.empty:
+            return 0
+        df = df.copy()
+        df['tarih'] = pd.to_datetime(df['tarih']).dt.date
+        periods = pd.to_datetime(df['tarih']).dt.to_period('M')
+
+        written = 0
+        with self.locked():
+            for period, part in df.groupby(periods, sort=True):
+                part_dir = os.path.join(self._dataset_dir(name), f"yil={period.year}", f"ay={period.month}")
+                path = os.path.join(part_dir, PART_FILE)
+                if os.path.exists(path):
+                    existing = pq.read_table(path).to_pandas()
+                    # replace: yeni satırlar kazanır; aksi halde mevcutlar
+                    combined = pd.concat([existing, part] if replace else [part, existing], ignore_index=True)
+                    part = combined.drop_duplicates(keys, keep='last')
+                part = part.sort_values(sort_by, kind='stable')
+                table = pa.Table.from_pandas(part, preserve_index=False)
+
+                os.makedirs(part_dir, exist_ok=True)
+                tmp = os.path.join(part_dir, f".{uuid.uuid4().hex}.tmp")
+                pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+                os.replace(tmp, path)
+                written += 1
+        return written
+
+    def stamp(self, version: int) -> None:
+        """Depo içeriğinin karşılık geldiği SQLite geçmiş sürümünü (atomik olarak) kaydeder."""
+        with self.locked():
+            tmp = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'history_version': int(version)}, f)
+            os.replace(tmp, os.path.join(self.root, WATERMARK_FILE))
+
+    def watermark(self) -> Optional[int]:
+        """Son kaydedilen geçmiş sürümü; depo hiç damgalanmadıysa None."""
+        try:
+            with open(os.path.join(self.root, WATERMARK_FILE), 'r', encoding='utf-8') as f:
+                return int(json.load(f)['history_version'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write_prices(self, df: pd.DataFrame, replace: bool = True) -> int:
+        return self.write("prices", df[['tarih', 'ticker', 'close']], replace=replace)
+
+    def write_holdings(self, df: pd.DataFrame) -> int:
+        return self.write("holdings", df[['tarih', 'fon_adi', 'hisse_kodu', 'pay_orani', 'tahmini_lot', 'kaynak']])
+
+    # --- okuma ---
+    def _dataset(self, name: str):
+        path = self._dataset_dir(name)
+        if not os.path.isdir(path):
+            return None
+        return ds.dataset(path, format="parquet", partitioning="hive", filesystem=self._fs)
+
+    def read(self, name: str, column: Optional[str] = None, values: Optional[Iterable[str]] = None,
+             start=None, end=None, columns: Optional[List[str]] = None, date_as_str: bool = True) -> pd.DataFrame:
+        """
+        `column` IN `values` ve start <= tarih <= end filtreleriyle okur. Tarih filtreleri önce yil/ay
+        bölümlerini eler, sonra row group min/max istatistikleriyle dosya içinde uygulanır.
+        `date_as_str=True` iken 'tarih' SQLite yoluyla aynı biçimde ('YYYY-MM-DD') döner.
+        """
+        dataset = self._dataset(name)
+        keys, _ = DATASETS[name]
+        if dataset is None:
+            return pd.DataFrame(columns=columns or keys)
+
+        expr = None
+
+        def both(e):
+            return e if expr is None else expr & e
+
+        start, end = _as_date(start), _as_date(end)
+        if start is not None:
+            expr = both((ds.field("yil") > start.year)
+                        | ((ds.field("yil") == start.year) & (ds.field("ay") >= start.month)))
+            expr = both(ds.field("tarih") >= pa.scalar(start, pa.date32()))
+        if end is not None:
+            expr = both((ds.field("yil") < end.year)
+                        | ((ds.field("yil") == end.year) & (ds.field("ay") <= end.month)))
+            expr = both(ds.field("tarih") <= pa.scalar(end, pa.date32()))
+        if values is not None:
+            expr = both(ds.field(column).isin(list(values)))
+
+        wanted = columns or [f.name for f in dataset.schema if f.name not in ("yil", "ay")]
+        table = dataset.to_table(columns=wanted, filter=expr)
+        if date_as_str and "tarih" in table.column_names:
+            i = table.column_names.index("tarih")
+            table = table.set_column(i, "tarih", pc.cast(table.column("tarih"), pa.string()))
+        return table.to_pandas()
+
+    def read_prices(self, tickers: Optional[Iterable[str]] = None, start=None, end=None, **kw) -> pd.DataFrame:
+        return self.read("prices", "ticker", tickers, start, end, **kw)
+
+    def read_holdings(self, funds: Optional[Iterable[str]] = None, start=None, end=None, **kw) -> pd.DataFrame:
+        return self.read("holdings", "fon_adi", funds, start, end, **kw)
+
+
+_store: Optional[ParquetStore] = None
+
+
+def get_parquet_store(root: str = DEFAULT_ROOT) -> Optional[ParquetStore]:
+    """pyarrow yüklüyse paylaşılan depoyu, değilse None döndürür."""
+    global _store
+    if not _HAS_PYARROW:
+        return None
+    if _store is None or _store.root != root:
+        _store = ParquetStore(root)
+    return _store
@@ -0,0 +1,91 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Basit token-bucket hız sınırlayıcı.
+    rate: saniyede eklenen token sayısı, capacity: anlık izin verilen en fazla istek (burst).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate pozitif olmalı")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Token alınana kadar bekler."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    Host başına ayrı TokenBucket tutar; aynı siteye giden istekler ortak limiti paylaşır.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def scan_concurrently(
+    items: Iterable,
+    worker: Callable,
+    max_workers: int = 4,
+    on_progress: Optional[Callable[[int, int, object], None]] = None,
+) -> List[Tuple[object, object, Optional[Exception]]]:
+    """
+    `worker(item)` fonksiyonunu thread havuzunda çalıştırır.
+    Döndürür: girdi sırasıyla [(item, sonuç, hata), ...]; hata yoksa None.
+
+    `on_progress(tamamlanan, toplam, item)` çağıran thread'de çalışır,
+    bu yüzden Streamlit elemanlarını güncellemek için güvenlidir.
+    Her iş çağıranın `contextvars` bağlamının bir kopyasında çalışır (ör. çalıştırmaya özel ölçüm kaydı).
+    """
+    items = list(items)
+    total = len(items)
+    slots: List[Tuple[object, object, Optional[Exception]]] = [(item, None, None) for item in items]
+    if total == 0:
+        return slots
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as pool:
+        futures = {pool.submit(contextvars.copy_context().run, worker, item): idx for idx, item in enumerate(items)}
+        done = 0
+        for fut in as_completed(futures):
+            idx = futures[fut]
+            try:
+                slots[idx] = (items[idx], fut.result(), None)
+            except Exception as e:
+                slots[idx] = (items[idx], None, e)
+            done += 1
+            if on_progress:
+                on_progress(done, total, items[idx])
+
+    return slots
@@ -0,0 +1,68 @@
+"""
+Sahiplik ve fiyat DataFrame'leri için kompakt kolon tipleri.
+
+Sembol/fon/kaynak kolonları milyonlarca satırda birkaç yüz farklı değer tekrar eder; bunlar
+kategorik, tarihler datetime64, pay oranları float32, lotlar ise boş değer taşıyabilen Int64 tutulur.
+Fiyatlar ve TL değerleri float64 kalır (lot × fiyat çarpımında float32 hassasiyeti yetmez).
+Şemalar SQLite okumalarında ve parse sınırlarında (`get_price_history_yfinance`, tarama sonucu) uygulanır.
+"""
+from typing import Dict
+
+import pandas as pd
+
+DATETIME = 'datetime64[ns]'
+CATEGORY = 'category'
+
+# Kolon adı -> hedef tip. Şemada olmayan kolonlara dokunulmaz.
+HOLDINGS_SCHEMA: Dict[str, str] = {
+    'Tarih': DATETIME,
+    'Fon Adı': CATEGORY,
+    'Hisse': CATEGORY,
+    'Pay Oranı (%)': 'float32',  # 0-100 arası, 2 ondalık
+    'Tahmini Lot': 'Int64',
+    'Kaynak': CATEGORY,
+}
+
+PRICE_SCHEMA: Dict[str, str] = {
+    'Tarih': DATETIME,
+    'Ticker': CATEGORY,
+    'Kapanis': 'float64',
+}
+
+WHALE_SCHEMA: Dict[str, str] = {
+    'Hisse': CATEGORY,
+    'Fon Adı': CATEGORY,
+    'Fon': CATEGORY,
+    'Lot (Adet)': 'Int64',
+    'Pay Oranı (%)': 'float32',
+}
+
+
+def _convert(col: pd.Series, dtype: str) -> pd.Series:
+    if str(col.dtype) == dtype:
+        return col
+    if dtype == DATETIME:
+        out = pd.to_datetime(col)
+        return out.dt.tz_localize(None) if getattr(out.dt, 'tz', None) is not None else out.astype(DATETIME)
+    if dtype == CATEGORY:
+        return col.astype(CATEGORY)
+    if dtype == 'Int64':
+        # Kesirli/boş değerler NaN'dan <NA>'ya; lotlar tam sayıya yuvarlanır
+        return pd.to_numeric(col).round().astype('Int64')
+    return pd.to_numeric(col).astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """`schema`'daki kolonları hedef tiplere çevirir (yerinde değil, yeni DataFrame döner)."""
+    if df.empty:
+        return df
+    out = df.copy(deep=False)
+    for name, dtype in schema.items():
+        if name in out.columns:
+            out[name] = _convert(out[name], dtype)
+    return out
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """String içerikleri dahil toplam bellek kullanımı (MB)."""
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
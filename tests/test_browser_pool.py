@@ -0,0 +1,33 @@
+import logging
+
+import pytest
+
+import browser_pool
+from browser_pool import DEFAULT_POOL_SIZE, get_browser_pool
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    # Havuz başlatılmadığı sürece Playwright yüklenmez; `close` boş havuzda bir şey yapmaz
+    monkeypatch.setattr(browser_pool, "_pool", None)
+
+
+def test_first_call_sets_size_and_later_calls_share_the_pool():
+    pool = get_browser_pool(2)
+
+    assert pool.size == 2
+    assert get_browser_pool() is pool
+
+
+def test_default_size():
+    assert get_browser_pool().size == DEFAULT_POOL_SIZE
+
+
+def test_different_size_for_existing_pool_warns(caplog):
+    pool = get_browser_pool(2)
+    with caplog.at_level(logging.WARNING, logger="browser_pool"):
+        assert get_browser_pool(8) is pool
+        assert get_browser_pool(2) is pool
+
+    assert pool.size == 2
+    assert len(caplog.records) == 1
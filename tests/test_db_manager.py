@@ -0,0 +1,210 @@
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from analytics import OwnershipPanel
+from db_manager import FundDBManager
+
+
+def day(offset):
+    return (datetime.now() - timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+# Üç tarama: ikinci gün değişiklik yok, üçüncü gün BBB çıkar ve CCC girer
+SCANS = [
+    (day(20), [('AAA', 10.0, 100), ('BBB', 5.0, 50)]),
+    (day(15), [('AAA', 10.0, 100), ('BBB', 5.0, 50)]),
+    (day(10), [('AAA', 12.0, 120), ('CCC', 3.0, 30)]),
+]
+
+
+def scan_frame(tarih, rows):
+    return pd.DataFrame({
+        'Tarih': tarih, 'Fon Adı': 'FON',
+        'Hisse': [r[0] for r in rows], 'Pay Oranı (%)': [r[1] for r in rows], 'Tahmini Lot': [r[2] for r in rows],
+    })
+
+
+@pytest.fixture
+def delta_db(tmp_path):
+    db = FundDBManager(str(tmp_path / 'fon.db'), auto_populate=False, holdings_mode='delta')
+    for tarih, rows in SCANS:
+        db.store_holdings(scan_frame(tarih, rows))
+    yield db
+    db.close()
+
+
+def positions(df):
+    return sorted(zip(df['Tarih'].dt.strftime('%Y-%m-%d'), df['Hisse'].astype(str), df['Pay Oranı (%)'].round(2)))
+
+
+def test_filtered_data_rebuilds_snapshots_from_events(delta_db):
+    df = delta_db.get_filtered_data(['FON'], 30)
+
+    assert positions(df) == [
+        (day(20), 'AAA', 10.0), (day(20), 'BBB', 5.0),
+        (day(10), 'AAA', 12.0), (day(10), 'CCC', 3.0),
+    ]
+
+
+def test_filtered_data_window_starts_with_positions_held_at_start(delta_db):
+    df = delta_db.get_filtered_data(['FON'], 12)
+    start = df['Tarih'].min().strftime('%Y-%m-%d')
+
+    assert sorted(df.loc[df['Tarih'] == df['Tarih'].min(), 'Hisse'].astype(str)) == ['AAA', 'BBB']
+    assert start == day(12)
+
+
+def test_snapshot_reader_falls_back_to_events(delta_db):
+    reader = FundDBManager(delta_db.db_name, auto_populate=False)
+    try:
+        assert len(reader.get_filtered_data(['FON'], 30)) == 4
+    finally:
+        reader.close()
+
+
+def test_ownership_panel_reads_delta_database(delta_db):
+    panel = OwnershipPanel.from_db(delta_db, start=day(30), funds=['FON'])
+
+    assert not panel.empty
+
+
+def test_export_to_parquet_writes_rebuilt_snapshots(delta_db, tmp_path):
+    pytest.importorskip('pyarrow')
+    from parquet_store import ParquetStore
+
+    delta_db.parquet_store = ParquetStore(str(tmp_path / 'parquet'))
+    counts = delta_db.export_to_parquet()
+
+    assert counts['portfoy_hareketleri'] == 4
+    assert len(delta_db.get_filtered_data(['FON'], 30, source='parquet')) == 4
+
+
+def test_parquet_goes_stale_after_write_without_store(tmp_path):
+    pytest.importorskip('pyarrow')
+    from parquet_store import ParquetStore
+
+    path = str(tmp_path / 'fon.db')
+    store = ParquetStore(str(tmp_path / 'parquet'))
+    with FundDBManager(path, auto_populate=False, parquet_store=store) as writer:
+        writer.store_holdings(scan_frame(*SCANS[0]))
+        assert writer.parquet_is_current()
+
+    # `--parquet-root` olmadan çalışan bir yazıcı
+    with FundDBManager(path, auto_populate=False) as writer:
+        writer.store_holdings(scan_frame(*SCANS[2]))
+
+    with FundDBManager(path, auto_populate=False, parquet_store=store) as reader:
+        assert not reader.parquet_is_current()
+        reader.export_to_parquet()
+        assert reader.parquet_is_current()
+
+
+def test_parquet_stays_current_in_both_mode(tmp_path):
+    pytest.importorskip('pyarrow')
+    from parquet_store import ParquetStore
+
+    store = ParquetStore(str(tmp_path / 'parquet'))
+    with FundDBManager(str(tmp_path / 'fon.db'), auto_populate=False, holdings_mode='both',
+                       parquet_store=store) as db:
+        for tarih, rows in SCANS:
+            db.store_holdings(scan_frame(tarih, rows))
+
+        assert db.parquet_is_current()
+        assert store.watermark() == db.history_version() == len(SCANS)
+        assert len(db.get_changes_since(day(30), ['FON'])) > 0
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'benchmarks', 'fixtures', 'fintables_fon_portfoy.html')
+
+
+def test_fintables_fixture_lots_reach_valuation(tmp_path, monkeypatch):
+    import data_fetcher
+
+    with open(FIXTURE, 'rb') as f:
+        html = f.read()
+    monkeypatch.setattr(data_fetcher, 'get_text', lambda url, **kw: html)
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    with FundDBManager(str(tmp_path / 'fon.db'), auto_populate=False) as db:
+        db.fetch_and_store_fintables('https://fintables.invalid/fon', fon_adi='FON')
+        held = db.get_filtered_data(['FON'], 1)
+        assert (held['Tahmini Lot'] > 0).all()
+        thyao_lot = int(held.loc[held['Hisse'] == 'THYAO', 'Tahmini Lot'].iloc[0])
+
+        db._store_prices_df(pd.DataFrame({'Tarih': [today], 'Ticker': ['THYAO.IS'], 'Kapanis': [300.0]}))
+        db.refresh_valuation()
+        val = db.get_portfolio_valuation(['FON'], by_stock=True)
+
+    row = val[val['Hisse'] == 'THYAO'].iloc[0]
+    assert row['Tahmini Değer (TL)'] == pytest.approx(thyao_lot * 300.0)
+    assert row['Ağırlık'] == pytest.approx(1.0)
+
+
+def events(db):
+    df = db.get_changes_since('0000-01-01')
+    onceki = [None if pd.isna(v) else round(v, 2) for v in df['Önceki Pay (%)']]
+    return sorted(zip(df['Tarih'], df['Fon Adı'], df['Hisse'], df['Olay'], df['Pay Oranı (%)'].round(2), onceki))
+
+
+def holder_frame(tarih, rows):
+    """(fon, hisse, pay) satırları."""
+    return pd.DataFrame({'Tarih': tarih, 'Fon Adı': [r[0] for r in rows], 'Hisse': [r[1] for r in rows],
+                         'Pay Oranı (%)': [r[2] for r in rows], 'Tahmini Lot': 0})
+
+
+@pytest.fixture
+def plain_db(tmp_path):
+    db = FundDBManager(str(tmp_path / 'fon.db'), auto_populate=False, holdings_mode='delta')
+    yield db
+    db.close()
+
+
+def test_delta_fund_scope_records_entry_exit_and_threshold(plain_db):
+    d1, d2, d3 = '2024-03-01', '2024-03-02', '2024-03-03'
+    assert plain_db.ingest_holdings_delta(holder_frame(d1, [('FON', 'AAA', 10.0), ('FON', 'BBB', 5.0)])) == \
+        {'giris': 2, 'cikis': 0, 'degisim': 0, 'atlanan': 0}
+    # Eşik (0,1 puan) altındaki oynama olay değildir ve karşılaştırma tabanını kaydırmaz
+    assert plain_db.ingest_holdings_delta(holder_frame(d2, [('FON', 'AAA', 10.05), ('FON', 'BBB', 5.0)])) == \
+        {'giris': 0, 'cikis': 0, 'degisim': 0, 'atlanan': 0}
+    # BBB listede yok -> çıkış; AAA 10,0'dan (10,05'ten değil) 10,1'e: eşikte değişim
+    assert plain_db.ingest_holdings_delta(holder_frame(d3, [('FON', 'AAA', 10.1), ('FON', 'CCC', 2.0)])) == \
+        {'giris': 1, 'cikis': 1, 'degisim': 1, 'atlanan': 0}
+
+    assert events(plain_db) == [
+        (d1, 'FON', 'AAA', 'giris', 10.0, None), (d1, 'FON', 'BBB', 'giris', 5.0, None),
+        (d3, 'FON', 'AAA', 'degisim', 10.1, 10.0), (d3, 'FON', 'BBB', 'cikis', 0.0, 5.0),
+        (d3, 'FON', 'CCC', 'giris', 2.0, None),
+    ]
+    assert sorted(plain_db.get_holdings_as_of(d3)['Hisse']) == ['AAA', 'CCC']
+    assert sorted(plain_db.get_holdings_as_of(d2)['Hisse']) == ['AAA', 'BBB']
+
+
+def test_delta_fund_scope_does_not_touch_other_funds(plain_db):
+    plain_db.ingest_holdings_delta(holder_frame('2024-03-01', [('F1', 'AAA', 1.0), ('F2', 'AAA', 2.0)]))
+    plain_db.ingest_holdings_delta(holder_frame('2024-03-02', [('F1', 'BBB', 1.0)]))
+
+    assert sorted(zip(*[plain_db.get_holdings_as_of('2024-03-02')[c] for c in ('Fon Adı', 'Hisse')])) == \
+        [('F1', 'BBB'), ('F2', 'AAA')]
+
+
+def test_delta_stock_scope_exits_funds_missing_from_company_page(plain_db):
+    # Şirket sayfası: hissenin tüm fon sahiplerini listeler; diğer hisselerin pozisyonları korunur
+    plain_db.ingest_holdings_delta(holder_frame('2024-03-01', [('F1', 'AAA', 1.0), ('F2', 'AAA', 2.0),
+                                                               ('F1', 'BBB', 3.0)]), scope='stock')
+    counts = plain_db.ingest_holdings_delta(holder_frame('2024-03-02', [('F2', 'AAA', 2.5)]), scope='stock')
+
+    assert counts == {'giris': 0, 'cikis': 1, 'degisim': 1, 'atlanan': 0}
+    held = plain_db.get_holdings_as_of('2024-03-02')
+    assert sorted(zip(held['Fon Adı'], held['Hisse'])) == [('F1', 'BBB'), ('F2', 'AAA')]
+
+
+def test_delta_skips_snapshots_older_than_state(plain_db):
+    plain_db.ingest_holdings_delta(holder_frame('2024-03-05', [('FON', 'AAA', 1.0)]))
+    counts = plain_db.ingest_holdings_delta(holder_frame('2024-03-01', [('FON', 'BBB', 1.0)]))
+
+    assert counts == {'giris': 0, 'cikis': 0, 'degisim': 0, 'atlanan': 1}
+    assert list(plain_db.get_holdings_as_of('2024-03-05')['Hisse']) == ['AAA']
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fon_tracer
+from fon_tracer import LockHeldError, ProcessLock, is_daemon_running, lock_path_for
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="PID yoklaması POSIX'e özgü")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "fon.db")
+
+
+def write_lock_file(db_path, text):
+    with open(lock_path_for(db_path), "w") as fh:
+        fh.write(text)
+
+
+def test_no_lock_file_means_not_running(db_path):
+    assert not is_daemon_running(db_path)
+
+
+def test_daemon_lock_is_detected_and_cleared_on_release(db_path):
+    lock = ProcessLock(lock_path_for(db_path), role="daemon").acquire()
+    try:
+        assert is_daemon_running(db_path)
+        with pytest.raises(LockHeldError):
+            ProcessLock(lock_path_for(db_path)).acquire()
+    finally:
+        lock.release()
+    assert not is_daemon_running(db_path)
+
+
+def test_other_commands_holding_the_lock_are_not_the_daemon(db_path):
+    with ProcessLock(lock_path_for(db_path), role="sync-prices"):
+        assert not is_daemon_running(db_path)
+
+
+def test_daemon_in_another_process_is_detected(db_path):
+    child = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import sys, time; sys.path.insert(0, {ROOT!r}); from fon_tracer import ProcessLock; "
+         f"l = ProcessLock({lock_path_for(db_path)!r}, role='daemon').acquire(); print('hazir', flush=True); "
+         f"sys.stdin.readline()"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline().strip() == "hazir"
+        assert is_daemon_running(db_path)
+    finally:
+        child.communicate("\n", timeout=30)
+    # Süreç öldü; dosyada kalan "daemon <pid>" bayattır
+    assert not is_daemon_running(db_path)
+
+
+def test_reused_pid_without_held_lock_is_not_running(db_path):
+    # PID yaşıyor (bu süreç) ama kilidi kimse tutmuyor: PID başka bir sürece geçmiş bayat dosya
+    write_lock_file(db_path, f"daemon {os.getpid()}")
+
+    assert not is_daemon_running(db_path)
+
+
+def test_stale_pid_of_dead_process_is_not_running(db_path):
+    child = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    write_lock_file(db_path, f"daemon {child.stdout.strip()}")
+
+    assert not fon_tracer._pid_alive(int(child.stdout))
+    assert not is_daemon_running(db_path)
+
+
+def test_probe_skips_the_lock_for_non_daemon_files(db_path, monkeypatch):
+    write_lock_file(db_path, f"populate {os.getpid()}")
+    import fcntl
+
+    calls = []
+    monkeypatch.setattr(fcntl, "flock", lambda *a: calls.append(a))
+    is_daemon_running(db_path)
+
+    assert calls == []
@@ -0,0 +1,67 @@
+import pytest
+
+from fund_matcher import FundMatcher, tokenize, turkish_fold
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('DENİZ', 'deniz'),
+    ('DENIZ', 'deniz'),
+    ('Deniz', 'deniz'),
+    ('IŞIK', 'isik'),
+    ('ışık', 'isik'),
+    ('PORTFÖY', 'portfoy'),
+    ('KATILIM ŞİRKETİ', 'katilim sirketi'),
+    ('Kâr', 'kar'),
+])
+def test_turkish_fold(text, expected):
+    assert turkish_fold(text) == expected
+
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize('İŞ PORTFÖY (HİSSE) FONU-A.Ş.') == ['is', 'portfoy', 'hisse', 'fonu', 'a', 's']
+
+
+@pytest.fixture
+def matcher():
+    return FundMatcher({
+        'DENİZ PORTFÖY': ['DENİZ PORTFÖY'],
+        'DENİZ YATIRIM': ['DENİZ YATIRIM', 'DENİZBANK'],
+        'ATLAS': ['ATLAS'],
+        'IŞIK': ['IŞIK PORTFÖY'],
+    })
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('DENİZ PORTFÖY YÖNETİMİ A.Ş.', 'DENİZ PORTFÖY'),
+    ('Deniz Portfoy Hisse Senedi Fonu', 'DENİZ PORTFÖY'),
+    ('DENIZ YATIRIM MENKUL', 'DENİZ YATIRIM'),
+    ('DenizBank A.Ş.', 'DENİZ YATIRIM'),
+    ('ışık portföy', 'IŞIK'),
+    ('ISIK PORTFOY', 'IŞIK'),
+    ('ATLAS PORTFÖY', 'ATLAS'),
+])
+def test_match_is_turkish_aware(matcher, name, expected):
+    assert matcher.match(name) == expected
+
+
+@pytest.mark.parametrize('name', [
+    'ATLASPORT HOLDİNG',  # kelimenin bir parçası eşleşmez
+    'DENİZ',              # hedefin yalnızca ilk kelimesi
+    'PORTFÖY DENİZ',      # kelime sırası önemli
+    '',
+])
+def test_partial_tokens_do_not_match(matcher, name):
+    assert matcher.match(name) is None
+
+
+def test_longest_match_wins_and_match_all_lists_every_target():
+    m = FundMatcher(['TERA', 'TERA PORTFÖY', 'MAC'])
+
+    assert m.match('TERA PORTFÖY VE MAC') == 'TERA PORTFÖY'
+    assert m.match_all('TERA PORTFÖY VE MAC') == ['TERA PORTFÖY', 'MAC']
+    assert m.match('MAC VE TERA') == 'MAC'
+
+
+def test_empty_alias_is_rejected():
+    with pytest.raises(ValueError):
+        FundMatcher(['...'])
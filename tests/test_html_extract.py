@@ -0,0 +1,54 @@
+import math
+
+import pytest
+
+from html_extract import extract_fund_holders, extract_holdings_table, parse_tr_number
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('0.123', 0.123),
+    ('12.345', 12.345),
+    ('3.055.350', 3055350.0),
+    ('%5,23', 5.23),
+    ('1.234,5', 1234.5),
+    ('42', 42.0),
+])
+def test_parse_tr_number(text, expected):
+    assert parse_tr_number(text) == pytest.approx(expected)
+
+
+def test_parse_tr_number_integer_strips_single_thousands_group():
+    assert parse_tr_number('12.345', integer=True) == 12345.0
+    assert parse_tr_number('12,5', integer=True) == 12.5
+
+
+def test_parse_tr_number_invalid_is_nan():
+    assert math.isnan(parse_tr_number('-'))
+    assert math.isnan(parse_tr_number('abc'))
+
+
+TABLE = """
+<table>
+  <thead><tr><th>Hisse</th><th>Lot</th><th>Pay (%)</th></tr></thead>
+  <tbody>
+    <tr><td>THYAO</td><td>12.345</td><td>0.123</td></tr>
+    <tr><td>ASELS</td><td>3.055.350</td><td>%5,23</td></tr>
+  </tbody>
+</table>
+"""
+
+
+def test_holdings_table_keeps_ratio_decimals_and_lot_thousands():
+    df = extract_holdings_table(TABLE)
+
+    assert df['Lot'].tolist() == [12345.0, 3055350.0]
+    assert df['Pay (%)'].tolist() == pytest.approx([0.123, 5.23])
+
+
+def test_fund_holders_ratio_with_dot_decimal():
+    html = '<div class="kutu">' + TABLE.replace('THYAO', 'A FONU').replace('ASELS', 'B FONU') + '</div>'
+
+    df = extract_fund_holders(html, 'div.kutu')
+
+    assert df['Lot (Adet)'].tolist() == [12345.0, 3055350.0]
+    assert df['Pay Oranı (%)'].tolist() == pytest.approx([0.123, 5.23])
@@ -0,0 +1,114 @@
+import pytest
+import requests
+
+import http_cache
+import http_client
+from http_cache import ResponseCache, source_of
+
+
+class FakeClock:
+    """`http_cache.time` yerine geçer: `time()` elle ilerletilir."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(http_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return ResponseCache(str(tmp_path / "http_cache.db"), max_bytes=300,
+                         ttls={"fintables.com": 100}, default_ttl=10)
+
+
+def test_source_strips_www():
+    assert source_of("https://www.fintables.com/fonlar/TTE") == "fintables.com"
+
+
+def test_ttl_is_per_source(cache, clock):
+    cache.put("https://www.fintables.com/a", b"x")
+    cache.put("https://example.com/a", b"y")
+    fintables = cache.get("https://www.fintables.com/a")[2]
+    other = cache.get("https://example.com/a")[2]
+
+    clock.advance(50)
+    assert cache.is_fresh(fintables, "https://www.fintables.com/a")
+    assert not cache.is_fresh(other, "https://example.com/a")
+    clock.advance(50)
+    assert not cache.is_fresh(fintables, "https://www.fintables.com/a")
+
+
+def test_touch_renews_freshness(cache, clock):
+    cache.put("https://example.com/a", b"x", etag='"v1"')
+    clock.advance(20)
+    cache.touch("https://example.com/a")
+
+    content, _, fetched_at, etag, _ = cache.get("https://example.com/a")
+    assert (content, etag) == (b"x", '"v1"')
+    assert cache.is_fresh(fetched_at, "https://example.com/a")
+
+
+def test_lru_eviction_removes_least_recently_accessed(cache, clock):
+    for name in "abc":
+        cache.put(f"https://example.com/{name}", bytes(100))
+        clock.advance(1)
+    cache.get("https://example.com/a")  # a artık en son erişilen
+    clock.advance(1)
+
+    cache.put("https://example.com/d", bytes(100))
+
+    assert cache.get("https://example.com/b") is None
+    assert all(cache.get(f"https://example.com/{n}") is not None for n in "acd")
+    assert cache.stats()["bytes"] == 300
+
+
+def test_oversized_entry_evicts_enough_to_fit(cache, clock):
+    for name in "ab":
+        cache.put(f"https://example.com/{name}", bytes(100))
+        clock.advance(1)
+
+    cache.put("https://example.com/big", bytes(250))
+
+    assert cache.stats() == {"entries": 1, "bytes": 250, "max_bytes": 300}
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        status, body, resp_headers = self.responses.pop(0)
+        resp = requests.Response()
+        resp.url, resp.status_code, resp._content, resp.encoding = url, status, body, "utf-8"
+        resp.headers.update(resp_headers)
+        return resp
+
+
+def test_fetch_serves_fresh_entries_and_revalidates_stale_ones(cache, clock, monkeypatch):
+    session = FakeSession([(200, b"v1", {"ETag": '"e1"'}), (304, b"", {})])
+    monkeypatch.setattr(http_client, "get_cache", lambda: cache)
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    url = "https://example.com/sayfa"
+
+    assert http_client.fetch(url).content == b"v1"
+    hit = http_client.fetch(url)
+    assert (hit.content, hit.from_cache, len(session.requests)) == (b"v1", True, 1)
+
+    clock.advance(11)  # TTL doldu: koşullu istek, 304 -> saklanan gövde
+    revalidated = http_client.fetch(url)
+    assert session.requests[-1]["If-None-Match"] == '"e1"'
+    assert (revalidated.content, revalidated.from_cache) == (b"v1", True)
+    assert http_client.fetch(url).from_cache and len(session.requests) == 2
@@ -0,0 +1,250 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, Worker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeClock:
+    """`job_queue.time` yerine geçer: `time()` elle ilerletilir."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(job_queue, "time", fake)
+    # ±%10 sapma testlerde kapalı
+    monkeypatch.setattr(job_queue.random, "uniform", lambda a, b: 1.0)
+    return fake
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    q = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=10, max_attempts=3, backoff_base=5, backoff_max=60)
+    yield q
+    q.close()
+
+
+def status_of(q, job_id):
+    return q._conn.execute("SELECT status, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def test_enqueue_is_unique_per_kind_and_key(queue):
+    assert queue.enqueue("fiyat", "THYAO", {"t": 1})
+    assert not queue.enqueue("fiyat", "THYAO", {"t": 2})
+    assert queue.enqueue("sahiplik", "THYAO", {})
+
+    assert queue.stats()["pending"] == 2
+
+
+def test_claim_leases_each_job_once(queue):
+    queue.enqueue_many("fiyat", [(str(i), {}) for i in range(3)])
+
+    first = queue.claim("a", limit=2)
+    second = queue.claim("b", limit=2)
+
+    assert [j.key for j in first] == ["0", "1"]
+    assert [j.key for j in second] == ["2"]
+    assert queue.claim("c") == []
+    assert all(j.attempts == 1 for j in first + second)
+
+
+def test_claim_filters_by_kind(queue):
+    queue.enqueue("fiyat", "a", {})
+    queue.enqueue("sahiplik", "b", {})
+
+    assert [j.kind for j in queue.claim("w", kinds=["sahiplik"], limit=5)] == ["sahiplik"]
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_loses_ack(queue, clock):
+    queue.enqueue("fiyat", "a", {})
+    job = queue.claim("a")[0]
+
+    clock.advance(9)
+    assert queue.claim("b") == []
+    clock.advance(2)
+    again = queue.claim("b")
+
+    assert [j.id for j in again] == [job.id]
+    assert again[0].attempts == 2
+    assert not queue.ack(job.id, "a")
+    assert queue.ack(job.id, "b")
+    assert status_of(queue, job.id)[0] == "done"
+
+
+def test_heartbeat_extends_lease_only_for_owner(queue, clock):
+    queue.enqueue("fiyat", "a", {})
+    job = queue.claim("a")[0]
+
+    clock.advance(8)
+    assert queue.heartbeat(job.id, "a")
+    assert not queue.heartbeat(job.id, "b")
+    clock.advance(8)  # ilk kira bitmiş olurdu; uzatılan kira sürüyor
+
+    assert queue.claim("b") == []
+    clock.advance(3)
+    assert [j.id for j in queue.claim("b")] == [job.id]
+
+
+def test_fail_schedules_exponential_backoff(queue, clock):
+    queue.enqueue("fiyat", "a", {})
+    job = queue.claim("w")[0]
+
+    assert queue.fail(job.id, "w", "zaman aşımı") == "pending"
+    assert queue.next_available_in() == pytest.approx(5)
+    clock.advance(4)
+    assert queue.claim("w") == []
+    clock.advance(1)
+    job = queue.claim("w")[0]
+    assert job.attempts == 2
+
+    queue.fail(job.id, "w", "zaman aşımı")
+    assert queue.next_available_in() == pytest.approx(10)
+
+
+def test_backoff_is_capped_and_jittered(tmp_path, monkeypatch):
+    q = JobQueue(str(tmp_path / "jobs.db"), backoff_base=30, backoff_max=100)
+    try:
+        monkeypatch.setattr(job_queue.random, "uniform", lambda a, b: b)
+        assert q.backoff(1) == pytest.approx(33)
+        assert q.backoff(10) == pytest.approx(110)
+    finally:
+        q.close()
+
+
+def test_dead_letter_after_max_attempts_and_requeue(queue, clock):
+    queue.enqueue("fiyat", "a", {"t": 1})
+    queue.enqueue("sahiplik", "b", {})
+    job_id = None
+    for attempt in range(3):
+        job = queue.claim("w", kinds=["fiyat"])[0]
+        job_id = job.id
+        status = queue.fail(job.id, "w", f"hata {attempt}")
+        clock.advance(100)
+    assert status == "dead"
+    assert queue.claim("w", kinds=["fiyat"]) == []
+    [letter] = queue.dead_letters()
+    assert (letter["key"], letter["attempts"], letter["last_error"]) == ("a", 3, "hata 2")
+
+    assert queue.requeue_dead(kind="sahiplik") == 0
+    assert queue.requeue_dead(kind="fiyat") == 1
+    again = queue.claim("w", kinds=["fiyat"])[0]
+    assert (again.id, again.attempts, again.payload) == (job_id, 1, {"t": 1})
+
+
+def test_expired_lease_without_attempts_left_goes_dead(queue, clock):
+    queue.enqueue("fiyat", "a", {})
+    for _ in range(3):
+        job = queue.claim("w")[0]
+        clock.advance(11)  # worker çöktü: ne ack ne fail
+
+    assert queue.claim("w") == []
+    assert status_of(queue, job.id) == ("dead", 3)
+    assert queue.dead_letters()[0]["last_error"] == "kira süresi doldu"
+
+
+def test_release_returns_job_without_counting_attempt(queue):
+    queue.enqueue("fiyat", "a", {})
+    job = queue.claim("a")[0]
+
+    assert not queue.release(job.id, "b")
+    assert queue.release(job.id, "a")
+    again = queue.claim("b")[0]
+    assert (again.id, again.attempts) == (job.id, 1)
+
+
+def test_purge_removes_old_done_jobs_only(queue, clock):
+    queue.enqueue_many("fiyat", [("a", {}), ("b", {}), ("c", {})])
+    jobs = queue.claim("w", limit=3)
+    queue.ack(jobs[0].id, "w")
+    queue.fail(jobs[1].id, "w", "x")
+    queue._conn.execute("UPDATE jobs SET status = 'dead' WHERE id = ?", (jobs[1].id,))
+    clock.advance(100)
+    queue.ack(jobs[2].id, "w")
+
+    assert queue.purge(older_than_seconds=50) == 1
+    assert queue.stats() == {"pending": 0, "leased": 0, "done": 1, "dead": 1}
+
+
+def test_requeue_on_enqueue_restarts_done_job(queue):
+    queue.enqueue("fiyat", "a", {"v": 1})
+    job = queue.claim("w")[0]
+    queue.ack(job.id, "w")
+
+    assert not queue.enqueue("fiyat", "a", {"v": 2})
+    assert queue.enqueue("fiyat", "a", {"v": 2}, requeue=True)
+    assert queue.claim("w")[0].payload == {"v": 2}
+
+
+def test_worker_runs_handlers_and_counts_outcomes(tmp_path):
+    with JobQueue(str(tmp_path / "jobs.db"), max_attempts=1) as q:
+        q.enqueue_many("ok", [("1", {"n": 1}), ("2", {"n": 2})])
+        q.enqueue("kotu", "3", {})
+        seen, idle = [], []
+
+        def bad(payload):
+            raise ValueError("bozuk sayfa")
+
+        worker = Worker(q, {"ok": lambda p: seen.append(p["n"]), "kotu": bad}, worker_id="w",
+                        on_idle=lambda: idle.append(1))
+        result = worker.run(exit_when_empty=True)
+
+        assert sorted(seen) == [1, 2]
+        assert result == {"done": 2, "failed": 0, "dead": 1, "lost": 0}
+        assert idle == [1]
+        assert q.dead_letters()[0]["last_error"] == "ValueError: bozuk sayfa"
+
+
+CLAIMER = textwrap.dedent("""
+    import json, sys
+    sys.path.insert(0, {root!r})
+    from job_queue import JobQueue
+
+    q = JobQueue({path!r})
+    got = []
+    while True:
+        jobs = q.claim(sys.argv[1], limit=3)
+        if not jobs:
+            break
+        for job in jobs:
+            got.append(job.id)
+            q.ack(job.id, sys.argv[1])
+    print(json.dumps(got))
+""")
+
+
+def test_claim_under_process_contention_hands_out_each_job_once(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with JobQueue(path) as q:
+        q.enqueue_many("fiyat", [(str(i), {}) for i in range(300)])
+
+    script = CLAIMER.format(root=ROOT, path=path)
+    procs = [subprocess.Popen([sys.executable, "-c", script, f"w{i}"], stdout=subprocess.PIPE, text=True)
+             for i in range(4)]
+    claimed = [json.loads(p.communicate(timeout=120)[0]) for p in procs]
+
+    ids = [i for got in claimed for i in got]
+    assert len(ids) == 300
+    assert len(set(ids)) == 300
+    with JobQueue(path) as q:
+        assert q.stats()["done"] == 300
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from db_manager import FundDBManager
+from parquet_store import ParquetStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Her süreç aynı aya farklı ticker'larla fiyat yazar; hepsi aynı bölüm dosyasını oku-birleştir-yaz yapar
+WRITER = textwrap.dedent("""
+    import sys
+    sys.path.insert(0, {root!r})
+    import pandas as pd
+    from db_manager import FundDBManager
+    from parquet_store import ParquetStore
+
+    worker = int(sys.argv[1])
+    db = FundDBManager({db!r}, auto_populate=False, parquet_store=ParquetStore({store!r}))
+    for i in range({batches}):
+        db._store_prices_df(pd.DataFrame({{
+            'Tarih': ['2024-03-04'], 'Ticker': [f'T{{worker}}_{{i}}.IS'], 'Kapanis': [float(i)],
+        }}))
+    db.close()
+""")
+
+
+def test_concurrent_processes_do_not_lose_partition_rows(tmp_path):
+    db_path, root = str(tmp_path / 'fon.db'), str(tmp_path / 'parquet')
+    FundDBManager(db_path, auto_populate=False).close()
+    script = WRITER.format(root=ROOT, db=db_path, store=root, batches=10)
+
+    procs = [subprocess.Popen([sys.executable, '-c', script, str(w)]) for w in range(4)]
+    assert [p.wait(timeout=120) for p in procs] == [0] * 4
+
+    store = ParquetStore(root)
+    with FundDBManager(db_path, auto_populate=False, parquet_store=store) as db:
+        assert len(store.read_prices()) == 40
+        assert db.parquet_is_current()
+
+
+def test_locked_is_reentrant_and_releases(tmp_path):
+    store = ParquetStore(str(tmp_path / 'parquet'))
+    with store.locked():
+        with store.locked():
+            store.stamp(3)
+    assert store._lock_fh is None
+    assert store.watermark() == 3
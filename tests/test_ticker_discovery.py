@@ -0,0 +1,46 @@
+import json
+
+import data_fetcher
+import ticker_discovery
+from ticker_discovery import DEFAULT_MASTER_PATH, SymbolMaster, cached_master, discover_tickers
+
+
+def write_master(directory, symbols):
+    path = directory / DEFAULT_MASTER_PATH
+    path.write_text(json.dumps({'updated': '2000-01-01T00:00:00', 'symbols': symbols}), encoding='utf-8')
+    return path
+
+
+def test_cached_master_uses_stale_cache_without_download(tmp_path, monkeypatch):
+    path = write_master(tmp_path, ['THYAO.IS', 'ASELS.IS'])
+    monkeypatch.setattr(SymbolMaster, '_download', lambda self: (_ for _ in ()).throw(AssertionError('indirme')))
+
+    master = cached_master(str(path))
+
+    assert master.symbols == {'THYAO.IS', 'ASELS.IS'}
+
+
+def test_cached_master_without_cache_checks_format_only(tmp_path):
+    master = cached_master(str(tmp_path / 'yok.json'))
+
+    assert master.symbols is None
+    assert master.split(['abcde', '12AB']) == (['ABCDE.IS'], ['12AB'])
+
+
+def test_discover_tickers_rejects_well_formed_unlisted_code(tmp_path, monkeypatch):
+    write_master(tmp_path, ['THYAO.IS', 'ASELS.IS'])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ticker_discovery, '_resolve_source', lambda cfg, refresh, limiter: cfg['raw'])
+
+    result = discover_tickers({'FON': {'raw': ['THYAO', 'ZZZZZ', 'asels']}}, max_workers=1)
+
+    assert result['found'] == {'FON': ['THYAO.IS', 'ASELS.IS']}
+    assert result['rejected'] == {'FON': ['ZZZZZ']}
+
+
+def test_extract_tickers_from_fintables_filters_by_cached_list(tmp_path, monkeypatch):
+    write_master(tmp_path, ['THYAO.IS'])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ticker_discovery, 'tickers_from_fintables', lambda url: ['THYAO', 'ZZZZZ'])
+
+    assert data_fetcher.extract_tickers_from_fintables('https://example.invalid') == ['THYAO.IS']
@@ -0,0 +1,264 @@
+"""
+Fon kaynaklarından toplu ticker keşfi.
+
+Birçok fonun Fintables sayfası (veya Yandex araması) eşzamanlı olarak, host başına hız limitiyle
+çözülür. Bulunan kodlar biçim kontrolünden ve yerelde önbelleğe alınan BIST sembol listesinden
+(`SymbolMaster`) geçirilir, sıra korunarak tekilleştirilir ve `fund_sources.json`'a tek seferde,
+atomik olarak (geçici dosya + `os.replace`) yazılır. Yazım yarıda kesilirse eski dosya bozulmaz.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import quote_plus
+
+from lxml import html as lxml_html
+
+from data_fetcher import parse_fintables_holdings
+from html_extract import css_to_xpath
+from http_client import get_text
+from scanner import HostRateLimiter, scan_concurrently
+
+logger = logging.getLogger(__name__)
+
+BIST_SUFFIX = '.IS'
+# BIST kodları: harfle başlar, 3-6 büyük harf/rakam (ör. THYAO, A1CAP, ISCTR)
+_CODE_RE = re.compile(r'^[A-Z][A-Z0-9]{2,5}$')
+_CODE_SEARCH_RE = re.compile(r'\b([A-Z][A-Z0-9]{2,5})\b')
+_TR_UPPER = str.maketrans({'i': 'İ', 'ı': 'I', 'ç': 'Ç', 'ğ': 'Ğ', 'ö': 'Ö', 'ş': 'Ş', 'ü': 'Ü'})
+_TR_ASCII = str.maketrans({'İ': 'I', 'Ç': 'C', 'Ğ': 'G', 'Ö': 'O', 'Ş': 'S', 'Ü': 'U'})
+
+DEFAULT_MASTER_PATH = 'bist_symbols.json'
+# KAP "BIST Şirketleri" sayfası: şirket kodları bağlantı metinlerinde (bazıları virgülle ayrılmış) yer alır
+DEFAULT_MASTER_URL = 'https://www.kap.org.tr/tr/bist-sirketler'
+DEFAULT_MASTER_MAX_AGE = datetime.timedelta(days=7)
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 4.0  # host başına saniyede en fazla istek
+
+
+def normalize_ticker(raw) -> Optional[str]:
+    """' thyao ', 'THYAO.IS' -> 'THYAO.IS'; BIST kodu biçiminde değilse None."""
+    code = str(raw).strip().translate(_TR_UPPER).upper().translate(_TR_ASCII)
+    if code.endswith(BIST_SUFFIX):
+        code = code[:-len(BIST_SUFFIX)]
+    return code + BIST_SUFFIX if _CODE_RE.match(code) else None
+
+
+def dedupe(items: Iterable) -> list:
+    """İlk görülme sırasını koruyarak tekilleştirir."""
+    return list(dict.fromkeys(items))
+
+
+def atomic_write_json(path: str, data) -> None:
+    """JSON'u aynı dizindeki geçici dosyaya yazıp tek adımda eskisinin yerine koyar."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SymbolMaster:
+    """
+    Yerelde önbelleğe alınan BIST sembol listesi.
+
+    Liste `path`'te `{"updated": ISO zaman, "symbols": [...]}` olarak tutulur; `max_age`'den eskiyse
+    `url`'den yenilenir. Yenileme başarısız olursa eski liste kullanılır; hiç liste yoksa doğrulama
+    yalnızca biçim kontrolüyle yapılır (`symbols` None).
+    """
+
+    def __init__(self, path: str = DEFAULT_MASTER_PATH, url: Optional[str] = DEFAULT_MASTER_URL,
+                 max_age: datetime.timedelta = DEFAULT_MASTER_MAX_AGE):
+        self.path = path
+        self.url = url
+        self.max_age = max_age
+        self.symbols: Optional[FrozenSet[str]] = None
+
+    def _read_cache(self) -> Tuple[Optional[FrozenSet[str]], Optional[datetime.datetime]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return frozenset(data['symbols']), datetime.datetime.fromisoformat(data['updated'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def _download(self) -> FrozenSet[str]:
+        doc = lxml_html.fromstring(get_text(self.url))
+        found = []
+        for text in doc.xpath('//a/text()'):
+            for part in text.split(','):
+                # Yalnızca tamamen kod olan bağlantı metinleri alınır (şirket adları değil)
+                if _CODE_RE.match(part.strip()):
+                    found.append(part.strip() + BIST_SUFFIX)
+        if not found:
+            raise ValueError(f"{self.url} içinde sembol bulunamadı")
+        return frozenset(found)
+
+    def load(self, refresh: bool = False) -> Optional[FrozenSet[str]]:
+        """Listeyi önbellekten (gerekirse yenileyerek) yükler."""
+        symbols, updated = self._read_cache()
+        stale = updated is None or datetime.datetime.now() - updated > self.max_age
+        if self.url and (refresh or stale):
+            try:
+                symbols = self._download()
+                atomic_write_json(self.path, {
+                    'updated': datetime.datetime.now().isoformat(timespec='seconds'),
+                    'symbols': sorted(symbols),
+                })
+                logger.info("BIST sembol listesi güncellendi: %d sembol", len(symbols))
+            except Exception as e:
+                logger.warning("BIST sembol listesi yenilenemedi (%s); %s", e,
+                               "önbellekteki liste kullanılıyor" if symbols else "yalnızca biçim kontrolü yapılacak")
+        self.symbols = symbols
+        return symbols
+
+    def split(self, tickers: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """(geçerli, reddedilen) — geçerliler normalize edilmiş, sıralı ve tekil."""
+        valid, rejected = [], []
+        for raw in tickers:
+            ticker = normalize_ticker(raw)
+            if ticker is None or (self.symbols is not None and ticker not in self.symbols):
+                rejected.append(str(raw))
+            else:
+                valid.append(ticker)
+        return dedupe(valid), dedupe(rejected)
+
+
+def cached_master(path: str = DEFAULT_MASTER_PATH) -> SymbolMaster:
+    """İndirme yapmadan önbellekteki listeyi yükler; önbellek yoksa yalnızca biçim kontrolü yapılır."""
+    master = SymbolMaster(path, url=None)
+    master.load()
+    return master
+
+
+# --- Çözücüler: tek bir kaynaktan ham kod listesi ---
+def tickers_from_fintables(url: str, refresh: bool = False, rate_limiter=None) -> List[str]:
+    """Fintables portföy tablosunun hisse kodu kolonundaki kodlar (tablo sırasıyla)."""
+    df = parse_fintables_holdings(url, refresh=refresh, rate_limiter=rate_limiter)
+    hisse_col = next((c for c in df.columns if 'hisse' in str(c).lower() or 'kod' in str(c).lower()), None)
+    if hisse_col is None:
+        raise ValueError('Hisse kodu kolonu bulunamadı')
+    return dedupe(str(v) for v in df[hisse_col].dropna())
+
+
+def tickers_from_yandex(query: str, max_results: int = 10, refresh: bool = False, rate_limiter=None) -> List[str]:
+    """
+    Yandex Finance aramasındaki sonuçlardan kodlar (sonuç sırasıyla).
+    Not: Yandex'in resmi bir public API'si yoktur, bu fonksiyon HTML scraping ile çalışır.
+    """
+    url = f'https://yandex.com/quotes/search?text={quote_plus(query)}'
+    doc = lxml_html.fromstring(get_text(url, refresh=refresh, rate_limiter=rate_limiter))
+    found = []
+    for a in doc.xpath(css_to_xpath('a.QuotesListItem__link')):
+        m = _CODE_SEARCH_RE.search(a.text_content().strip())
+        if m:
+            found.append(m.group(1))
+    return dedupe(found)[:max_results]
+
+
+def _resolve_source(cfg: dict, refresh: bool, rate_limiter) -> List[str]:
+    if cfg.get('fintables_url'):
+        return tickers_from_fintables(cfg['fintables_url'], refresh=refresh, rate_limiter=rate_limiter)
+    if cfg.get('yandex_query'):
+        return tickers_from_yandex(cfg['yandex_query'], refresh=refresh, rate_limiter=rate_limiter)
+    raise ValueError("fintables_url veya yandex_query tanımlı değil")
+
+
+def discover_tickers(
+    sources: Dict[str, dict],
+    master: Optional[SymbolMaster] = None,
+    max_workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    refresh: bool = False,
+    on_progress: Optional[Callable[[int, int, object], None]] = None,
+) -> Dict[str, dict]:
+    """
+    Fonları eşzamanlı çözer. Döndürür: {'found': {fon: [ticker]}, 'rejected': {fon: [ham kod]},
+    'failed': {fon: hata mesajı}} — sözlükler `sources` sırasındadır.
+    """
+    master = master or cached_master()  # önbellekte liste yoksa yalnızca biçim kontrolü
+    limiter = HostRateLimiter(rate=rate)
+    scanned = scan_concurrently(
+        list(sources),
+        lambda fon: _resolve_source(sources[fon], refresh, limiter),
+        max_workers=max_workers,
+        on_progress=on_progress,
+    )
+    result = {'found': {}, 'rejected': {}, 'failed': {}}
+    for fon, raw, err in scanned:
+        if err is not None:
+            result['failed'][fon] = str(err)
+            continue
+        valid, rejected = master.split(raw)
+        if rejected:
+            result['rejected'][fon] = rejected
+        if valid:
+            result['found'][fon] = valid
+        else:
+            result['failed'][fon] = 'Geçerli BIST kodu bulunamadı'
+    return result
+
+
+def update_fund_sources(
+    json_path: str = 'fund_sources.json',
+    only_missing: bool = True,
+    master: Optional[SymbolMaster] = None,
+    max_workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    refresh: bool = False,
+) -> dict:
+    """
+    `fund_sources.json`'daki fonların ticker listelerini toplu günceller (`only_missing=True` iken
+    yalnızca boş olanları). Dosya en fazla bir kez, atomik olarak yazılır.
+    Döndürür: {'updated': {fon: [ticker]}, 'failed': {fon: hata}, 'rejected': {fon: [ham kod]}, 'written': bool}
+    """
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f'{json_path} bulunamadı')
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    todo = {
+        fon: cfg for fon, cfg in data.items()
+        if not only_missing or not isinstance(cfg.get('tickers'), list) or not cfg['tickers']
+    }
+    result = {'updated': {}, 'failed': {}, 'rejected': {}, 'written': False}
+    if not todo:
+        logger.info('Değişiklik yok, tickers zaten dolu.')
+        return result
+
+    if master is None:
+        master = SymbolMaster()
+        master.load()
+    discovered = discover_tickers(todo, master=master, max_workers=max_workers, rate=rate, refresh=refresh)
+    result['failed'] = discovered['failed']
+    result['rejected'] = discovered['rejected']
+    for fon, tickers in discovered['found'].items():
+        if data[fon].get('tickers') != tickers:
+            data[fon]['tickers'] = tickers
+            result['updated'][fon] = tickers
+    for fon, err in result['failed'].items():
+        logger.warning("%s için tickers çekilemedi: %s", fon, err)
+    for fon, codes in result['rejected'].items():
+        logger.info("%s: BIST listesinde olmayan kodlar atlandı: %s", fon, codes)
+
+    if result['updated']:
+        atomic_write_json(json_path, data)
+        result['written'] = True
+        logger.info('%s güncellendi: %d fon.', json_path, len(result['updated']))
+    else:
+        logger.info('Değişiklik yok.')
+    return result